@@ -2,9 +2,13 @@
 # Versión: GAMIFICACION_FLOW_V3.0
 
 from django.contrib import admin
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, redirect
 from django.urls import path
 from django.template.response import TemplateResponse
-from .models import ModeloEjercicio, Ejercicio, PasoResolucion, ProgresoUsuario
+from django.db import transaction
+from .models import ModeloEjercicio, Ejercicio, PasoResolucion, ProgresoUsuario, MovimientoPuntos, RegistroAprendizaje, Trabajo
+from . import puntos, trabajos
 
 class PasoResolucionInline(admin.TabularInline):
     model = PasoResolucion
@@ -13,7 +17,7 @@ class PasoResolucionInline(admin.TabularInline):
 @admin.register(Ejercicio)
 class EjercicioAdmin(admin.ModelAdmin):
     list_display = ('ecuacion_str', 'modelo', 'tipo', 'solucion')
-    list_filter = ('modelo', 'tipo')
+    list_filter = ('modelo', 'tipo', 'generado')
     inlines = [PasoResolucionInline]
     
     def get_urls(self):
@@ -24,23 +28,46 @@ class EjercicioAdmin(admin.ModelAdmin):
                 self.admin_site.admin_view(self.importar_latex_view),
                 name='importar-latex',
             ),
+            path(
+                'importar-latex/trabajo/<int:trabajo_id>/',
+                self.admin_site.admin_view(self.estado_trabajo_view),
+                name='importar-latex-trabajo',
+            ),
         ]
         return custom_urls + urls
 
     def importar_latex_view(self, request):
-        log = []
+        # La importación va a la cola de trabajos (api/trabajos.py): la
+        # petición vuelve enseguida y la página va leyendo el log
         if request.method == 'POST':
-            from .latex_parser import importar_modelos
-            log = importar_modelos()
-            self.message_user(request, "Importación completada.")
-        
+            trabajo = trabajos.encolar('importar_latex')
+            self.message_user(request, f"Importación en cola (trabajo #{trabajo.pk}).")
+            return redirect(f"{request.path}?trabajo={trabajo.pk}")
+
+        trabajo = None
+        if request.GET.get('trabajo', '').isdigit():
+            trabajo = Trabajo.objects.filter(pk=request.GET['trabajo']).first()
         context = {
             **self.admin_site.each_context(request),
             'title': 'Importar Ejercicios desde LaTeX',
-            'log': log,
+            'trabajo': trabajo,
+            'trabajos_recientes': Trabajo.objects.filter(tipo='importar_latex')[:10],
         }
         return TemplateResponse(request, "admin/importar_latex.html", context)
 
+    def estado_trabajo_view(self, request, trabajo_id):
+        """Estado del trabajo y las líneas del log a partir de ?desde=N."""
+        trabajo = get_object_or_404(Trabajo, pk=trabajo_id)
+        desde = int(request.GET.get('desde', 0) or 0)
+        lineas = trabajos.lineas_desde(trabajo, desde)
+        return JsonResponse({
+            'estado': trabajo.estado,
+            'estado_display': trabajo.get_estado_display(),
+            'lineas': [texto for _, texto in lineas],
+            'desde': lineas[-1][0] if lineas else desde,
+            'resultado': trabajo.resultado,
+        })
+
 @admin.register(ModeloEjercicio)
 class ModeloEjercicioAdmin(admin.ModelAdmin):
     list_display = ('nombre', 'incognita_una_vez', 'incognita_mas_de_una_vez', 'con_parentesis', 'con_fracciones')
@@ -49,4 +76,45 @@ class ModeloEjercicioAdmin(admin.ModelAdmin):
 @admin.register(ProgresoUsuario)
 class ProgresoUsuarioAdmin(admin.ModelAdmin):
     list_display = ('usuario', 'puntos_totales')
-    filter_horizontal = ('ejercicios_completados',) # Para ver la lista de completados mejor
\ No newline at end of file
+    filter_horizontal = ('ejercicios_completados',) # Para ver la lista de completados mejor
+    # Los puntos se cambian añadiendo un Movimiento de puntos
+    readonly_fields = ('puntos_totales',)
+
+@admin.register(MovimientoPuntos)
+class MovimientoPuntosAdmin(admin.ModelAdmin):
+    list_display = ('usuario', 'delta', 'motivo', 'ejercicio', 'creado')
+    list_filter = ('motivo',)
+    search_fields = ('usuario__username',)
+    raw_id_fields = ('usuario', 'ejercicio')
+    fields = ('usuario', 'delta', 'motivo', 'ejercicio')
+
+    def save_model(self, request, obj, form, change):
+        # El libro solo crece: un alta se suma al total del usuario
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            puntos.sumar_al_total(obj.usuario_id, obj.delta)
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(RegistroAprendizaje)
+class RegistroAprendizajeAdmin(admin.ModelAdmin):
+    list_display = ('usuario', 'verbo', 'ejercicio', 'paso', 'exito', 'tiempo_ms', 'momento')
+    list_filter = ('verbo', 'exito')
+    search_fields = ('usuario__username',)
+    raw_id_fields = ('usuario', 'ejercicio')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(Trabajo)
+class TrabajoAdmin(admin.ModelAdmin):
+    list_display = ('id', 'tipo', 'estado', 'creado', 'iniciado', 'terminado')
+    list_filter = ('tipo', 'estado')
+    readonly_fields = ('tipo', 'parametros', 'estado', 'resultado', 'creado', 'iniciado', 'terminado')
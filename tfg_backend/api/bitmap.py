@@ -0,0 +1,72 @@
+# Nombre de archivo: api/bitmap.py
+# Versión: BITMAP_COMPLETADOS_V1.0
+#
+# Conjunto de ids de ejercicios guardado como bitmap (bit i = id i).
+# 100.000 ejercicios ocupan 12,5 KB por usuario y la pertenencia es O(1).
+
+import numpy as np
+
+def _a_bytes(datos) -> bytes:
+    # BinaryField devuelve memoryview en PostgreSQL y bytes en SQLite
+    return bytes(datos) if datos else b''
+
+def contiene(datos, ejercicio_id: int) -> bool:
+    datos = _a_bytes(datos)
+    byte = ejercicio_id >> 3
+    return byte < len(datos) and bool(datos[byte] & (1 << (ejercicio_id & 7)))
+
+def con_ids(datos, ejercicio_ids) -> bytes:
+    """Devuelve un bitmap nuevo con los ids añadidos."""
+    resultado = bytearray(_a_bytes(datos))
+    for ejercicio_id in ejercicio_ids:
+        byte = ejercicio_id >> 3
+        if byte >= len(resultado):
+            resultado.extend(bytes(byte + 1 - len(resultado)))
+        resultado[byte] |= 1 << (ejercicio_id & 7)
+    return bytes(resultado)
+
+def sin_ids(datos, ejercicio_ids) -> bytes:
+    """Devuelve un bitmap nuevo sin esos ids (y sin ceros sobrantes al final)."""
+    resultado = bytearray(_a_bytes(datos))
+    for ejercicio_id in ejercicio_ids:
+        byte = ejercicio_id >> 3
+        if byte < len(resultado):
+            resultado[byte] &= ~(1 << (ejercicio_id & 7)) & 0xFF
+    return bytes(resultado).rstrip(b'\x00')
+
+def desde_ids(ejercicio_ids) -> bytes:
+    return con_ids(b'', ejercicio_ids)
+
+def contiene_array(datos, ejercicio_ids):
+    """contiene() para un array NumPy de ids a la vez; devuelve un array de bool."""
+    bits = np.unpackbits(np.frombuffer(_a_bytes(datos), dtype=np.uint8), bitorder='little')
+    ejercicio_ids = np.asarray(ejercicio_ids)
+    dentro = ejercicio_ids < len(bits)
+    resultado = np.zeros(len(ejercicio_ids), dtype=bool)
+    resultado[dentro] = bits[ejercicio_ids[dentro]]
+    return resultado
+
+def ids(datos) -> list:
+    datos = _a_bytes(datos)
+    return [
+        (byte << 3) + bit
+        for byte, valor in enumerate(datos) if valor
+        for bit in range(8) if valor & (1 << bit)
+    ]
+
+def contar(datos) -> int:
+    return sum(bin(valor).count('1') for valor in _a_bytes(datos))
+
+
+class BitmapCompletados:
+    """Envoltorio de solo lectura que admite `id in bitmap` y len()."""
+    __slots__ = ('datos',)
+
+    def __init__(self, datos):
+        self.datos = _a_bytes(datos)
+
+    def __contains__(self, ejercicio_id):
+        return contiene(self.datos, ejercicio_id)
+
+    def __len__(self):
+        return contar(self.datos)
@@ -0,0 +1,280 @@
+# Nombre de archivo: api/bkt.py
+# Versión: BKT_NUMPY_V1.0
+#
+# Bayesian Knowledge Tracing con NumPy. Las habilidades son los indicadores
+# de ModeloEjercicio (incognita_una_vez, con_parentesis...); cada intento de
+# un ejercicio es una observación de todas las habilidades que tiene.
+#
+# - ModeloBKT guarda P(dominada) de todos los alumnos x habilidades en una
+#   matriz densa. Un intento se aplica en O(1) y un historial entero se
+#   reproduce por "oleadas": la k-ésima respuesta de todos los alumnos a la vez.
+# - ajustar_em estima los cuatro parámetros de cada habilidad (inicial,
+#   aprendizaje, desliz, adivinar) con EM (Baum-Welch) sobre todo el
+#   historial, con las secuencias (alumno, habilidad) en bloques vectorizados.
+#
+# No toca la BD: la carga de parámetros e historial está en servicio_bkt.py.
+
+import numpy as np
+
+HABILIDADES = ('incognita_una_vez', 'incognita_mas_de_una_vez', 'con_parentesis', 'con_fracciones')
+NUM_HABILIDADES = len(HABILIDADES)
+
+# Valores de partida habituales en la literatura de BKT
+PARAMETROS_POR_DEFECTO = {'inicial': 0.3, 'aprendizaje': 0.1, 'desliz': 0.1, 'adivinar': 0.2}
+# Desliz y adivinar por encima de 0.3 dan modelos degenerados (se "sabe"
+# la habilidad pero se falla casi siempre): se acotan como es costumbre
+MAX_DESLIZ = 0.3
+MAX_ADIVINAR = 0.3
+_EPS = 1e-4
+
+# MASCARAS[m] = habilidades (bool) de la máscara de bits m
+MASCARAS = np.array(
+    [[bool(m >> k & 1) for k in range(NUM_HABILIDADES)] for m in range(1 << NUM_HABILIDADES)]
+)
+
+
+def mascara(caracteristicas: dict) -> int:
+    """Máscara de bits de las habilidades presentes en `caracteristicas`."""
+    return sum(1 << k for k, nombre in enumerate(HABILIDADES) if caracteristicas.get(nombre))
+
+
+class Parametros:
+    """Los cuatro parámetros de BKT, como arrays de una posición por habilidad."""
+    __slots__ = ('inicial', 'aprendizaje', 'desliz', 'adivinar')
+
+    def __init__(self, inicial=None, aprendizaje=None, desliz=None, adivinar=None):
+        for campo, valor in zip(self.__slots__, (inicial, aprendizaje, desliz, adivinar)):
+            if valor is None:
+                valor = PARAMETROS_POR_DEFECTO[campo]
+            setattr(self, campo, np.broadcast_to(np.asarray(valor, dtype=np.float64), (NUM_HABILIDADES,)).copy())
+
+    def por_habilidad(self):
+        return {
+            nombre: {campo: float(getattr(self, campo)[k]) for campo in self.__slots__}
+            for k, nombre in enumerate(HABILIDADES)
+        }
+
+
+def _posterior(p, correcto, prm, k=slice(None)):
+    """P(dominada) tras observar la respuesta y dar la oportunidad de aprender."""
+    s, g, t = prm.desliz[k], prm.adivinar[k], prm.aprendizaje[k]
+    acierto = p * (1 - s) / (p * (1 - s) + (1 - p) * g)
+    fallo = p * s / (p * s + (1 - p) * (1 - g))
+    post = np.where(correcto, acierto, fallo)
+    return post + (1 - post) * t
+
+
+class ModeloBKT:
+
+    def __init__(self, parametros=None, capacidad=1024):
+        self.parametros = parametros or Parametros()
+        self.dominio = np.empty((capacidad, NUM_HABILIDADES))
+        self._filas = {}  # usuario_id -> fila de self.dominio
+
+    def __len__(self):
+        return len(self._filas)
+
+    def _crecer(self, necesarias):
+        if necesarias > len(self.dominio):
+            nueva = np.empty((max(necesarias, 2 * len(self.dominio)), NUM_HABILIDADES))
+            nueva[:len(self._filas)] = self.dominio[:len(self._filas)]
+            self.dominio = nueva
+
+    def fila(self, usuario_id):
+        fila = self._filas.get(usuario_id)
+        if fila is None:
+            fila = len(self._filas)
+            self._crecer(fila + 1)
+            self.dominio[fila] = self.parametros.inicial
+            self._filas[usuario_id] = fila
+        return fila
+
+    def vector(self, usuario_id):
+        """P(dominada) por habilidad del alumno (el prior si no tiene intentos)."""
+        fila = self._filas.get(usuario_id)
+        return self.parametros.inicial.copy() if fila is None else self.dominio[fila].copy()
+
+    def actualizar(self, usuario_id, mascara_bits, correcto):
+        """Aplica un intento a las habilidades de la máscara. O(habilidades)."""
+        fila = self.fila(usuario_id)
+        habilidades = MASCARAS[mascara_bits]
+        p = self.dominio[fila]
+        self.dominio[fila] = np.where(habilidades, _posterior(p, correcto, self.parametros), p)
+        return self.dominio[fila]
+
+    def actualizar_habilidad(self, usuario_id, k, correcto):
+        fila = self.fila(usuario_id)
+        self.dominio[fila, k] = _posterior(self.dominio[fila, k], correcto, self.parametros, k)
+        return float(self.dominio[fila, k])
+
+    def actualizar_lote(self, usuarios, mascaras, correctos):
+        """
+        Aplica muchos intentos, en orden cronológico por alumno. Cada oleada
+        toma la siguiente respuesta de cada alumno, así que en una oleada no
+        se repite fila y se puede actualizar toda la matriz de una vez.
+        """
+        usuarios = np.asarray(usuarios)
+        if not len(usuarios):
+            return
+        unicos, inversa = np.unique(usuarios, return_inverse=True)
+        filas_unicas = np.fromiter((self.fila(u) for u in unicos.tolist()), dtype=np.int64, count=len(unicos))
+        filas = filas_unicas[inversa]
+        habilidades = MASCARAS[np.asarray(mascaras)]
+        correctos = np.asarray(correctos, dtype=bool)[:, None]
+
+        # Número de orden de cada intento dentro de su alumno
+        orden = np.argsort(filas, kind='stable')
+        filas_ordenadas = filas[orden]
+        inicio_grupo = np.r_[0, np.flatnonzero(np.diff(filas_ordenadas)) + 1]
+        rango = np.arange(len(filas)) - np.repeat(inicio_grupo, np.diff(np.r_[inicio_grupo, len(filas)]))
+        por_oleada = orden[np.argsort(rango, kind='stable')]
+        limites = np.searchsorted(np.sort(rango), np.arange(rango.max() + 2))
+
+        for ola in range(len(limites) - 1):
+            sel = por_oleada[limites[ola]:limites[ola + 1]]
+            f = filas[sel]
+            p = self.dominio[f]
+            self.dominio[f] = np.where(habilidades[sel], _posterior(p, correctos[sel], self.parametros), p)
+
+
+def _secuencias(usuarios, mascaras, correctos):
+    """
+    Separa el historial en secuencias (alumno, habilidad). Devuelve
+    (habilidad de cada secuencia, longitudes, observaciones concatenadas),
+    con las observaciones de cada secuencia seguidas y en orden cronológico.
+    """
+    usuarios = np.asarray(usuarios)
+    _, alumno = np.unique(usuarios, return_inverse=True)
+    habilidades = MASCARAS[np.asarray(mascaras)]
+    evento, k = np.nonzero(habilidades)
+    clave = alumno[evento].astype(np.int64) * NUM_HABILIDADES + k
+    orden = np.argsort(clave, kind='stable')  # estable: conserva el orden temporal
+    clave = clave[orden]
+    obs = np.asarray(correctos, dtype=bool)[evento[orden]]
+    claves, longitudes = np.unique(clave, return_counts=True)
+    return claves % NUM_HABILIDADES, longitudes, obs
+
+
+def _bloques(longitudes, max_celdas):
+    """Índices de secuencias agrupadas por longitud parecida, con un tope de celdas por bloque."""
+    orden = np.argsort(-longitudes, kind='stable')
+    i = 0
+    while i < len(orden):
+        ancho = int(longitudes[orden[i]])
+        n = max(1, max_celdas // ancho)
+        yield orden[i:i + n], ancho
+        i += n
+
+
+def _forward_backward(obs, valido, s_idx, prm):
+    """
+    E-step de un bloque (B secuencias x T posiciones, rellenas por la
+    derecha). Devuelve las sumas esperadas por habilidad para el M-step.
+    """
+    b_, t_ = obs.shape
+    l0 = prm.inicial[s_idx]
+    tr = prm.aprendizaje[s_idx][:, None]
+    s = prm.desliz[s_idx][:, None]
+    g = prm.adivinar[s_idx][:, None]
+    e1 = np.where(obs, 1 - s, s)
+    e0 = np.where(obs, g, 1 - g)
+
+    a0 = np.empty((b_, t_))
+    a1 = np.empty((b_, t_))
+    c = np.ones((b_, t_))
+    a1[:, 0] = l0 * e1[:, 0]
+    a0[:, 0] = (1 - l0) * e0[:, 0]
+    c[:, 0] = a0[:, 0] + a1[:, 0]
+    a0[:, 0] /= c[:, 0]
+    a1[:, 0] /= c[:, 0]
+    for t in range(1, t_):
+        v = valido[:, t]
+        p1 = a1[:, t - 1] + a0[:, t - 1] * tr[:, 0]
+        p0 = a0[:, t - 1] * (1 - tr[:, 0])
+        n1 = p1 * e1[:, t]
+        n0 = p0 * e0[:, t]
+        ct = n0 + n1
+        c[:, t] = np.where(v, ct, 1.0)
+        a1[:, t] = np.where(v, n1 / ct, a1[:, t - 1])
+        a0[:, t] = np.where(v, n0 / ct, a0[:, t - 1])
+
+    b0 = np.ones((b_, t_))
+    b1 = np.ones((b_, t_))
+    for t in range(t_ - 2, -1, -1):
+        v = valido[:, t + 1]
+        x1 = e1[:, t + 1] * b1[:, t + 1] / c[:, t + 1]
+        x0 = e0[:, t + 1] * b0[:, t + 1] / c[:, t + 1]
+        b1[:, t] = np.where(v, x1, 1.0)
+        b0[:, t] = np.where(v, (1 - tr[:, 0]) * x0 + tr[:, 0] * x1, 1.0)
+
+    g1 = a1 * b1
+    g0 = a0 * b0
+    total = g0 + g1
+    g1 = np.where(valido, g1 / total, 0.0)
+    g0 = np.where(valido, g0 / total, 0.0)
+    # Transición no dominada -> dominada entre t y t+1
+    xi01 = a0[:, :-1] * tr * e1[:, 1:] * b1[:, 1:] / c[:, 1:] * valido[:, 1:]
+    g0_antes = g0[:, :-1] * valido[:, 1:]
+
+    n = NUM_HABILIDADES
+    suma = lambda valores: np.bincount(s_idx, weights=valores, minlength=n)
+    return {
+        'inicial': suma(g1[:, 0]),
+        'secuencias': np.bincount(s_idx, minlength=n).astype(np.float64),
+        'aprendizaje_num': suma(xi01.sum(axis=1)),
+        'aprendizaje_den': suma(g0_antes.sum(axis=1)),
+        'adivinar_num': suma((g0 * obs).sum(axis=1)),
+        'adivinar_den': suma(g0.sum(axis=1)),
+        'desliz_num': suma((g1 * (valido & ~obs)).sum(axis=1)),
+        'desliz_den': suma(g1.sum(axis=1)),
+        'log_verosimilitud': suma(np.log(c).sum(axis=1)),
+    }
+
+
+def ajustar_em(usuarios, mascaras, correctos, parametros=None, iteraciones=20, tolerancia=1e-4, max_celdas=2_000_000):
+    """
+    Estima los parámetros de cada habilidad por EM sobre el historial
+    completo (arrays paralelos en orden cronológico). Las habilidades sin
+    observaciones conservan los parámetros de partida.
+    Devuelve (Parametros, log-verosimilitud por iteración, observaciones por habilidad).
+    """
+    prm = parametros or Parametros()
+    prm = Parametros(prm.inicial, prm.aprendizaje, prm.desliz, prm.adivinar)
+    habilidad, longitudes, obs_planas = _secuencias(usuarios, mascaras, correctos)
+    observaciones = np.bincount(habilidad, weights=longitudes, minlength=NUM_HABILIDADES).astype(np.int64)
+    if not len(longitudes):
+        return prm, [], observaciones
+
+    inicios = np.r_[0, np.cumsum(longitudes)[:-1]]
+    # Los bloques (con su relleno) se preparan una vez y se reutilizan
+    bloques = []
+    for sel, ancho in _bloques(longitudes, max_celdas):
+        posiciones = np.arange(ancho)
+        valido = posiciones[None, :] < longitudes[sel][:, None]
+        indices = np.where(valido, inicios[sel][:, None] + posiciones[None, :], 0)
+        bloques.append((obs_planas[indices] & valido, valido, habilidad[sel]))
+
+    historial = []
+    con_datos = observaciones > 0
+    for _ in range(iteraciones):
+        total = None
+        for obs, valido, s_idx in bloques:
+            parcial = _forward_backward(obs, valido, s_idx, prm)
+            total = parcial if total is None else {k: total[k] + v for k, v in parcial.items()}
+        historial.append(float(total['log_verosimilitud'].sum()))
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            nuevos = {
+                'inicial': total['inicial'] / total['secuencias'],
+                'aprendizaje': total['aprendizaje_num'] / total['aprendizaje_den'],
+                'adivinar': total['adivinar_num'] / total['adivinar_den'],
+                'desliz': total['desliz_num'] / total['desliz_den'],
+            }
+        topes = {'inicial': 1 - _EPS, 'aprendizaje': 1 - _EPS, 'adivinar': MAX_ADIVINAR, 'desliz': MAX_DESLIZ}
+        for campo, valores in nuevos.items():
+            valores = np.clip(np.nan_to_num(valores, nan=getattr(prm, campo)), _EPS, topes[campo])
+            setattr(prm, campo, np.where(con_datos, valores, getattr(prm, campo)))
+
+        if len(historial) > 1 and abs(historial[-1] - historial[-2]) < tolerancia * abs(historial[-2]):
+            break
+    return prm, historial, observaciones
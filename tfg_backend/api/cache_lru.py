@@ -0,0 +1,60 @@
+# Nombre de archivo: api/cache_lru.py
+# Versión: CACHE_LRU_V1.0
+
+import threading
+from collections import OrderedDict
+
+# Centinela para distinguir "no está en caché" de un valor None guardado
+_AUSENTE = object()
+
+class CacheLRU:
+    """
+    Caché acotada con expulsión LRU (el menos usado recientemente sale primero).
+    Es segura entre hilos y lleva contadores de aciertos y fallos.
+    Los valores se comparten tal cual entre peticiones: solo deben guardarse
+    objetos inmutables (p. ej. expresiones SymPy).
+    """
+
+    def __init__(self, tamano_maximo=512):
+        self.tamano_maximo = tamano_maximo
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave, default=_AUSENTE):
+        """Devuelve el valor guardado o `default` (y cuenta acierto/fallo)."""
+        with self._lock:
+            valor = self._datos.get(clave, _AUSENTE)
+            if valor is _AUSENTE:
+                self.fallos += 1
+                return default
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.tamano_maximo:
+                self._datos.popitem(last=False)
+
+    def invalidar(self):
+        """Vacía la caché (los contadores se conservan)."""
+        with self._lock:
+            self._datos.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                'tamano': len(self._datos),
+                'tamano_maximo': self.tamano_maximo,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'ratio_aciertos': round(self.aciertos / total, 4) if total else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._datos)
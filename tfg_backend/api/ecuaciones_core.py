@@ -1,76 +1,108 @@
 # Nombre de archivo: tfg_backend/api/ecuaciones_core.py
 # Versión: LOCAL_REPLICA_FINAL
+#
+# Punto de entrada del motor de ecuaciones. El backend se elige con el
+# ajuste ECUACIONES_BACKEND:
+#   - 'racional': motor_racional (sin SymPy). Lo que no soporta pasa a SymPy.
+#   - 'sympy':    motor_sympy, el de siempre.
+# SymPy solo se importa la primera vez que hace falta.
 
-import sympy
-import re
-from sympy import symbols, Eq, expand, solve
-from sympy.parsing.sympy_parser import parse_expr, standard_transformations, implicit_multiplication_application
+import hashlib
+from django.conf import settings
+from . import instrumentacion, motor_racional, render_latex
+from .cache_lru import CacheLRU
 
-# Definimos 'x' como fallback, pero el sistema detectará la real
-x = symbols('x')
+BACKENDS = ('racional', 'sympy')
 
-def limpiar_y_crear_ecuacion(equation_str: str):
+# --- CACHÉ DE PARSEO ---
+# El catálogo tiene unos cientos de ecuaciones que se parsean una y otra vez.
+# Las Eq de SymPy son inmutables y las EcuacionRacional no se modifican tras
+# crearse, así que pueden compartirse entre peticiones.
+TAMANO_CACHE_ECUACIONES = 1024
+_cache_ecuaciones = CacheLRU(TAMANO_CACHE_ECUACIONES)
+instrumentacion.registrar_cache('ecuaciones', _cache_ecuaciones)
+_SIN_CACHE = object()
+
+def _backend() -> str:
+    backend = getattr(settings, 'ECUACIONES_BACKEND', 'racional')
+    return backend if backend in BACKENDS else 'racional'
+
+def _motor_sympy():
+    from . import motor_sympy
+    return motor_sympy
+
+def normalizar_entrada(equation_str: str) -> str:
+    """
+    Forma normalizada de la entrada: sin envoltorio $$...$$ y con los
+    espacios colapsados. Es la clave de la caché y lo que se parsea.
+    """
+    s = equation_str.strip()
+    while s.startswith('$') and s.endswith('$') and len(s) > 1:
+        s = s[1:-1].strip()
+    return " ".join(s.split())
+
+def hash_ecuacion(equation_str: str) -> str:
+    """SHA-256 de la forma normalizada: es la clave de Ejercicio.ecuacion_hash."""
+    return hashlib.sha256(normalizar_entrada(equation_str).encode('utf-8')).hexdigest()
+
+def forma_canonica(equation_str: str) -> str:
+    """
+    Forma normal de la ecuación (motor_racional.forma_canonica): iguales
+    para '2x+3=5', '$$3 + 2m = 5$$' o '5 = 3 + 2·x'. Lo que el motor racional
+    no cubre se queda en el texto normalizado sin espacios.
     """
-    Replica exacta de la lógica local de limpieza y parseo.
+    clave = normalizar_entrada(equation_str)
+    eq = motor_racional.crear_ecuacion(clave)
+    if eq is not None:
+        return motor_racional.forma_canonica(eq)
+    return 'texto:' + clave.replace(' ', '')
+
+def huella_ecuacion(equation_str: str) -> str:
+    """SHA-256 de la forma canónica: es la clave de Ejercicio.ecuacion_huella."""
+    return hashlib.sha256(forma_canonica(equation_str).encode('utf-8')).hexdigest()
+
+def invalidar_cache_ecuaciones():
+    """Gancho para vaciar la caché tras recargar el catálogo."""
+    _cache_ecuaciones.invalidar()
+
+def estadisticas_cache_ecuaciones() -> dict:
+    return _cache_ecuaciones.estadisticas()
+
+def limpiar_y_crear_ecuacion(equation_str: str, backend: str = None, cachear: bool = True):
+    """
+    Limpia y parsea la ecuación con el backend configurado (o el indicado).
     Soporta fracciones LaTeX y multiplicación implícita.
+    Los resultados (también los fallidos) se guardan en una caché LRU, salvo
+    con cachear=False (ecuaciones de un solo uso, como las generadas).
     """
-    try:
-        # 1. Limpieza de ruido LaTeX
-        s = equation_str.strip()
-        s = s.replace(r'\[', '').replace(r'\]', '')
-        s = s.replace(r'\left', '').replace(r'\right', '')
-        
-        # Conversión robusta de fracciones
-        for _ in range(3):
-            s = re.sub(r'\\frac\s*\{(.*?)\}\s*\{(.*?)\}', r'(\1)/(\2)', s)
-            
-        s = s.replace('{', '(').replace('}', ')')
-        s = s.replace('[', '(').replace(']', ')')
-        s = s.replace('\\', '') # Limpieza final de backslashes
-
-        if '=' not in s: return None
-        
-        lhs_str, rhs_str = s.split('=', 1)
-
-        # 2. Parseo inteligente (detecta 2x como 2*x)
-        transformations = (standard_transformations + (implicit_multiplication_application,))
-        
-        # Estrategia iterativa para limpiar enunciados (ej: "3a)")
-        parts = lhs_str.split()
-        lhs_expr = None
-        for i in range(len(parts)):
-            candidate = " ".join(parts[i:])
-            try:
-                lhs_expr = parse_expr(candidate, transformations=transformations, evaluate=False)
-                break 
-            except Exception: continue
-        
-        if lhs_expr is None: return None 
-        
-        rhs_expr = parse_expr(rhs_str, transformations=transformations, evaluate=False)
-
-        return Eq(lhs_expr, rhs_expr, evaluate=False)
-
-    except Exception as e:
-        print(f"Advertencia: No se pudo parsear '{equation_str}': {e}")
-        return None
+    backend = backend or _backend()
+    clave = normalizar_entrada(equation_str)
+    eq = _cache_ecuaciones.obtener((backend, clave), _SIN_CACHE) if cachear else _SIN_CACHE
+    if eq is _SIN_CACHE:
+        eq = None
+        if backend == 'racional':
+            eq = motor_racional.crear_ecuacion(clave)
+        if eq is None:
+            eq = _motor_sympy().crear_ecuacion(clave)
+        if cachear:
+            _cache_ecuaciones.guardar((backend, clave), eq)
+    return eq
+
+def _es_racional(eq_obj) -> bool:
+    return isinstance(eq_obj, motor_racional.EcuacionRacional)
 
 def clasificar_ecuacion(eq_obj, eq_str: str) -> dict:
     """
-    Lógica corregida: Detecta dinámicamente la variable usada (m, x, y, etc.)
+    Detecta dinámicamente la variable usada (m, x, y, etc.)
     para contar correctamente sus apariciones.
     """
     s = eq_str.lower()
-    
-    # Detección automática de la variable real
-    mis_simbolos = eq_obj.free_symbols
-    conteo_vars = 0
-    
-    if mis_simbolos:
-        # Toma la primera variable que encuentre en la ecuación (ej: 'm')
-        variable_real = list(mis_simbolos)[0]
-        conteo_vars = eq_obj.lhs.count(variable_real) + eq_obj.rhs.count(variable_real)
-    
+
+    if _es_racional(eq_obj):
+        conteo_vars = motor_racional.contar_incognita(eq_obj)
+    else:
+        conteo_vars = _motor_sympy().contar_incognita(eq_obj)
+
     # Reglas de clasificación idénticas a la versión local
     return {
         "con_parentesis": '(' in s or '[' in s,
@@ -80,46 +112,80 @@ def clasificar_ecuacion(eq_obj, eq_str: str) -> dict:
     }
 
 def solve_equation_step_by_step(eq_obj):
-    pasos = []
-    try:
-        # Detectar variable para resolver (no asumir siempre x)
-        mis_simbolos = eq_obj.free_symbols
-        var_a_resolver = list(mis_simbolos)[0] if mis_simbolos else x
-
-        lhs_expand = expand(eq_obj.lhs)
-        rhs_expand = expand(eq_obj.rhs)
-        
-        # Comparación como string para evitar errores booleanos de SymPy
-        eq_original_str = str(eq_obj.lhs) + "=" + str(eq_obj.rhs)
-        eq_expandida_str = str(lhs_expand) + "=" + str(rhs_expand)
-
-        if eq_original_str != eq_expandida_str:
-            pasos.append({
-                "paso": 1, 
-                "descripcion": "Eliminamos paréntesis y expandimos términos.",
-                "ecuacion": f"{sympy.latex(lhs_expand)} = {sympy.latex(rhs_expand)}"
-            })
-
-        solucion = solve(eq_obj, var_a_resolver)
-        
-        solucion_final = ""
-        if not solucion:
-            solucion_final = "Sin solución"
-            pasos.append({"paso": 2, "descripcion": "La ecuación no tiene solución.", "ecuacion": "\\emptyset"})
-        elif len(solucion) == 1:
-            val = solucion[0]
-            solucion_final = str(val)
-            pasos.append({
-                "paso": 2, 
-                "descripcion": "Solución obtenida.",
-                "ecuacion": f"{var_a_resolver} = {sympy.latex(val)}"
-            })
-        else:
-            solucion_final = "Infinitas soluciones"
-            pasos.append({"paso": 2, "descripcion": "Identidad (Infinitas soluciones).", "ecuacion": "0 = 0"})
-
-        return pasos, solucion_final
-
-    except Exception as e:
-        print(f"Error resolviendo: {e}")
-        return [], None
\ No newline at end of file
+    """
+    Devuelve (pasos, solucion_final). Si el motor racional no puede resolver
+    la ecuación (no es de primer grado), se vuelve a parsear con SymPy.
+    """
+    if _es_racional(eq_obj):
+        resultado = motor_racional.solve_equation_step_by_step(eq_obj)
+        if resultado is not None:
+            instrumentacion.contar('resolucion', 'racional')
+            return resultado
+        eq_obj = _motor_sympy().crear_ecuacion(eq_obj.texto)
+        if eq_obj is None:
+            return [], None
+    return _motor_sympy().solve_equation_step_by_step(eq_obj)
+
+def calcular_datos_derivados(equation_str: str, cachear: bool = True) -> dict:
+    """
+    Clasificación y resolución paso a paso de una ecuación, con los nombres
+    de campo de Ejercicio. Es determinista, así que se guarda al importar.
+    """
+    eq = limpiar_y_crear_ecuacion(equation_str, cachear=cachear)
+    if eq is None:
+        return {'caracteristicas': {}, 'solucion_normalizada': '', 'pasos_generados': []}
+    if cachear:
+        pasos, solucion = solve_equation_step_by_step(eq)
+    else:
+        with render_latex.sin_cache():
+            pasos, solucion = solve_equation_step_by_step(eq)
+    return {
+        'caracteristicas': clasificar_ecuacion(eq, equation_str),
+        'solucion_normalizada': solucion or '',
+        'pasos_generados': pasos,
+    }
+
+def conjunto_solucion(equation_str: str, con_sympy: bool = False):
+    """
+    (variable, soluciones) de una ecuación de primer grado, con soluciones
+    como en motor_racional.conjunto_solucion y variable None si no tiene
+    incógnita. None si el motor racional no la cubre, salvo con
+    `con_sympy`: entonces se prueba con SymPy (segundo grado, varias
+    soluciones como ('varias', frozenset)...). Sirve para comparar
+    ecuaciones por valor (p. ej. dos pasos de una resolución).
+    """
+    texto = normalizar_entrada(equation_str)
+    eq = motor_racional.crear_ecuacion(texto)
+    soluciones = None if eq is None else motor_racional.conjunto_solucion(eq)
+    if soluciones is not None:
+        return (eq.variable, soluciones)
+    if con_sympy:
+        return _motor_sympy().conjunto_solucion(texto)
+    return None
+
+def estadisticas_resolucion() -> dict:
+    """Reparto entre el motor racional, la vía rápida lineal y sympy.solve."""
+    contadores = instrumentacion.contadores('resolucion')
+    racional = contadores.get('racional', 0)
+    lineal = contadores.get('lineal', 0)
+    general = contadores.get('general', 0)
+    total = racional + lineal + general
+    return {
+        'racional': racional,
+        'lineal': lineal,
+        'general': general,
+        'ratio_lineal': round((racional + lineal) / total, 4) if total else 0.0,
+    }
+
+def comparar_con_sympy(equation_str: str) -> dict:
+    """
+    Usa el motor SymPy como oráculo: resuelve con ambos backends y
+    compara las soluciones finales.
+    """
+    resultados = {}
+    for backend in BACKENDS:
+        eq = limpiar_y_crear_ecuacion(equation_str, backend=backend)
+        _, solucion = solve_equation_step_by_step(eq) if eq is not None else ([], None)
+        resultados[backend] = solucion
+    resultados['coinciden'] = resultados['racional'] == resultados['sympy']
+    return resultados
@@ -0,0 +1,121 @@
+# Nombre de archivo: api/explicaciones.py
+# Versión: EXPLICACIONES_V1.0
+#
+# "¿Por qué este ejercicio?": cuánto aporta cada rasgo del recomendador a
+# la puntuación de un ejercicio. La puntuación es lineal (rasgos @ PESOS),
+# así que los valores SHAP con rasgos independientes salen exactos y sin
+# muestrear: contribución_i = PESOS_i * (rasgo_i - media del rasgo_i en el
+# catálogo del tipo). Las contribuciones suman puntuación - base.
+#
+# Se cachean por (índice, parámetros BKT, estado del alumno, ejercicio),
+# con expulsión LRU (EXPLICACIONES_TAMANO_CACHE). El estado es el
+# vector de dominio redondeado a 1/EXPLICACIONES_RESOLUCION, y la
+# explicación se calcula con ese vector redondeado, así todos los alumnos
+# del mismo cubo comparten la misma entrada. Cuando el recomendador
+# reconstruye el índice, las entradas viejas dejan de pedirse y la LRU las
+# acaba expulsando. Una petición cuesta a lo sumo una pasada vectorizada
+# sobre el catálogo, sin consultas pesadas a la BD. Las explicaciones
+# guardadas se comparten entre peticiones: no se modifican.
+
+import numpy as np
+from django.conf import settings
+from . import bkt, instrumentacion, recomendador, servicio_bkt
+from .cache_lru import CacheLRU
+from .models import Ejercicio
+
+DESCRIPCIONES = {
+    **{f'practica_{nombre}': f"te falta práctica en '{nombre}'" for nombre in bkt.HABILIDADES},
+    'ajuste_exito': 'tu probabilidad de acertarlo está cerca del objetivo',
+    'ajuste_dificultad': 'su dificultad se ajusta a tu nivel',
+}
+
+_cache = CacheLRU(getattr(settings, 'EXPLICACIONES_TAMANO_CACHE', 4096))
+instrumentacion.registrar_cache('explicaciones', _cache)
+
+
+def invalidar():
+    _cache.invalidar()
+
+
+def cubo_estado(dominio):
+    """Vector de dominio redondeado y su clave de caché (tupla de enteros)."""
+    resolucion = getattr(settings, 'EXPLICACIONES_RESOLUCION', 20)
+    cubo = np.rint(np.asarray(dominio) * resolucion).astype(np.int64)
+    return cubo / resolucion, tuple(cubo.tolist())
+
+
+def atribuciones(indice, dominio, parametros, filas):
+    """
+    (contribuciones, base) de las `filas` del índice: matriz (filas x RASGOS)
+    y puntuación media del catálogo, frente a la que se mide cada ejercicio.
+    """
+    matriz = recomendador.rasgos(indice, dominio, parametros)
+    media = matriz.mean(axis=0)
+    return (matriz[filas] - media) * recomendador.PESOS, float(media @ recomendador.PESOS)
+
+
+def _explicacion(ejercicio_id, contribuciones, base):
+    orden = np.argsort(-np.abs(contribuciones), kind='stable')
+    detalle = [
+        {'rasgo': recomendador.RASGOS[k], 'contribucion': round(float(contribuciones[k]), 4)}
+        for k in orden
+    ]
+    a_favor = [d['rasgo'] for d in detalle if d['contribucion'] > 0][:2]
+    if a_favor:
+        resumen = 'Recomendado sobre todo porque ' + ' y '.join(DESCRIPCIONES[r] for r in a_favor) + '.'
+    else:
+        resumen = 'Ningún rasgo lo favorece frente al resto del catálogo.'
+    return {
+        'ejercicio_id': ejercicio_id,
+        'puntuacion': round(base + float(contribuciones.sum()), 4),
+        'base': round(base, 4),
+        'contribuciones': detalle,
+        'resumen': resumen,
+    }
+
+
+def explicar(usuario_id, ejercicio_ids, tipo=None):
+    """
+    Explicaciones de varios ejercicios (del mismo tipo) para un alumno:
+    {ejercicio_id: dict}. Los que no están en caché se calculan juntos.
+    Los ids que no existen no aparecen en el resultado.
+    """
+    ejercicio_ids = list(dict.fromkeys(ejercicio_ids))
+    if not ejercicio_ids:
+        return {}
+    if tipo is None:
+        tipo = Ejercicio.objects.filter(id=ejercicio_ids[0]).values_list('tipo', flat=True).first()
+        if tipo is None:
+            return {}
+    indice = recomendador.obtener_indice(tipo)
+    dominio, parametros = servicio_bkt.estado_alumno(usuario_id)
+    dominio, cubo = cubo_estado(dominio)
+    # Los parámetros BKT entran en P(acierto): si se reajustan, la entrada cambia
+    version = (indice.creado_en, parametros.desliz.tobytes(), parametros.adivinar.tobytes(), cubo)
+
+    resultado, pendientes = {}, []
+    for ejercicio_id in ejercicio_ids:
+        guardada = _cache.obtener((*version, ejercicio_id), None)
+        if guardada is not None:
+            resultado[ejercicio_id] = guardada
+        else:
+            pendientes.append(ejercicio_id)
+
+    if pendientes and len(indice):
+        pendientes = np.array(pendientes, dtype=np.int64)
+        filas = np.minimum(np.searchsorted(indice.ids, pendientes), len(indice) - 1)
+        encontrados = indice.ids[filas] == pendientes
+        filas, pendientes = filas[encontrados], pendientes[encontrados]
+        if len(filas):
+            contribuciones, base = atribuciones(indice, dominio, parametros, filas)
+            for ejercicio_id, fila in zip(pendientes.tolist(), contribuciones):
+                explicacion = _explicacion(ejercicio_id, fila, base)
+                _cache.guardar((*version, ejercicio_id), explicacion)
+                resultado[ejercicio_id] = explicacion
+            instrumentacion.contar('explicaciones', 'calculadas', len(filas))
+    return resultado
+
+
+def explain_recommendation_with_shap(student_id, exercise_id):
+    """Explicación de un ejercicio para el alumno, o None si el ejercicio no existe."""
+    return explicar(student_id, [exercise_id]).get(exercise_id)
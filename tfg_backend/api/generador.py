@@ -0,0 +1,324 @@
+# Nombre de archivo: api/generador.py
+# Versión: GENERADOR_V1.0
+#
+# Genera ejercicios aleatorios con el perfil de cada ModeloEjercicio
+# (incógnita una o varias veces, paréntesis, fracciones), para que el
+# catálogo no se acabe con los .tex de Modelos/.
+#
+# Cada ecuación se arma como una suma de términos de primer grado en cada
+# lado (k·x, constante, k(px+q), (px+q)/d...). El último término, una
+# constante del lado derecho, se calcula para que la solución sea la
+# elegida: un entero o una fracción sencilla. Después pasa por el motor
+# igual que un ejercicio importado (calcular_datos_derivados). Solo se
+# guarda si el motor da esa misma solución y la clasificación incluye las
+# características del modelo. Las equivalentes a otra ya sorteada o guardada
+# (misma ecuacion_huella, ver ecuaciones_core.forma_canonica) se descartan.
+#
+# Con la misma semilla se generan las mismas ecuaciones: los candidatos se
+# sortean en este proceso y solo la resolución se reparte entre procesos.
+
+import random
+import time
+from math import gcd
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+from django.conf import settings
+from django.db import transaction
+from . import ecuaciones_core, recomendador, seleccion_ejercicios, servicio_bkt
+from .models import Ejercicio
+
+# Candidatos sorteados por cada ejercicio pedido antes de darse por vencido
+MAX_INTENTOS = 20
+MAX_DENOMINADOR_SOLUCION = 6
+MAX_DENOMINADOR_CONSTANTE = 30
+
+
+# =================================================================
+# 1. TÉRMINOS
+# =================================================================
+# Un término es (signo, latex sin signo, coeficiente de x, constante). El
+# coeficiente y la constante ya llevan el signo; el LaTeX es el del valor
+# absoluto, y al unir los términos se pone '+' o '-' delante.
+
+def _coef(valor):
+    """'x', '3x'... de un coeficiente entero positivo."""
+    return 'x' if valor == 1 else f'{valor}x'
+
+def _binomio(p, q):
+    """'px + q' con p, q enteros no nulos."""
+    x = f"{'-' if p < 0 else ''}{_coef(abs(p))}"
+    return f"{x} {'-' if q < 0 else '+'} {abs(q)}"
+
+def _termino(signo, latex, a, b):
+    return (signo, latex, Fraction(a) * signo, Fraction(b) * signo)
+
+def lineal(k):
+    return _termino(1 if k > 0 else -1, _coef(abs(k)), abs(k), 0)
+
+def constante(c):
+    c = Fraction(c)
+    if c.denominator == 1:
+        latex = str(abs(c.numerator))
+    else:
+        latex = f'\\frac{{{abs(c.numerator)}}}{{{c.denominator}}}'
+    return _termino(1 if c > 0 else -1, latex, 0, abs(c))
+
+def parentesis(k, p, q):
+    latex = f'({_binomio(p, q)})' if abs(k) == 1 else f'{abs(k)}({_binomio(p, q)})'
+    return _termino(1 if k > 0 else -1, latex, abs(k) * p, abs(k) * q)
+
+def fraccion(p, q, d, k=1):
+    """(k(px + q))/d, con k = 1 sin paréntesis."""
+    numerador = _binomio(p, q) if k == 1 else f'{k}({_binomio(p, q)})'
+    return _termino(1, f'\\frac{{{numerador}}}{{{d}}}', Fraction(k * p, d), Fraction(k * q, d))
+
+def fraccion_x(k, d):
+    return _termino(1 if k > 0 else -1, f'\\frac{{{_coef(abs(k))}}}{{{d}}}', Fraction(abs(k), d), 0)
+
+
+def _lado(terminos):
+    if not terminos:
+        return '0'
+    partes = []
+    for i, (signo, latex, _, _) in enumerate(terminos):
+        if i == 0:
+            partes.append(f'-{latex}' if signo < 0 else latex)
+        else:
+            partes.append(f"{'-' if signo < 0 else '+'} {latex}")
+    return ' '.join(partes)
+
+def _valor(terminos):
+    """(coeficiente de x, constante) de la suma de los términos."""
+    return sum(t[2] for t in terminos), sum(t[3] for t in terminos)
+
+
+# =================================================================
+# 2. PERFILES
+# =================================================================
+# Cada perfil sortea los dos lados sin la constante final.
+
+def _nz(rng, a, b):
+    """Entero no nulo en [a, b]."""
+    while True:
+        n = rng.randint(a, b)
+        if n:
+            return n
+
+def _denominador(rng, k, a=2, b=9):
+    """Denominador en [a, b] primo con k, para que la fracción no se simplifique."""
+    while True:
+        d = rng.randint(a, b)
+        if gcd(k, d) == 1:
+            return d
+
+def _despeje(rng):
+    con_constante = rng.random() < 0.7
+    if rng.random() < 0.3:
+        k = _nz(rng, -3, 3)
+        izquierda = [fraccion_x(k, _denominador(rng, k))]
+    else:
+        # Sin constante, 'x = c' ya estaría resuelta
+        k = _nz(rng, -9, 9)
+        while k == 1 and not con_constante:
+            k = _nz(rng, -9, 9)
+        izquierda = [lineal(k)]
+    if con_constante:
+        izquierda.append(constante(_nz(rng, -20, 20)))
+    if rng.random() < 0.5:
+        izquierda.reverse()
+    return izquierda, []
+
+def _agrupacion(rng):
+    izquierda = [lineal(_nz(rng, -9, 9)) for _ in range(rng.randint(2, 3))]
+    izquierda.insert(rng.randint(0, len(izquierda)), constante(_nz(rng, -15, 15)))
+    derecha = [lineal(_nz(rng, -9, 9))]
+    if rng.random() < 0.5:
+        derecha.append(lineal(_nz(rng, -9, 9)))
+    rng.shuffle(derecha)
+    return izquierda, derecha
+
+def _parentesis(rng):
+    izquierda = [parentesis(_nz(rng, -6, 6), _nz(rng, -5, 5), _nz(rng, -9, 9))]
+    if rng.random() < 0.6:
+        izquierda.append(lineal(_nz(rng, -9, 9)))
+    if rng.random() < 0.4:
+        izquierda.append(constante(_nz(rng, -10, 10)))
+    if rng.random() < 0.5:
+        derecha = [parentesis(_nz(rng, -6, 6), _nz(rng, -5, 5), _nz(rng, -9, 9))]
+    else:
+        derecha = [lineal(_nz(rng, -9, 9))]
+    return izquierda, derecha
+
+def _fraccion(rng, max_p, max_q, max_d, k=1):
+    p, q = _nz(rng, -max_p, max_p), _nz(rng, -max_q, max_q)
+    return fraccion(p, q, _denominador(rng, gcd(k * p, k * q), 2, max_d), k)
+
+def _fraccion_x(rng):
+    k = _nz(rng, -7, 7)
+    return fraccion_x(k, _denominador(rng, k))
+
+def _fracciones(rng):
+    izquierda = [_fraccion(rng, 7, 9, 9)]
+    izquierda.append(_fraccion_x(rng) if rng.random() < 0.5 else lineal(_nz(rng, -5, 5)))
+    derecha = [_fraccion(rng, 7, 9, 15) if rng.random() < 0.5 else _fraccion_x(rng)]
+    return izquierda, derecha
+
+def _mixta(rng):
+    izquierda = [_fraccion(rng, 4, 6, 9, k=rng.randint(2, 5))]
+    if rng.random() < 0.5:
+        n = _nz(rng, -9, 9)
+        izquierda.append(constante(Fraction(n, _denominador(rng, n))))
+    else:
+        izquierda.append(parentesis(_nz(rng, -4, 4), _nz(rng, -3, 3), _nz(rng, -6, 6)))
+    derecha = [_fraccion(rng, 7, 9, 15)]
+    return izquierda, derecha
+
+def perfil(modelo):
+    """Generador que corresponde a las características de un ModeloEjercicio."""
+    if modelo.con_fracciones and modelo.con_parentesis:
+        return _mixta
+    if modelo.con_fracciones:
+        return _fracciones
+    if modelo.con_parentesis:
+        return _parentesis
+    if modelo.incognita_mas_de_una_vez:
+        return _agrupacion
+    return _despeje
+
+
+def _latex_solucion(valor: Fraction) -> str:
+    if valor.denominator == 1:
+        return f'$$x = {valor.numerator}$$'
+    signo = '-' if valor < 0 else ''
+    return f'$$x = {signo}\\frac{{{abs(valor.numerator)}}}{{{valor.denominator}}}$$'
+
+def generar_ecuacion(generador, rng, con_fracciones=False):
+    """
+    (ecuacion_str, solución) con la solución elegida, o None si el sorteo
+    no sirve (la x se anula o la constante final sale fea).
+    """
+    izquierda, derecha = generador(rng)
+    a_izq, b_izq = _valor(izquierda)
+    a_der, b_der = _valor(derecha)
+    a = a_izq - a_der
+    if a == 0:
+        return None
+    # Solución entera, o una fracción cuyo denominador divide al
+    # coeficiente neto (sin fracciones en el perfil, la constante final
+    # también queda entera)
+    if rng.random() < 0.7:
+        solucion = Fraction(rng.randint(-12, 12))
+    else:
+        if con_fracciones:
+            denominadores = range(2, MAX_DENOMINADOR_SOLUCION + 1)
+        else:
+            denominadores = [d for d in range(2, MAX_DENOMINADOR_SOLUCION + 1) if (a.numerator % d) == 0]
+        if not denominadores:
+            return None
+        d = rng.choice(denominadores)
+        solucion = Fraction(_nz(rng, -4 * d, 4 * d), d)
+    final = a * solucion + b_izq - b_der
+    if final.denominator > (MAX_DENOMINADOR_CONSTANTE if con_fracciones else 1):
+        return None
+    if final:
+        derecha.append(constante(final))
+    return f'$${_lado(izquierda)} = {_lado(derecha)}$$', solucion
+
+
+# =================================================================
+# 3. GENERACIÓN Y ESCRITURA
+# =================================================================
+
+def _derivar(ecuacion_str):
+    # Cada ecuación generada se resuelve una vez: no se guarda en la caché
+    return ecuaciones_core.calcular_datos_derivados(ecuacion_str, cachear=False)
+
+def verificar(modelo, solucion, derivados) -> bool:
+    """El motor da la solución elegida y reconoce las características del modelo."""
+    if derivados['solucion_normalizada'] != str(solucion) or not derivados['pasos_generados']:
+        return False
+    caracteristicas = derivados['caracteristicas']
+    return all(
+        caracteristicas.get(campo) for campo in
+        ('incognita_una_vez', 'incognita_mas_de_una_vez', 'con_parentesis', 'con_fracciones')
+        if getattr(modelo, campo)
+    )
+
+
+@transaction.atomic
+def generar_ejercicios(modelos, cantidad, tipo='ENTRENAMIENTO', semilla=None, tamano_lote=None,
+                       procesos=None, dry_run=False, progreso=None):
+    """
+    Crea `cantidad` ejercicios nuevos de cada modelo. Los candidatos se
+    sortean por lotes de `tamano_lote`, se resuelven (en `procesos`
+    procesos) y los válidos y no repetidos se guardan con bulk_create.
+    Devuelve un resumen por modelo: {nombre: {'creados', 'repetidos',
+    'rechazados'}} y los segundos empleados.
+    """
+    progreso = progreso or (lambda linea: None)
+    tamano_lote = tamano_lote or getattr(settings, 'IMPORTACION_TAMANO_LOTE', 500)
+    procesos = procesos or getattr(settings, 'IMPORTACION_PROCESOS', 1)
+    rng = random.Random(semilla)
+    inicio = time.perf_counter()
+    resumen = {}
+    ejecutor = ProcessPoolExecutor(max_workers=procesos) if procesos > 1 else None
+    try:
+        for modelo in modelos:
+            generador = perfil(modelo)
+            cuenta = resumen[modelo.nombre] = {'creados': 0, 'repetidos': 0, 'rechazados': 0}
+            vistos = set()
+            sorteos = 0
+            while cuenta['creados'] < cantidad and sorteos < cantidad * MAX_INTENTOS:
+                # Candidatos únicos dentro del lote y respecto a lo ya sorteado
+                candidatos = {}
+                while len(candidatos) < min(tamano_lote, cantidad - cuenta['creados']) and sorteos < cantidad * MAX_INTENTOS:
+                    sorteos += 1
+                    generado = generar_ecuacion(generador, rng, modelo.con_fracciones)
+                    if generado is None:
+                        cuenta['rechazados'] += 1
+                        continue
+                    h = ecuaciones_core.huella_ecuacion(generado[0])
+                    if h in vistos:
+                        cuenta['repetidos'] += 1
+                        continue
+                    vistos.add(h)
+                    candidatos[h] = generado
+                existentes = set(Ejercicio.objects.filter(ecuacion_huella__in=candidatos).values_list('ecuacion_huella', flat=True))
+                cuenta['repetidos'] += len(existentes)
+                candidatos = [(h, *c) for h, c in candidatos.items() if h not in existentes]
+
+                textos = [ecuacion_str for _, ecuacion_str, _ in candidatos]
+                if ejecutor is not None:
+                    derivados = ejecutor.map(_derivar, textos, chunksize=max(1, len(textos) // (4 * procesos)))
+                else:
+                    derivados = map(_derivar, textos)
+                nuevos = []
+                for (h, ecuacion_str, solucion), datos in zip(candidatos, derivados):
+                    if not verificar(modelo, solucion, datos):
+                        cuenta['rechazados'] += 1
+                        continue
+                    # bulk_create no pasa por save(): el hash y la huella se ponen aquí
+                    nuevos.append(Ejercicio(
+                        modelo=modelo, tipo=tipo, ecuacion_str=ecuacion_str,
+                        ecuacion_hash=ecuaciones_core.hash_ecuacion(ecuacion_str), ecuacion_huella=h,
+                        solucion=_latex_solucion(solucion), generado=True, **datos,
+                    ))
+                Ejercicio.objects.bulk_create(nuevos, batch_size=tamano_lote)
+                cuenta['creados'] += len(nuevos)
+            progreso(
+                f"{modelo.nombre}: {cuenta['creados']} creados, {cuenta['repetidos']} repetidos, "
+                f"{cuenta['rechazados']} rechazados"
+            )
+            if cuenta['creados'] < cantidad:
+                progreso(f"AVISO: {modelo.nombre}: solo se han podido generar {cuenta['creados']} de {cantidad}")
+    finally:
+        if ejecutor is not None:
+            ejecutor.shutdown()
+
+    if dry_run:
+        transaction.set_rollback(True)
+    elif any(cuenta['creados'] for cuenta in resumen.values()):
+        transaction.on_commit(seleccion_ejercicios.invalidar_ids)
+        transaction.on_commit(servicio_bkt.invalidar)
+        transaction.on_commit(recomendador.invalidar)
+    return resumen, time.perf_counter() - inicio
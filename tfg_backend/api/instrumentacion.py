@@ -0,0 +1,35 @@
+# Nombre de archivo: api/instrumentacion.py
+# Versión: INSTRUMENTACION_V1.0
+#
+# Contadores y cachés del motor, por proceso. Se consultan desde
+# /api/estadisticas-motor/.
+
+import threading
+
+_lock = threading.Lock()
+_contadores = {}
+_caches = {}
+
+def contar(grupo: str, clave: str, n: int = 1):
+    with _lock:
+        grupo_dict = _contadores.setdefault(grupo, {})
+        grupo_dict[clave] = grupo_dict.get(clave, 0) + n
+
+def contadores(grupo: str) -> dict:
+    with _lock:
+        return dict(_contadores.get(grupo, {}))
+
+def registrar_cache(nombre: str, cache):
+    """Registra una CacheLRU para que aparezca en el resumen."""
+    _caches[nombre] = cache
+
+def estadisticas_caches() -> dict:
+    return {nombre: cache.estadisticas() for nombre, cache in _caches.items()}
+
+def resumen() -> dict:
+    with _lock:
+        todos = {grupo: dict(valores) for grupo, valores in _contadores.items()}
+    return {
+        'caches': estadisticas_caches(),
+        'contadores': todos,
+    }
@@ -0,0 +1,208 @@
+# Nombre de archivo: api/latex_extraccion.py
+# Versión: EXTRACCION_LATEX_V2.0 (sobre latex_tokenizador)
+#
+# Extracción de ecuación, solución y pasos de un .tex. No toca la BD ni
+# importa modelos, para poder ejecutarse en los procesos del importador
+# (ver importar_modelos en latex_parser.py).
+
+import hashlib
+import re
+from . import ecuaciones_core, latex_tokenizador
+
+# Marcas de solución, buscadas token a token en orden. El argumento de
+# \boxed se lee con leer_grupo para respetar las llaves anidadas
+REGEX_SOLUCION = re.compile(
+    r"\\boxed\s*(?=\{)"
+    r"|(infinitas soluciones)"
+    r"|(no tiene solución)"
+    r"|Solución:\s*\[\s*(.*?)\s*\]"
+    r"|\\text\{La solución es[:\s]*\}\s*(.*?)(?=\s*[\}\]]|\s*$)",
+    re.DOTALL | re.IGNORECASE
+)
+REGEX_TITULO_PASO = re.compile(r"\s*Paso (\d+)", re.IGNORECASE)
+REGEX_TITULO_SOLUCION = re.compile(r"\s*Solución:\s*", re.IGNORECASE)
+REGEX_CORCHETES = re.compile(r"\s*\[\s*(.*?)\s*\]", re.DOTALL)
+
+def _texto_siguiente(tokens, k):
+    """Texto que sigue al token k, hasta el siguiente bloque o cabecera."""
+    if k + 1 < len(tokens) and tokens[k + 1][0] == 'texto':
+        return tokens[k + 1][1]
+    return ""
+
+def buscar_solucion(tokens):
+    for k, token in enumerate(tokens):
+        if token[0] == 'seccion':
+            # \textbf{Solución:} [ x = 2 ]
+            if REGEX_TITULO_SOLUCION.fullmatch(token[2]):
+                m = REGEX_CORCHETES.match(_texto_siguiente(tokens, k))
+                if m:
+                    return f"$${m.group(1).strip()}$$"
+            texto = token[2]
+        else:
+            texto = token[1]
+
+        m = REGEX_SOLUCION.search(texto)
+        if not m:
+            continue
+        infinitas, no_sol, corchetes, text_la_sol = m.groups()
+        if infinitas:
+            return "Infinitas soluciones"
+        if no_sol:
+            return "No tiene solución"
+        if corchetes:
+            return f"$${corchetes.strip()}$$"
+        if text_la_sol:
+            # Si capturamos texto plano como "m = 0", lo envolvemos en $$
+            return f"$${text_la_sol.strip()}$$"
+        if not (infinitas or no_sol or corchetes is not None or text_la_sol is not None):
+            grupo = latex_tokenizador.leer_grupo(texto, m.end())
+            if grupo is not None and grupo[0].strip():
+                return f"$${grupo[0].strip()}$$"
+        # Marca encontrada pero vacía: se usará la última ecuación
+        return ""
+    return ""
+
+def parsear_archivo_tex(file_path):
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except Exception as e:
+        print(f"Error leyendo {file_path}: {e}")
+        return None
+    return parsear_contenido_tex(content)
+
+def parsear_contenido_tex(content):
+    tokens = latex_tokenizador.tokenizar(content)
+
+    ecuaciones = [t[1] for t in tokens if t[0] == 'matematica' and t[2] != '$$']
+    if not ecuaciones:
+        ecuaciones = [t[1] for t in tokens if t[0] == 'matematica']
+        if not ecuaciones:
+            return None
+
+    ecuacion_principal_str = ""
+    for eq in ecuaciones:
+        if "Resolución" not in eq and "Prueba" not in eq:
+            ecuacion_principal_str = f"$${eq.strip()}$$"
+            break
+    
+    if not ecuacion_principal_str:
+         ecuacion_principal_str = f"$${ecuaciones[0].strip()}$$"
+
+    solucion_final = buscar_solucion(tokens)
+    if not solucion_final:
+        solucion_final = f"$${ecuaciones[-1].strip()}$$"
+
+    # Cabeceras y el texto que las sigue
+    cabeceras = [(t[2], _texto_siguiente(tokens, k)) for k, t in enumerate(tokens) if t[0] == 'seccion']
+    pasos_data = []
+
+    pasos_desc = [(m.group(1), desc) for titulo, desc in cabeceras if (m := REGEX_TITULO_PASO.match(titulo))]
+    for i, (num_paso, desc) in enumerate(pasos_desc):
+        if (i + 1) < len(ecuaciones):
+            ecuacion_del_paso = f"$${ecuaciones[i+1].strip()}$$"
+            pasos_data.append({
+                'numero': int(num_paso),
+                'descripcion': desc.strip().replace('\n', ' '),
+                'ecuacion': ecuacion_del_paso
+            })
+
+    if not pasos_data:
+        # Sin "Paso N": cada cabecera cuenta como un paso
+        for i, (_, desc) in enumerate(cabeceras):
+             if (i + 1) < len(ecuaciones):
+                ecuacion_del_paso = f"$${ecuaciones[i+1].strip()}$$"
+                pasos_data.append({
+                    'numero': i + 1,
+                    'descripcion': desc.strip().replace('\n', ' '),
+                    'ecuacion': ecuacion_del_paso
+                })
+
+    return {
+        'ecuacion_str': ecuacion_principal_str,
+        'solucion': solucion_final,
+        'pasos': pasos_data
+    }
+
+# Soluciones sin ecuación que puede devolver buscar_solucion
+SOLUCIONES_TEXTUALES = {
+    "infinitas soluciones": ('todas',),
+    "no tiene solución": ('ninguna',),
+}
+
+def _describir(conjunto):
+    if conjunto[0] == 'unica':
+        return str(conjunto[1])
+    if conjunto[0] == 'varias':
+        return ", ".join(sorted(str(v) for v in conjunto[1]))
+    return "infinitas soluciones" if conjunto[0] == 'todas' else "sin solución"
+
+def _conjunto_de_solucion(solucion):
+    """Conjunto de la solución leída del .tex; admite "x = 3" o solo "3"."""
+    textual = SOLUCIONES_TEXTUALES.get(solucion.strip().lower())
+    if textual:
+        return textual
+    texto = ecuaciones_core.normalizar_entrada(solucion)
+    if '=' not in texto:
+        texto = f"x = {texto}"
+    resultado = ecuaciones_core.conjunto_solucion(texto, con_sympy=True)
+    return None if resultado is None else resultado[1]
+
+def validar_ejercicio(datos):
+    """
+    Comprueba con el motor racional que la solución del .tex es la de la
+    ecuación y que cada paso conserva las soluciones del anterior. Lo que el
+    motor racional no cubre (segundo grado...) se comprueba con SymPy.
+    Devuelve {'discrepancias': [textos], 'no_verificables': n}; lo que
+    tampoco SymPy sabe leer o resolver cuenta como no verificable.
+    """
+    discrepancias = []
+    no_verificables = 0
+
+    principal = ecuaciones_core.conjunto_solucion(datos['ecuacion_str'], con_sympy=True)
+    if principal is None:
+        return {'discrepancias': [], 'no_verificables': 1 + len(datos['pasos'])}
+    esperado = principal[1]
+
+    leida = _conjunto_de_solucion(datos['solucion'])
+    if leida is None:
+        no_verificables += 1
+    elif leida != esperado:
+        discrepancias.append(
+            f"la solución del .tex ({datos['solucion']}) no coincide con la calculada ({_describir(esperado)})")
+
+    anterior = esperado
+    for paso in datos['pasos']:
+        resultado = ecuaciones_core.conjunto_solucion(paso['ecuacion'], con_sympy=True)
+        if resultado is None:
+            no_verificables += 1
+            continue
+        variable, conjunto = resultado
+        if variable is None and conjunto == ('todas',):
+            continue  # igualdad numérica cierta (una comprobación, 0 = 0...)
+        if conjunto != anterior:
+            discrepancias.append(
+                f"el paso {paso['numero']} ({paso['ecuacion']}) da {_describir(conjunto)}, "
+                f"el anterior daba {_describir(anterior)}")
+        anterior = conjunto
+
+    return {'discrepancias': discrepancias, 'no_verificables': no_verificables}
+
+def hash_contenido(datos: bytes) -> str:
+    return hashlib.sha256(datos).hexdigest()
+
+
+def preparar_archivo(contenido: bytes):
+    """
+    Lo que hace cada proceso del importador con un .tex: parsearlo, calcular
+    el hash y la huella de la ecuación y los datos derivados y validar la solución y los
+    pasos (ver validar_ejercicio). None si no se pudo parsear.
+    """
+    datos_ejercicio = parsear_contenido_tex(contenido.decode('utf-8', errors='replace'))
+    if not datos_ejercicio:
+        return None
+    datos_ejercicio['ecuacion_hash'] = ecuaciones_core.hash_ecuacion(datos_ejercicio['ecuacion_str'])
+    datos_ejercicio['ecuacion_huella'] = ecuaciones_core.huella_ecuacion(datos_ejercicio['ecuacion_str'])
+    datos_ejercicio['derivados'] = ecuaciones_core.calcular_datos_derivados(datos_ejercicio['ecuacion_str'])
+    datos_ejercicio['validacion'] = validar_ejercicio(datos_ejercicio)
+    return datos_ejercicio
@@ -1,197 +1,384 @@
 # Nombre de archivo: api/latex_parser.py
-# VERSIÓN 10: Parser final (Soporta "La solución es...")
+# VERSIÓN 14: Importación incremental, en paralelo, con progreso en vivo y
+#             validación de soluciones y pasos
 import os
-import re
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from django.conf import settings
 from django.db import transaction
-from .models import ModeloEjercicio, Ejercicio, PasoResolucion
+from .models import ModeloEjercicio, Ejercicio, PasoResolucion, ArchivoImportado
+from . import ecuaciones_core, recomendador, seleccion_ejercicios, servicio_bkt
+from .latex_extraccion import (  # noqa: F401 (se reexportan)
+    hash_contenido, parsear_archivo_tex, parsear_contenido_tex, preparar_archivo,
+)
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 MODELOS_DIR = BASE_DIR / "Modelos"
 
-def normalizar_contenido(content):
-    content = re.sub(r"{\[", r"\[", content, flags=re.DOTALL)
-    content = re.sub(r"\]}", r"\]", content, flags=re.DOTALL)
-    content = re.sub(r"{]", r"\]", content, flags=re.DOTALL) 
-    content = re.sub(r"\\\((.*?)\\\)", r"\[ \1 \]", content, flags=re.DOTALL)
-    content = re.sub(r"\\begin\{(?:equation|align|align\*|equation\*|aligned)\}(.*?)\\end\{(?:equation|align|align\*|equation\*|aligned)\}", 
-                     r"\[ \1 \]", content, flags=re.DOTALL)
-    return content
-
-REGEX_EQ_BLOCK = re.compile(r"\\\[(.*?)\\\]", re.DOTALL)
+class RegistroImportacion(list):
+    """
+    El log de la importación (una lista de líneas, como siempre) que además
+    avisa a `progreso(linea)` de cada línea en cuanto se escribe. Al terminar
+    lleva también el resumen, los tiempos, las discrepancias encontradas al
+    validar (lista de {'ruta', 'detalle'}) y los archivos con ecuaciones o
+    pasos que no se han podido comprobar (lista de {'ruta', 'cantidad'}).
+    """
 
-REGEX_PASO_DESC = re.compile(
-    r"\\(?:subsection|textbf|section)\*?\{?\s*Paso (\d+)[^}]*\}?\s*(.*?)\s*(?=\\\[|\\subsection|\\textbf|\\section|\\end\{document\})",
-    re.DOTALL | re.IGNORECASE
-)
+    def __init__(self, progreso=None):
+        super().__init__()
+        self._progreso = progreso
+        self.resumen = {
+            'añadidos': 0, 'actualizados': 0, 'sin_cambios': 0, 'eliminados': 0, 'errores': 0,
+            'discrepancias': 0, 'no_verificables': 0, 'repetidos': 0,
+        }
+        self.tiempos = {'parseo': 0.0, 'escritura': 0.0}
+        self.discrepancias = []
+        self.no_verificables = []
 
-# EXPRESIÓN MEJORADA PARA SOLUCIONES
-REGEX_SOLUCION = re.compile(
-    r"\\boxed\{(.*?)\}"                
-    r"|(infinitas soluciones)"         
-    r"|(no tiene solución)"           
-    r"|(?:\\textbf\{Solución: \s*\}\s*|Solución:)\s*\[\s*(.*?)\s*\]"
-    r"|(?:\\text\{La solución es[:\s]*\}\s*)(.*?)(?=\s*[\}\]])", # <-- NUEVO: Para ejercicio 1.10
-    re.DOTALL | re.IGNORECASE
-)
+    def append(self, linea):
+        super().append(linea)
+        self.avisar(linea)
 
-def parsear_archivo_tex(file_path):
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-    except Exception as e:
-        print(f"Error leyendo {file_path}: {e}")
-        return None
-
-    content = normalizar_contenido(content)
-    
-    ecuaciones = REGEX_EQ_BLOCK.findall(content)
-    if not ecuaciones:
-        ecuaciones_fallback = re.findall(r"\$\$(.*?)\$\$", content, re.DOTALL)
-        if not ecuaciones_fallback:
-             return None 
-        ecuaciones = ecuaciones_fallback
-
-    ecuacion_principal_str = ""
-    for eq in ecuaciones:
-        if "Resolución" not in eq and "Prueba" not in eq:
-            ecuacion_principal_str = f"$${eq.strip()}$$"
-            break
-    
-    if not ecuacion_principal_str:
-         if not ecuaciones: return None
-         ecuacion_principal_str = f"$${ecuaciones[0].strip()}$$"
-
-
-    solucion_match = REGEX_SOLUCION.search(content)
-    solucion_final = ""
-
-    if solucion_match:
-        # Extraemos los grupos en orden
-        g = solucion_match.groups()
-        boxed = g[0]
-        infinitas = g[1]
-        no_sol = g[2]
-        textbf = g[3]
-        text_la_sol = g[4] # El nuevo grupo
-
-        if boxed:
-            solucion_final = f"$${boxed.strip()}$$"
-        elif infinitas:
-            solucion_final = "Infinitas soluciones"
-        elif no_sol:
-            solucion_final = "No tiene solución"
-        elif textbf:
-            solucion_final = f"$${textbf.strip()}$$"
-        elif text_la_sol:
-            # Si capturamos texto plano como "m = 0", lo envolvemos en $$
-            solucion_final = f"$${text_la_sol.strip()}$$"
-    
-    if not solucion_final:
-        solucion_final = f"$${ecuaciones[-1].strip()}$$"
-
-    pasos_desc = REGEX_PASO_DESC.findall(content)
-    pasos_data = []
-
-    for i, (num_paso, desc) in enumerate(pasos_desc):
-        if (i + 1) < len(ecuaciones):
-            ecuacion_del_paso = f"$${ecuaciones[i+1].strip()}$$"
-            pasos_data.append({
-                'numero': int(num_paso),
-                'descripcion': desc.strip().replace('\n', ' '),
-                'ecuacion': ecuacion_del_paso
-            })
-
-    if not pasos_data:
-        pasos_desc_fallback = re.findall(r"\\(?:subsection|textbf|section)\*?\{.*?\}(.*?)(?=\\\[|\\subsection|\\textbf|\\section|\\end\{document\})", content, re.DOTALL | re.IGNORECASE)
-        for i, desc in enumerate(pasos_desc_fallback):
-             if (i + 1) < len(ecuaciones):
-                ecuacion_del_paso = f"$${ecuaciones[i+1].strip()}$$"
-                pasos_data.append({
-                    'numero': i + 1,
-                    'descripcion': desc.strip().replace('\n', ' '),
-                    'ecuacion': ecuacion_del_paso
-                })
-
-    return {
-        'ecuacion_str': ecuacion_principal_str,
-        'solucion': solucion_final,
-        'pasos': pasos_data
-    }
+    def avisar(self, linea):
+        """Solo al callback, sin guardarla en el log (p. ej. el avance del parseo)."""
+        if self._progreso is not None:
+            self._progreso(linea)
 
-@transaction.atomic
-def importar_modelos():
-    log = []
-    if not os.path.exists(MODELOS_DIR):
-        log.append(f"ERROR: No se encontró la carpeta 'Modelos' en {MODELOS_DIR}")
-        return log
-    
-    try:
-        ejercicios_viejos = Ejercicio.objects.filter(ecuacion_str__startswith='$$')
-        count = ejercicios_viejos.count()
-        if count > 0:
-            ejercicios_viejos.delete()
-            log.append(f"--- Se eliminaron {count} ejercicios antiguos para recargar ---")
-    except Exception as e:
-        log.append(f"ERROR: No se pudieron eliminar los ejercicios antiguos. {e}")
+def _tipo_desde_directorio(tipo_dir):
+    if "entreno" in tipo_dir.lower():
+        return "ENTRENAMIENTO"
+    if "prueba" in tipo_dir.lower():
+        return "PRUEBA"
+    return None
 
-    for modelo_dir in os.listdir(MODELOS_DIR):
+def recorrer_modelos(log, solo=None):
+    """
+    Recorre Modelos/<modelo>/<subdir>/<tipo>/*.tex y devuelve (archivos,
+    saltados): una lista de dicts {ruta, path, modelo, tipo} y el conjunto de
+    carpetas de modelo (en minúsculas) sin ModeloEjercicio. `ruta` es relativa
+    a Modelos/ y es la clave del manifiesto. `solo` limita el recorrido a esas
+    carpetas de modelo.
+    """
+    archivos = []
+    saltados = set()
+    # Una sola consulta; se busca como antes con nombre__icontains
+    modelos = list(ModeloEjercicio.objects.order_by('pk'))
+    for modelo_dir in sorted(os.listdir(MODELOS_DIR)):
         modelo_path = os.path.join(MODELOS_DIR, modelo_dir)
         if not os.path.isdir(modelo_path): continue
+        if solo is not None and modelo_dir.lower() not in solo: continue
             
-        modelo_obj = ModeloEjercicio.objects.filter(nombre__icontains=modelo_dir).first()
+        modelo_obj = next((m for m in modelos if modelo_dir.lower() in m.nombre.lower()), None)
         if not modelo_obj:
             log.append(f"AVISO: No se encontró el Modelo '{modelo_dir}' en la BD. Saltando...")
+            saltados.add(modelo_dir.lower())
             continue
         
         log.append(f"--- Importando para {modelo_obj.nombre} ---")
 
-        for subdir in os.listdir(modelo_path):
+        for subdir in sorted(os.listdir(modelo_path)):
             subdir_path = os.path.join(modelo_path, subdir)
             if not os.path.isdir(subdir_path): continue
             
-            for tipo_dir in os.listdir(subdir_path):
+            for tipo_dir in sorted(os.listdir(subdir_path)):
                 tipo_path = os.path.join(subdir_path, tipo_dir)
                 if not os.path.isdir(tipo_path): continue
 
-                if "entreno" in tipo_dir.lower():
-                    tipo_ejercicio = "ENTRENAMIENTO"
-                elif "prueba" in tipo_dir.lower():
-                    tipo_ejercicio = "PRUEBA"
-                else:
+                tipo_ejercicio = _tipo_desde_directorio(tipo_dir)
+                if tipo_ejercicio is None:
                     continue 
                 
                 log.append(f"  > Cargando {tipo_ejercicio} desde '{tipo_dir}'...")
 
-                for tex_file in os.listdir(tipo_path):
+                for tex_file in sorted(os.listdir(tipo_path)):
                     if not tex_file.endswith(".tex"):
                         continue
-                    
                     file_path = os.path.join(tipo_path, tex_file)
-                    datos_ejercicio = parsear_archivo_tex(file_path)
-                    
-                    if not datos_ejercicio:
-                        log.append(f"    ERROR: No se pudo parsear {tex_file}")
-                        continue
-                    
-                    try:
-                        ejercicio_obj = Ejercicio.objects.create(
-                            ecuacion_str=datos_ejercicio['ecuacion_str'],
-                            modelo=modelo_obj,
-                            tipo=tipo_ejercicio,
-                            solucion=datos_ejercicio['solucion']
-                        )
-                        log.append(f"    + CREADO: {tex_file}")
-
-                        for paso in datos_ejercicio['pasos']:
-                            PasoResolucion.objects.create(
-                                ejercicio=ejercicio_obj,
-                                numero_paso=paso['numero'],
-                                descripcion=paso['descripcion'],
-                                ecuacion_resultante=paso['ecuacion']
-                            )
-                    except Exception as e:
-                        log.append(f"    ERROR al crear {tex_file}: {e}")
-                        
+                    archivos.append({
+                        'ruta': Path(file_path).relative_to(MODELOS_DIR).as_posix(),
+                        'path': file_path,
+                        'modelo': modelo_obj,
+                        'tipo': tipo_ejercicio,
+                    })
+    return archivos, saltados
+
+# Campos que se reescriben al actualizar un ejercicio desde su .tex
+CAMPOS_ACTUALIZABLES = [
+    'ecuacion_str', 'ecuacion_hash', 'ecuacion_huella', 'modelo', 'tipo', 'solucion',
+    'caracteristicas', 'solucion_normalizada', 'pasos_generados', 'generado',
+]
+
+def _rellenar_ejercicio(ejercicio_obj, datos_ejercicio, archivo):
+    # bulk_create/bulk_update no pasan por save(): el hash se pone aquí
+    ejercicio_obj.ecuacion_str = datos_ejercicio['ecuacion_str']
+    ejercicio_obj.ecuacion_hash = datos_ejercicio['ecuacion_hash']
+    ejercicio_obj.ecuacion_huella = datos_ejercicio['ecuacion_huella']
+    ejercicio_obj.modelo = archivo['modelo']
+    ejercicio_obj.tipo = archivo['tipo']
+    ejercicio_obj.solucion = datos_ejercicio['solucion']
+    # Un ejercicio generado que coincide con un .tex pasa a ser del catálogo
+    ejercicio_obj.generado = False
+    for campo, valor in datos_ejercicio['derivados'].items():
+        setattr(ejercicio_obj, campo, valor)
+    return ejercicio_obj
+
+def _registrar_parseo(log, parseados, archivo, entrada, datos_ejercicio):
+    if not datos_ejercicio:
+        log.append(f"    ERROR: No se pudo parsear {os.path.basename(archivo['ruta'])}")
+        log.resumen['errores'] += 1
+        return
+    # La solución o algún paso no cuadra con la ecuación: se importa igual,
+    # pero queda en el informe para revisar el .tex
+    discrepancias = datos_ejercicio['validacion']['discrepancias']
+    for detalle in discrepancias:
+        log.append(f"    ! DISCREPANCIA en {os.path.basename(archivo['ruta'])}: {detalle}")
+        log.discrepancias.append({'ruta': archivo['ruta'], 'detalle': detalle})
+    if discrepancias:
+        log.resumen['discrepancias'] += 1
+    # Ecuaciones o pasos que ni el motor racional ni SymPy han podido
+    # comprobar: no es un error, pero no se debe confundir con un "todo bien"
+    no_verificables = datos_ejercicio['validacion']['no_verificables']
+    if no_verificables:
+        log.append(f"    ? NO VERIFICABLE en {os.path.basename(archivo['ruta'])}: "
+                   f"{no_verificables} ecuación(es) o paso(s) sin comprobar")
+        log.no_verificables.append({'ruta': archivo['ruta'], 'cantidad': no_verificables})
+        log.resumen['no_verificables'] += 1
+    parseados.append((archivo, datos_ejercicio, entrada))
+
+@transaction.atomic
+def importar_modelos(tamano_lote=None, procesos=None, solo=None, dry_run=False, progreso=None, forzar=False):
+    """
+    Importación incremental. Solo se parsean los .tex nuevos o cuyo contenido
+    ha cambiado desde la última vez (según el manifiesto ArchivoImportado):
+    los cambiados se actualizan en su sitio y solo se borran los ejercicios
+    cuyo archivo ha desaparecido, así no se pierden los completados.
+    Primero se parsea todo, en `procesos` procesos (IMPORTACION_PROCESOS por
+    defecto), y luego se escribe desde este proceso con bulk_create/bulk_update
+    en lotes de `tamano_lote` filas (IMPORTACION_TAMANO_LOTE por defecto).
+    Al parsear, cada ejercicio se valida (latex_extraccion.validar_ejercicio)
+    y las discrepancias se añaden al log y a log.discrepancias.
+
+    solo:     nombres de carpeta de Modelos/ a importar; lo demás no se toca.
+    dry_run:  hace todo y al final deshace la transacción.
+    progreso: callback que recibe cada línea del log según se produce.
+    forzar:   vuelve a parsear (y validar) también los .tex sin cambios.
+    Devuelve un RegistroImportacion (la lista de líneas del log).
+    """
+    log = RegistroImportacion(progreso)
+    resumen = log.resumen
+    if not os.path.exists(MODELOS_DIR):
+        log.append(f"ERROR: No se encontró la carpeta 'Modelos' en {MODELOS_DIR}")
+        resumen['errores'] += 1
+        return log
+    # Los ejercicios se emparejan por ecuacion_huella: sin ella (base de datos
+    # anterior a la migración 0012) se tomarían por nuevos
+    if Ejercicio.objects.filter(ecuacion_huella__isnull=True).exists():
+        log.append("ERROR: Hay ejercicios sin ecuacion_huella. Ejecuta antes `python manage.py deduplicar_ejercicios`")
+        resumen['errores'] += 1
+        return log
+
+    tamano_lote = tamano_lote or getattr(settings, 'IMPORTACION_TAMANO_LOTE', 500)
+    procesos = procesos or getattr(settings, 'IMPORTACION_PROCESOS', 1)
+    if solo is not None:
+        solo = {nombre.lower() for nombre in solo}
+    manifiesto = {
+        a.ruta: a for a in ArchivoImportado.objects.select_related('ejercicio')
+        if solo is None or a.ruta.split('/', 1)[0].lower() in solo
+    }
+
+    # 1. Contenido y hash de cada .tex. Las carpetas de modelo que no se han
+    # podido recorrer (modelo renombrado o no encontrado) se dejan como están:
+    # sin esto sus ejercicios se darían por desaparecidos y se borrarían
+    encontrados, saltados = recorrer_modelos(log, solo)
+    if saltados:
+        manifiesto = {ruta: a for ruta, a in manifiesto.items() if ruta.split('/', 1)[0].lower() not in saltados}
+    archivos = []
+    for archivo in encontrados:
+        try:
+            with open(archivo['path'], 'rb') as f:
+                archivo['contenido'] = f.read()
+        except OSError as e:
+            log.append(f"    ERROR leyendo {os.path.basename(archivo['ruta'])}: {e}")
+            resumen['errores'] += 1
+            # Sin poder leerlo no se sabe si ha cambiado: se deja como está
+            manifiesto.pop(archivo['ruta'], None)
+            continue
+        archivo['hash'] = hash_contenido(archivo['contenido'])
+        archivos.append(archivo)
+
+    # 2. Archivos que ya no están donde estaban. Si el mismo contenido aparece
+    # en otra ruta es un archivo movido o renombrado: se conserva el ejercicio
+    vistos = {archivo['ruta'] for archivo in archivos}
+    desaparecidos = {a.hash_contenido: a for ruta, a in manifiesto.items() if ruta not in vistos}
+    movidos = set()
+    for archivo in archivos:
+        entrada = desaparecidos.pop(archivo['hash'], None) if archivo['ruta'] not in manifiesto else None
+        if entrada is None:
+            continue
+        log.append(f"    ~ MOVIDO: {entrada.ruta} -> {archivo['ruta']}")
+        Ejercicio.objects.filter(id=entrada.ejercicio_id).update(modelo=archivo['modelo'], tipo=archivo['tipo'])
+        entrada.ruta = archivo['ruta']
+        entrada.save()
+        manifiesto[archivo['ruta']] = entrada
+        movidos.add(archivo['ruta'])
+        resumen['actualizados'] += 1
+
+    # 3. El resto se borra (y, en cascada, su entrada del manifiesto)
+    for entrada in desaparecidos.values():
+        log.append(f"    - ELIMINADO: {entrada.ruta}")
+    Ejercicio.objects.filter(id__in=[a.ejercicio_id for a in desaparecidos.values()]).delete()
+    resumen['eliminados'] = len(desaparecidos)
+
+    # 4. Fase de parseo: nuevos y cambiados, sin tocar la BD. Es CPU pura y
+    # se reparte entre `procesos`; map() devuelve en el orden de entrada
+    inicio = time.perf_counter()
+    pendientes = []
+    for archivo in archivos:
+        entrada = manifiesto.get(archivo['ruta'])
+        if not forzar and entrada is not None and entrada.hash_contenido == archivo['hash']:
+            if archivo['ruta'] not in movidos:
+                resumen['sin_cambios'] += 1
+            continue
+        pendientes.append((archivo, entrada))
+
+    contenidos = [archivo['contenido'] for archivo, _ in pendientes]
+    ejecutor = None
+    if procesos > 1 and len(pendientes) > 1:
+        ejecutor = ProcessPoolExecutor(max_workers=min(procesos, len(pendientes)))
+        resultados = ejecutor.map(preparar_archivo, contenidos, chunksize=max(1, len(contenidos) // (4 * procesos)))
+    else:
+        resultados = map(preparar_archivo, contenidos)
+
+    parseados = []
+    try:
+        # Los resultados se consumen según llegan, para poder ir informando
+        for k, ((archivo, entrada), datos_ejercicio) in enumerate(zip(pendientes, resultados), 1):
+            log.avisar(f"    [{k}/{len(pendientes)}] parseado {archivo['ruta']}")
+            _registrar_parseo(log, parseados, archivo, entrada, datos_ejercicio)
+    finally:
+        if ejecutor is not None:
+            ejecutor.shutdown()
+    tiempo_parseo = time.perf_counter() - inicio
+    log.tiempos['parseo'] = tiempo_parseo
+
+    # 5. Qué fila recibe cada archivo. ecuacion_huella es única en todo el
+    # catálogo (y con ella ecuacion_hash, que /api/resolver/ usa para saber
+    # el tipo): los choques con ecuaciones equivalentes se detectan aquí, por
+    # archivo, para no tumbar un bulk_create entero. Si el otro ejercicio es
+    # del mismo tipo y modelo es un error; si no, la ecuación se ha repetido
+    # a propósito en otro tipo o modelo y solo se avisa (ese archivo no se
+    # importa). Un ejercicio sin archivo (anterior al manifiesto o generado)
+    # se adopta
+    inicio = time.perf_counter()
+    existentes = {
+        e.ecuacion_huella: e for e in Ejercicio.objects.filter(
+            ecuacion_huella__in={d['ecuacion_huella'] for _, d, _ in parseados}
+        ).select_related('archivo_origen')
+    }
+    actualizando = {entrada.ejercicio_id for _, _, entrada in parseados if entrada is not None}
+    reservados = {}
+    a_actualizar, a_crear, entradas_nuevas, entradas_cambiadas, pasos_por_ejercicio = [], [], [], [], []
+    # Primero los cambiados: su fila ya es suya
+    for archivo, datos_ejercicio, entrada in sorted(parseados, key=lambda p: p[2] is None):
+        tex_file = os.path.basename(archivo['ruta'])
+        h = datos_ejercicio['ecuacion_huella']
+        otro = existentes.get(h)
+        legado = otro is not None and not hasattr(otro, 'archivo_origen') and otro.id not in actualizando
+        if h in reservados or (otro is not None and otro.id not in actualizando and not (entrada is None and legado)):
+            if h in reservados:
+                descripcion, tipo_otro, modelo_otro = reservados[h]
+            else:
+                descripcion, tipo_otro, modelo_otro = otro, otro.tipo, otro.modelo_id
+            if (tipo_otro, modelo_otro) == (archivo['tipo'], archivo['modelo'].id):
+                log.append(f"    ERROR al importar {tex_file}: ecuación equivalente a {descripcion}")
+                resumen['errores'] += 1
+            else:
+                log.append(
+                    f"    ! REPETIDO: {tex_file} equivale a {descripcion}. Una ecuación solo puede estar "
+                    "una vez en el catálogo, aunque sea en otro tipo o modelo: no se importa"
+                )
+                resumen['repetidos'] += 1
+            continue
+        reservados[h] = (archivo['ruta'], archivo['tipo'], archivo['modelo'].id)
+
+        if entrada is not None:
+            ejercicio_obj = _rellenar_ejercicio(entrada.ejercicio, datos_ejercicio, archivo)
+            a_actualizar.append(ejercicio_obj)
+            entrada.hash_contenido = archivo['hash']
+            entradas_cambiadas.append(entrada)
+            resumen['actualizados'] += 1
+            log.append(f"    ~ ACTUALIZADO: {tex_file}")
+        elif legado:
+            # Ejercicio de una importación anterior al manifiesto: se adopta
+            ejercicio_obj = _rellenar_ejercicio(otro, datos_ejercicio, archivo)
+            a_actualizar.append(ejercicio_obj)
+            actualizando.add(ejercicio_obj.id)
+            entradas_nuevas.append(ArchivoImportado(ruta=archivo['ruta'], hash_contenido=archivo['hash'], ejercicio=ejercicio_obj))
+            resumen['actualizados'] += 1
+            log.append(f"    ~ ADOPTADO: {tex_file}")
+        else:
+            ejercicio_obj = _rellenar_ejercicio(Ejercicio(), datos_ejercicio, archivo)
+            a_crear.append(ejercicio_obj)
+            entradas_nuevas.append(ArchivoImportado(ruta=archivo['ruta'], hash_contenido=archivo['hash'], ejercicio=ejercicio_obj))
+            resumen['añadidos'] += 1
+            log.append(f"    + CREADO: {tex_file}")
+        pasos_por_ejercicio.append((ejercicio_obj, datos_ejercicio['pasos']))
+
+    # 6. Fase de escritura, en lotes
+    try:
+        Ejercicio.objects.bulk_update(a_actualizar, CAMPOS_ACTUALIZABLES, batch_size=tamano_lote)
+        PasoResolucion.objects.filter(ejercicio_id__in=[e.id for e in a_actualizar]).delete()
+        # bulk_create rellena los id (RETURNING en PostgreSQL y SQLite >= 3.35)
+        Ejercicio.objects.bulk_create(a_crear, batch_size=tamano_lote)
+        PasoResolucion.objects.bulk_create([
+            PasoResolucion(
+                ejercicio=ejercicio_obj,
+                numero_paso=paso['numero'],
+                descripcion=paso['descripcion'],
+                ecuacion_resultante=paso['ecuacion']
+            )
+            for ejercicio_obj, pasos in pasos_por_ejercicio for paso in pasos
+        ], batch_size=tamano_lote)
+        ArchivoImportado.objects.bulk_create(entradas_nuevas, batch_size=tamano_lote)
+        ArchivoImportado.objects.bulk_update(entradas_cambiadas, ['hash_contenido'], batch_size=tamano_lote)
+    except Exception as e:
+        transaction.set_rollback(True)
+        log.append(f"ERROR al escribir en la BD, no se ha importado nada: {e}")
+        resumen.update({'añadidos': 0, 'actualizados': 0, 'eliminados': 0})
+        resumen['errores'] += len(parseados)
+        return log
+    tiempo_escritura = time.perf_counter() - inicio
+    log.tiempos['escritura'] = tiempo_escritura
+
+    # Ejercicios del catálogo anteriores al manifiesto que ningún archivo ha adoptado
+    huerfanos = Ejercicio.objects.filter(ecuacion_str__startswith='$$', archivo_origen__isnull=True, generado=False)
+    if solo is not None:
+        huerfanos = huerfanos.filter(modelo__in={a['modelo'] for a in archivos})
+    count = huerfanos.count()
+    if count > 0:
+        huerfanos.delete()
+        log.append(f"--- Se eliminaron {count} ejercicios antiguos sin archivo de origen ---")
+
+    # El catálogo ha cambiado: las ecuaciones parseadas en caché, los ids
+    # para la selección aleatoria, las habilidades de cada ejercicio y el
+    # índice del recomendador ya no valen
+    if resumen['añadidos'] or resumen['actualizados'] or resumen['eliminados'] or count:
+        transaction.on_commit(ecuaciones_core.invalidar_cache_ecuaciones)
+        transaction.on_commit(seleccion_ejercicios.invalidar_ids)
+        transaction.on_commit(servicio_bkt.invalidar)
+        transaction.on_commit(recomendador.invalidar)
+
+    log.append(
+        f"--- Resumen: {resumen['añadidos']} añadidos, {resumen['actualizados']} actualizados, "
+        f"{resumen['sin_cambios']} sin cambios, {resumen['eliminados']} eliminados, "
+        f"{resumen['errores']} errores, {resumen['discrepancias']} con discrepancias, "
+        f"{resumen['no_verificables']} sin verificar del todo, "
+        f"{resumen['repetidos']} repetidos en otro tipo o modelo ---"
+    )
+    log.append(f"--- Tiempos: parseo {tiempo_parseo:.2f} s, escritura {tiempo_escritura:.2f} s ---")
+    if dry_run:
+        transaction.set_rollback(True)
+        log.append("--- Simulación: no se ha guardado ningún cambio. ---")
     log.append("--- Proceso de importación finalizado. ---")
-    return log
\ No newline at end of file
+    return log
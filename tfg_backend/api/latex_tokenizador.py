@@ -0,0 +1,168 @@
+# Nombre de archivo: api/latex_tokenizador.py
+# Versión: TOKENIZADOR_LATEX_V1.0
+#
+# Recorre un .tex una sola vez y lo convierte en una lista de tokens que
+# luego consume latex_extraccion. Tipos de token:
+#   ('seccion', comando, titulo)          \section, \subsection, \textbf
+#   ('matematica', contenido, delimitador) \[..\], \(..\), $$..$$ y los
+#                                          entornos equation/align/aligned
+#   ('texto', contenido)                   todo lo demás, tal cual
+# Las llaves se emparejan (\frac{\frac{a}{b}}{c} no se corta), los
+# comentarios % se saltan y el recorrido termina en \end{document}.
+
+import re
+
+_ENTORNOS_MATEMATICOS = {'equation', 'equation*', 'align', 'align*', 'aligned'}
+
+# Lo único que puede empezar algo distinto de texto. Los escapes (\\, \%,
+# \$) se reconocen para saltarlos; el resto de comandos es texto normal
+_REGEX_ESPECIAL = re.compile(
+    r"\\(?:[\[(\\%$]|(section|subsection|textbf|begin|end)(?![a-zA-Z])\*?)"
+    r"|\{(?=\\\[)|\$\$|%"
+)
+_REGEX_ENTORNO = re.compile(r"\s*\{([a-zA-Z]+\*?)\}")
+# Cuerpo de un bloque de matemáticas hasta su cierre. `\\.` consume los
+# escapes (\\, \{...) para que `\\]` no se tome por un cierre; `{]` es una
+# errata habitual por `\]`
+_REGEX_CUERPO = {
+    '\\]': re.compile(r"(?:[^\\{]|\\[^\]]|\{(?!\]))*"),
+    '\\)': re.compile(r"(?:[^\\]|\\[^)])*"),
+}
+_REGEX_LLAVE = re.compile(r"\\.|[{}]", re.DOTALL)
+
+
+
+def emparejar_llaves(texto):
+    """{posición de cada '{': posición de su '}'} en una sola pasada."""
+    parejas = {}
+    pila = []
+    for m in _REGEX_LLAVE.finditer(texto):
+        c = m.group()
+        if c == '{':
+            pila.append(m.start())
+        elif c == '}' and pila:
+            parejas[pila.pop()] = m.start()
+    return parejas
+
+
+def leer_grupo(texto, pos, parejas=None):
+    """
+    Lee el grupo {...} que empieza en `pos` (tras espacios) emparejando
+    llaves. Devuelve (contenido, posición tras la '}') o None. `parejas`
+    es el resultado de emparejar_llaves(texto), si ya se tiene.
+    """
+    n = len(texto)
+    while pos < n and texto[pos] in ' \t\n':
+        pos += 1
+    if pos >= n or texto[pos] != '{':
+        return None
+    if parejas is None:
+        parejas = emparejar_llaves(texto[pos:])
+        cierre = parejas.get(0)
+        return None if cierre is None else (texto[pos + 1:pos + cierre], pos + cierre + 1)
+    cierre = parejas.get(pos)
+    return None if cierre is None else (texto[pos + 1:cierre], cierre + 1)
+
+
+def _cerrar_matematica(texto, pos, cierre):
+    """(contenido, posición tras el cierre) o None si no se cierra."""
+    fin = _REGEX_CUERPO[cierre].match(texto, pos).end()
+    if texto.startswith(cierre, fin) or (cierre == '\\]' and texto.startswith('{]', fin)):
+        return texto[pos:fin], fin + 2
+    return None
+
+
+def _cerrar_entorno(texto, pos, entorno):
+    """Busca el \\end{entorno} que cierra, contando los anidados."""
+    patron = re.compile(r"\\(begin|end)\{" + re.escape(entorno) + r"\}")
+    nivel = 1
+    for m in patron.finditer(texto, pos):
+        nivel += 1 if m.group(1) == 'begin' else -1
+        if nivel == 0:
+            return texto[pos:m.start()], m.end()
+    return None
+
+
+def tokenizar(texto):
+    tokens = []
+    pendiente = []  # trozos de texto hasta el siguiente token
+    # Si un cierre no aparece desde una posición, tampoco desde una posterior:
+    # así un archivo lleno de aperturas sin cerrar sigue siendo lineal
+    sin_cierre = {}
+    parejas = None  # emparejar_llaves(texto), al primer uso
+
+    def emitir(token):
+        if pendiente:
+            tokens.append(('texto', ''.join(pendiente)))
+            pendiente.clear()
+        tokens.append(token)
+
+    pos = 0
+    n = len(texto)
+    while pos < n:
+        m = _REGEX_ESPECIAL.search(texto, pos)
+        if not m:
+            pendiente.append(texto[pos:])
+            break
+        i = m.start()
+        pendiente.append(texto[pos:i])
+        marca = m.group()
+        pos = m.end()
+
+        if marca == '%':
+            fin = texto.find('\n', i)
+            pos = n if fin < 0 else fin
+        elif marca == '{':
+            pass  # {\[ ... \]}: las llaves alrededor del bloque sobran
+        elif marca == '$$':
+            fin = texto.find('$$', pos) if pos < sin_cierre.get('$$', n + 1) else -1
+            if fin < 0:
+                sin_cierre['$$'] = min(pos, sin_cierre.get('$$', n + 1))
+            if fin >= 0:
+                emitir(('matematica', texto[pos:fin], '$$'))
+                pos = fin + 2
+            else:
+                pendiente.append(marca)
+        elif marca in ('\\[', '\\('):
+            bloque = None
+            if pos < sin_cierre.get(marca, n + 1):
+                bloque = _cerrar_matematica(texto, pos, '\\]' if marca == '\\[' else '\\)')
+                if bloque is None:
+                    sin_cierre[marca] = pos
+            if bloque is not None:
+                emitir(('matematica', bloque[0], marca))
+                pos = bloque[1]
+                if texto.startswith('}', pos):
+                    pos += 1
+            else:
+                pendiente.append(marca)
+        elif m.group(1) is None:
+            pendiente.append(marca)  # \\, \%, \$
+        elif m.group(1) in ('begin', 'end'):
+            e = _REGEX_ENTORNO.match(texto, pos)
+            entorno = e.group(1) if e else None
+            if m.group(1) == 'end' and entorno == 'document':
+                break
+            bloque = None
+            if m.group(1) == 'begin' and entorno in _ENTORNOS_MATEMATICOS and pos < sin_cierre.get(entorno, n + 1):
+                bloque = _cerrar_entorno(texto, e.end(), entorno)
+                if bloque is None:
+                    sin_cierre[entorno] = pos
+            if bloque is not None:
+                emitir(('matematica', bloque[0], entorno))
+                pos = bloque[1]
+            else:
+                pendiente.append(marca)
+        else:
+            if parejas is None:
+                parejas = emparejar_llaves(texto)
+            grupo = leer_grupo(texto, pos, parejas)
+            if grupo is not None:
+                emitir(('seccion', m.group(1), grupo[0]))
+                pos = grupo[1]
+            else:
+                pendiente.append(marca)
+
+    if pendiente:
+        tokens.append(('texto', ''.join(pendiente)))
+    return tokens
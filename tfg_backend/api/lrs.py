@@ -0,0 +1,210 @@
+# Nombre de archivo: api/lrs.py
+# Versión: LRS_BUFFER_V1.0
+#
+# Registro de intentos de los alumnos (LRS) con escritura diferida. Las
+# vistas solo dejan los registros en un buffer en memoria y un hilo los
+# escribe con bulk_create al juntarse LRS_TAMANO_LOTE o cada LRS_INTERVALO
+# segundos, así la petición no espera a la BD.
+#
+# El buffer tiene un tope (LRS_CAPACIDAD). Si está lleno, quien añade espera
+# hasta LRS_ESPERA_MAX segundos a que se vacíe y, si no, se le rechaza (la
+# vista responde 503) en lugar de dejar crecer la memoria. Al terminar el
+# proceso (atexit, que también se ejecuta cuando gunicorn para un worker)
+# se escribe lo pendiente.
+
+import atexit
+import threading
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, connection
+from django.utils import timezone
+from . import instrumentacion
+from .models import Ejercicio, RegistroAprendizaje
+
+User = get_user_model()
+
+
+class RegistroInvalido(ValueError):
+    pass
+
+
+def crear_registro(usuario_id, datos, verbo='RESPONDIDO'):
+    """RegistroAprendizaje (sin guardar) a partir del JSON de un intento."""
+    if not isinstance(datos, dict):
+        raise RegistroInvalido("Cada registro debe ser un objeto")
+    if not isinstance(usuario_id, int) or isinstance(usuario_id, bool):
+        raise RegistroInvalido("'user_id' debe ser un entero")
+    verbo = datos.get('verbo', verbo)
+    if verbo not in dict(RegistroAprendizaje.VERBOS):
+        raise RegistroInvalido(f"Verbo desconocido: {verbo}")
+    ejercicio_id = datos.get('ejercicio_id')
+    if ejercicio_id is not None and (not isinstance(ejercicio_id, int) or isinstance(ejercicio_id, bool)):
+        raise RegistroInvalido("'ejercicio_id' debe ser un entero")
+    exito = datos.get('exito')
+    if exito is not None and not isinstance(exito, bool):
+        raise RegistroInvalido("'exito' debe ser true o false")
+    tiempo_ms = datos.get('tiempo_ms')
+    if tiempo_ms is not None and (not isinstance(tiempo_ms, int) or isinstance(tiempo_ms, bool) or tiempo_ms < 0):
+        raise RegistroInvalido("'tiempo_ms' debe ser un entero no negativo")
+    respuesta = datos.get('respuesta')
+    return RegistroAprendizaje(
+        usuario_id=usuario_id,
+        verbo=verbo,
+        ejercicio_id=ejercicio_id,
+        paso=str(datos.get('paso', ''))[:20],
+        exito=exito,
+        tiempo_ms=tiempo_ms,
+        respuesta='' if respuesta is None else str(respuesta)[:255],
+        momento=timezone.now(),
+    )
+
+
+def escribir_registros(registros):
+    """
+    Escribe un lote. Los de usuarios que ya no existen se descartan y los
+    de ejercicios borrados se guardan sin ejercicio, para que una fila
+    suelta no haga fallar el INSERT de todo el lote.
+    """
+    usuarios = set(User.objects.filter(id__in={r.usuario_id for r in registros}).values_list('id', flat=True))
+    ejercicios = set(Ejercicio.objects.filter(
+        id__in={r.ejercicio_id for r in registros if r.ejercicio_id is not None}
+    ).values_list('id', flat=True))
+    validos = []
+    for registro in registros:
+        if registro.usuario_id not in usuarios:
+            continue
+        if registro.ejercicio_id not in ejercicios:
+            registro.ejercicio_id = None
+        validos.append(registro)
+    RegistroAprendizaje.objects.bulk_create(validos, batch_size=500)
+    return len(validos)
+
+
+class BufferRegistros:
+
+    def __init__(self, capacidad, tamano_lote, intervalo, escribir=escribir_registros):
+        self.capacidad = capacidad
+        self.tamano_lote = tamano_lote
+        self.intervalo = intervalo
+        self._escribir = escribir
+        self._pendientes = []
+        self._cond = threading.Condition()
+        self._cerrando = False
+        self._hilo = None
+
+    def añadir(self, registros, espera=0.0):
+        """
+        Encola los registros. Si no caben, espera hasta `espera` segundos a
+        que el hilo vacíe el buffer. Devuelve False si no se han encolado.
+        """
+        n = len(registros)
+        limite = time.monotonic() + espera
+        with self._cond:
+            while self._cerrando or len(self._pendientes) + n > self.capacidad:
+                restante = limite - time.monotonic()
+                if self._cerrando or n > self.capacidad or restante <= 0:
+                    instrumentacion.contar('lrs', 'rechazados', n)
+                    return False
+                self._cond.notify_all()  # que el hilo escriba ya
+                self._cond.wait(restante)
+            self._pendientes.extend(registros)
+            if len(self._pendientes) >= self.tamano_lote:
+                self._cond.notify_all()
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._bucle, name='lrs', daemon=True)
+                self._hilo.start()
+        instrumentacion.contar('lrs', 'aceptados', n)
+        return True
+
+    def pendientes(self):
+        with self._cond:
+            return len(self._pendientes)
+
+    def _hay_lote(self):
+        return self._cerrando or len(self._pendientes) >= min(self.tamano_lote, self.capacidad)
+
+    def _bucle(self):
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(self._hay_lote, timeout=self.intervalo)
+                    lote, self._pendientes = self._pendientes, []
+                    cerrando = self._cerrando
+                    self._cond.notify_all()  # ya hay sitio
+                if lote:
+                    self._volcar(lote, cerrando)
+                if cerrando:
+                    return
+        finally:
+            connection.close()
+
+    def _volcar(self, lote, cerrando):
+        close_old_connections()
+        try:
+            escritos = self._escribir(lote)
+        except Exception as e:
+            if cerrando:
+                print(f"AVISO: se pierden {len(lote)} registros LRS al cerrar: {e}")
+                instrumentacion.contar('lrs', 'perdidos', len(lote))
+                return
+            # La BD no responde: se devuelven al buffer para el siguiente
+            # intento, hasta donde quepan
+            with self._cond:
+                hueco = max(0, self.capacidad - len(self._pendientes))
+                self._pendientes[:0] = lote[:hueco]
+            print(f"AVISO: error escribiendo {len(lote)} registros LRS, se reintentará: {e}")
+            instrumentacion.contar('lrs', 'errores_escritura')
+            instrumentacion.contar('lrs', 'perdidos', len(lote) - min(hueco, len(lote)))
+            connection.close()
+            return
+        instrumentacion.contar('lrs', 'lotes')
+        instrumentacion.contar('lrs', 'escritos', escritos)
+
+    def cerrar(self, timeout=10):
+        """Escribe lo pendiente y para el hilo. Después se rechaza todo."""
+        with self._cond:
+            self._cerrando = True
+            self._cond.notify_all()
+            hilo = self._hilo
+        if hilo is not None:
+            hilo.join(timeout)
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+def obtener_buffer() -> BufferRegistros:
+    """Crea el buffer (y su hilo, con el primer registro) la primera vez que se usa."""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = BufferRegistros(
+                    capacidad=settings.LRS_CAPACIDAD,
+                    tamano_lote=settings.LRS_TAMANO_LOTE,
+                    intervalo=settings.LRS_INTERVALO,
+                )
+                atexit.register(_buffer.cerrar)
+    return _buffer
+
+
+def registrar(registros) -> bool:
+    """Encola RegistroAprendizaje ya creados, con contrapresión (ver BufferRegistros.añadir)."""
+    return obtener_buffer().añadir(registros, espera=settings.LRS_ESPERA_MAX)
+
+
+def track_to_lrs(student_id, exercise_id, paso, exito, tiempo_ms, respuesta_usuario, verbo='RESPONDIDO') -> bool:
+    """
+    Registra un intento sin esperar a la BD. Nunca lanza: devuelve False si
+    los datos no son válidos o el buffer está lleno.
+    """
+    try:
+        registro = crear_registro(student_id, {
+            'ejercicio_id': exercise_id, 'paso': paso, 'exito': exito,
+            'tiempo_ms': tiempo_ms, 'respuesta': respuesta_usuario, 'verbo': verbo,
+        })
+    except RegistroInvalido as e:
+        print(f"AVISO: registro LRS descartado: {e}")
+        return False
+    return obtener_buffer().añadir([registro])
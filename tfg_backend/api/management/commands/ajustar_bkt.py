@@ -0,0 +1,28 @@
+# Nombre de archivo: api/management/commands/ajustar_bkt.py
+#
+# Reajusta por EM los parámetros de BKT de cada habilidad con todo el
+# historial de intentos (RegistroAprendizaje) y los guarda en ParametrosBKT.
+# Pensado para lanzarse periódicamente (cron), p. ej. cada noche.
+
+from django.core.management.base import BaseCommand
+from api import servicio_bkt
+
+class Command(BaseCommand):
+    help = "Ajusta los parámetros de Bayesian Knowledge Tracing de cada habilidad con el historial."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iteraciones', type=int, default=20, help="Máximo de iteraciones de EM.")
+
+    def handle(self, *args, **options):
+        parametros, log_verosimilitud, observaciones = servicio_bkt.ajustar(options['iteraciones'])
+        if log_verosimilitud:
+            self.stdout.write(
+                f"{len(log_verosimilitud)} iteraciones, log-verosimilitud "
+                f"{log_verosimilitud[0]:.1f} -> {log_verosimilitud[-1]:.1f}"
+            )
+        for k, (nombre, valores) in enumerate(parametros.por_habilidad().items()):
+            self.stdout.write(
+                f"  {nombre:<26} {observaciones[k]:>8} obs.  " +
+                "  ".join(f"{campo} {valor:.3f}" for campo, valor in valores.items())
+            )
+        self.stdout.write(self.style.SUCCESS("Parámetros guardados."))
@@ -0,0 +1,95 @@
+# Nombre de archivo: api/management/commands/benchmark_bkt.py
+#
+# Mide el motor de BKT (api/bkt.py) con datos sintéticos, sin BD: por
+# defecto 10.000 alumnos y 1.000.000 de intentos generados con unos
+# parámetros conocidos. Informa del coste de una actualización en línea, de
+# reproducir el historial entero y del ajuste por EM, y de cuánto se
+# parecen los parámetros ajustados a los verdaderos.
+
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from api import bkt
+
+# Parámetros con los que se generan los datos
+VERDADEROS = bkt.Parametros(
+    inicial=[0.2, 0.4, 0.3, 0.1],
+    aprendizaje=[0.15, 0.05, 0.1, 0.2],
+    desliz=[0.1, 0.05, 0.15, 0.08],
+    adivinar=[0.25, 0.2, 0.1, 0.15],
+)
+
+def generar(alumnos, intentos, rng):
+    """
+    Historial sintético ordenado por alumno. Cada intento practica una sola
+    habilidad, para que los datos sigan exactamente el modelo y se pueda
+    comparar lo ajustado con VERDADEROS.
+    """
+    usuarios = np.sort(rng.integers(0, alumnos, intentos))
+    habilidades = rng.integers(0, bkt.NUM_HABILIDADES, intentos)
+    filas = np.arange(intentos)
+    inicio = np.r_[0, np.flatnonzero(np.diff(usuarios)) + 1]
+    rango = filas - np.repeat(inicio, np.diff(np.r_[inicio, intentos]))
+    sabe = rng.random((alumnos, bkt.NUM_HABILIDADES)) < VERDADEROS.inicial
+    correctos = np.empty(intentos, dtype=bool)
+    # Por oleadas: la k-ésima respuesta de todos los alumnos a la vez
+    por_oleada = np.argsort(rango, kind='stable')
+    limites = np.searchsorted(rango[por_oleada], np.arange(rango.max() + 2))
+    for ola in range(len(limites) - 1):
+        sel = por_oleada[limites[ola]:limites[ola + 1]]
+        u, k = usuarios[sel], habilidades[sel]
+        s = sabe[u, k]
+        prob = np.where(s, 1 - VERDADEROS.desliz[k], VERDADEROS.adivinar[k])
+        correctos[sel] = rng.random(len(sel)) < prob
+        sabe[u, k] = s | (rng.random(len(sel)) < VERDADEROS.aprendizaje[k])
+    return usuarios, (1 << habilidades), correctos
+
+class Command(BaseCommand):
+    help = "Benchmark del motor BKT: actualización en línea, reproducción del historial y ajuste EM."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alumnos', type=int, default=10_000)
+        parser.add_argument('--intentos', type=int, default=1_000_000)
+        parser.add_argument('--iteraciones', type=int, default=10, help="Máximo de iteraciones de EM.")
+        parser.add_argument('--semilla', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['semilla'])
+        inicio = time.perf_counter()
+        usuarios, mascaras, correctos = generar(options['alumnos'], options['intentos'], rng)
+        self.stdout.write(
+            f"{options['alumnos']} alumnos, {len(usuarios)} intentos "
+            f"(generados en {time.perf_counter() - inicio:.2f} s)"
+        )
+
+        modelo = bkt.ModeloBKT()
+        n = min(100_000, len(usuarios))
+        lista = list(zip(usuarios[:n].tolist(), mascaras[:n].tolist(), correctos[:n].tolist()))
+        inicio = time.perf_counter()
+        for intento in lista:
+            modelo.actualizar(*intento)
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(f"  actualizar (en línea)     {segundos / n * 1e6:8.1f} µs/intento")
+
+        modelo = bkt.ModeloBKT()
+        inicio = time.perf_counter()
+        modelo.actualizar_lote(usuarios, mascaras, correctos)
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(
+            f"  actualizar_lote           {segundos:8.2f} s  ({len(usuarios) / segundos:,.0f} intentos/s)"
+        )
+
+        inicio = time.perf_counter()
+        parametros, log_verosimilitud, _ = bkt.ajustar_em(
+            usuarios, mascaras, correctos, iteraciones=options['iteraciones'])
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(
+            f"  ajustar_em                {segundos:8.2f} s  ({len(log_verosimilitud)} iteraciones, "
+            f"{segundos / max(1, len(log_verosimilitud)):.2f} s/iteración)"
+        )
+        for campo in bkt.Parametros.__slots__:
+            error = np.abs(getattr(parametros, campo) - getattr(VERDADEROS, campo)).max()
+            self.stdout.write(
+                f"    {campo:<12} ajustado {np.round(getattr(parametros, campo), 3)}  "
+                f"verdadero {getattr(VERDADEROS, campo)}  (error máx. {error:.3f})"
+            )
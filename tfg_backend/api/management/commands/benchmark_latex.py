@@ -0,0 +1,40 @@
+# Nombre de archivo: api/management/commands/benchmark_latex.py
+#
+# Mide cuántos .tex por segundo procesa el extractor sobre el corpus de
+# Modelos/ (solo CPU: los archivos se leen antes de cronometrar).
+
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand
+from api import latex_tokenizador
+from api.latex_extraccion import parsear_contenido_tex
+from api.latex_parser import MODELOS_DIR
+
+class Command(BaseCommand):
+    help = "Throughput (archivos/s) del tokenizador y del parseo completo de los .tex de Modelos/."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=20, help="Pasadas sobre el corpus.")
+        parser.add_argument('--directorio', default=str(MODELOS_DIR), help="Carpeta con los .tex.")
+
+    def handle(self, *args, **options):
+        archivos = sorted(Path(options['directorio']).rglob('*.tex'))
+        if not archivos:
+            self.stderr.write(f"No hay .tex en {options['directorio']}")
+            return
+        contenidos = [f.read_text(encoding='utf-8', errors='replace') for f in archivos]
+        total_kb = sum(len(c) for c in contenidos) / 1024
+        repeticiones = options['repeticiones']
+        self.stdout.write(f"{len(contenidos)} archivos ({total_kb:.1f} KB), {repeticiones} pasadas")
+
+        for nombre, funcion in (('tokenizar', latex_tokenizador.tokenizar), ('parsear_contenido_tex', parsear_contenido_tex)):
+            inicio = time.perf_counter()
+            for _ in range(repeticiones):
+                for contenido in contenidos:
+                    funcion(contenido)
+            segundos = time.perf_counter() - inicio
+            n = len(contenidos) * repeticiones
+            self.stdout.write(
+                f"  {nombre:<22} {n / segundos:10.0f} archivos/s  "
+                f"({segundos / n * 1e6:.0f} µs/archivo, {total_kb * repeticiones / 1024 / segundos:.1f} MB/s)"
+            )
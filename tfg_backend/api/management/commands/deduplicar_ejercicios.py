@@ -0,0 +1,98 @@
+# Nombre de archivo: api/management/commands/deduplicar_ejercicios.py
+#
+# Une los ejercicios equivalentes (misma forma canónica, ver
+# ecuaciones_core.forma_canonica) que ya estaban en la tabla antes de
+# ecuacion_huella, y rellena la huella de todos. Hay que lanzarlo tras la
+# migración 0012, que solo añade la columna (y tras cambiar la forma
+# canónica):
+#
+#   python manage.py deduplicar_ejercicios --dry-run
+#   python manage.py deduplicar_ejercicios
+#
+# De cada grupo se queda el que viene de un .tex, si no el no generado y si
+# no el de menor id. Los completados, movimientos de puntos y registros de
+# aprendizaje de los demás pasan a él.
+
+import numpy as np
+from collections import defaultdict
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from api import bitmap, ecuaciones_core, recomendador, seleccion_ejercicios, servicio_bkt
+from api.models import ArchivoImportado, Ejercicio, MovimientoPuntos, ProgresoUsuario, RegistroAprendizaje
+
+class Command(BaseCommand):
+    help = "Une los ejercicios con ecuaciones equivalentes y rellena ecuacion_huella."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Hace todo pero no guarda nada.")
+        parser.add_argument('--lote', type=int, default=500, help="Filas por bulk_update.")
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        grupos = defaultdict(list)
+        guardadas = {}
+        con_archivo = set(ArchivoImportado.objects.values_list('ejercicio_id', flat=True))
+        for ejercicio_id, ecuacion_str, generado, huella in Ejercicio.objects.values_list(
+                'id', 'ecuacion_str', 'generado', 'ecuacion_huella').iterator():
+            grupos[ecuaciones_core.huella_ecuacion(ecuacion_str)].append((ejercicio_id not in con_archivo, generado, ejercicio_id))
+            guardadas[ejercicio_id] = huella
+
+        # duplicado -> el que se queda
+        destino = {}
+        for miembros in grupos.values():
+            if len(miembros) > 1:
+                miembros.sort()
+                for _, _, ejercicio_id in miembros[1:]:
+                    destino[ejercicio_id] = miembros[0][2]
+
+        if destino:
+            por_destino = defaultdict(list)
+            for duplicado, queda in destino.items():
+                por_destino[queda].append(duplicado)
+            for queda, duplicados in por_destino.items():
+                MovimientoPuntos.objects.filter(ejercicio_id__in=duplicados).update(ejercicio_id=queda)
+                RegistroAprendizaje.objects.filter(ejercicio_id__in=duplicados).update(ejercicio_id=queda)
+
+            Completado = ProgresoUsuario.ejercicios_completados.through
+            Completado.objects.bulk_create([
+                Completado(progresousuario_id=progreso_id, ejercicio_id=destino[ejercicio_id])
+                for progreso_id, ejercicio_id in Completado.objects.filter(
+                    ejercicio_id__in=destino).values_list('progresousuario_id', 'ejercicio_id')
+            ], batch_size=options['lote'], ignore_conflicts=True)
+            ids_duplicados = np.array(list(destino), dtype=np.int64)
+            progresos = []
+            for progreso in ProgresoUsuario.objects.only('id', 'completados_bitmap').iterator():
+                marcados = ids_duplicados[bitmap.contiene_array(progreso.completados_bitmap, ids_duplicados)]
+                if len(marcados):
+                    marcados = marcados.tolist()
+                    progreso.completados_bitmap = bitmap.sin_ids(
+                        bitmap.con_ids(progreso.completados_bitmap, [destino[i] for i in marcados]), marcados)
+                    progresos.append(progreso)
+            ProgresoUsuario.objects.bulk_update(progresos, ['completados_bitmap'], batch_size=options['lote'])
+
+            for ruta, ejercicio_id in ArchivoImportado.objects.filter(ejercicio_id__in=destino).values_list('ruta', 'ejercicio_id'):
+                self.stdout.write(
+                    f"AVISO: {ruta} equivale al ejercicio {destino[ejercicio_id]}; "
+                    "la próxima importación lo dará como error"
+                )
+            Ejercicio.objects.filter(id__in=destino).delete()
+
+        rellenar = []
+        for huella, miembros in grupos.items():
+            ejercicio_id = miembros[0][2]
+            if guardadas[ejercicio_id] != huella:
+                rellenar.append(Ejercicio(id=ejercicio_id, ecuacion_huella=huella))
+        # Primero se liberan las huellas que cambian, para no chocar con la restricción única
+        Ejercicio.objects.filter(id__in=[e.id for e in rellenar]).exclude(ecuacion_huella=None).update(ecuacion_huella=None)
+        Ejercicio.objects.bulk_update(rellenar, ['ecuacion_huella'], batch_size=options['lote'])
+
+        if options['dry_run']:
+            transaction.set_rollback(True)
+            self.stdout.write("--- Simulación: no se ha guardado ningún cambio. ---")
+        elif destino:
+            transaction.on_commit(seleccion_ejercicios.invalidar_ids)
+            transaction.on_commit(servicio_bkt.invalidar)
+            transaction.on_commit(recomendador.invalidar)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(destino)} ejercicios duplicados unidos, {len(rellenar)} huellas actualizadas."
+        ))
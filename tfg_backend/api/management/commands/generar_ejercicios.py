@@ -0,0 +1,53 @@
+# Nombre de archivo: api/management/commands/generar_ejercicios.py
+#
+# Genera ejercicios aleatorios con el perfil de cada modelo (ver
+# api/generador.py) y los guarda como ejercicios de entrenamiento:
+#
+#   python manage.py generar_ejercicios --cantidad 1000
+#   python manage.py generar_ejercicios --cantidad 200 --modelo 3 --semilla 42 --tipo PRUEBA
+#   python manage.py generar_ejercicios --cantidad 50000 --jobs 4 --dry-run
+#
+# Con la misma --semilla y el mismo catálogo se generan los mismos ejercicios.
+
+from django.core.management.base import BaseCommand, CommandError
+from api import generador
+from api.models import Ejercicio, ModeloEjercicio
+
+class Command(BaseCommand):
+    help = "Genera ejercicios aleatorios para cada modelo, verificados con el motor."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cantidad', type=int, required=True, help="Ejercicios nuevos por modelo.")
+        parser.add_argument('--modelo', type=int, action='append', metavar='ID',
+                            help="Solo este modelo (se puede repetir). Por defecto, todos.")
+        parser.add_argument('--tipo', default='ENTRENAMIENTO', choices=[t for t, _ in Ejercicio.TIPO_EJERCICIO])
+        parser.add_argument('--semilla', type=int, default=None, help="Semilla del sorteo, para repetirlo.")
+        parser.add_argument('--jobs', type=int, default=None, help="Procesos para resolver (IMPORTACION_PROCESOS).")
+        parser.add_argument('--lote', type=int, default=None, help="Filas por bulk_create (IMPORTACION_TAMANO_LOTE).")
+        parser.add_argument('--dry-run', action='store_true', help="Hace todo pero no guarda nada.")
+
+    def handle(self, *args, **options):
+        if options['cantidad'] < 1:
+            raise CommandError("--cantidad debe ser al menos 1.")
+        modelos = ModeloEjercicio.objects.order_by('id')
+        if options['modelo']:
+            modelos = modelos.filter(id__in=options['modelo'])
+        modelos = list(modelos)
+        if not modelos:
+            raise CommandError("No hay modelos para generar.")
+
+        resumen, segundos = generador.generar_ejercicios(
+            modelos, options['cantidad'],
+            tipo=options['tipo'],
+            semilla=options['semilla'],
+            tamano_lote=options['lote'],
+            procesos=options['jobs'],
+            dry_run=options['dry_run'],
+            progreso=self.stdout.write,
+        )
+        creados = sum(cuenta['creados'] for cuenta in resumen.values())
+        ritmo = creados / segundos * 60 if segundos else 0
+        self.stdout.write(f"--- Tiempo: {segundos:.2f} s ({ritmo:.0f} ejercicios/min) ---")
+        if options['dry_run']:
+            self.stdout.write("--- Simulación: no se ha guardado ningún cambio. ---")
+        self.stdout.write(self.style.SUCCESS(f"{creados} ejercicios generados."))
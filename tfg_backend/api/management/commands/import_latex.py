@@ -0,0 +1,64 @@
+# Nombre de archivo: api/management/commands/import_latex.py
+#
+# Importa los ejercicios de Modelos/ sin pasar por el admin (lo mismo que el
+# botón "Importar Ejercicios desde LaTeX"). Pensado para el despliegue:
+#
+#   python manage.py import_latex
+#   python manage.py import_latex --dry-run --only "Modelo 4" --jobs 4
+#   python manage.py import_latex --json > informe.json
+#   python manage.py import_latex --forzar --dry-run --json   (solo validar)
+#
+# Sale con código 1 si algún archivo no se pudo leer, parsear o guardar. Las
+# discrepancias entre la solución del .tex y la calculada (o entre pasos
+# seguidos) se informan pero no cambian el código de salida, igual que lo
+# que no se ha podido comprobar (ni con el motor racional ni con SymPy).
+
+import json
+from django.core.management.base import BaseCommand, CommandError
+from api.latex_parser import importar_modelos
+
+class Command(BaseCommand):
+    help = "Importa (de forma incremental) los ejercicios LaTeX de la carpeta Modelos/."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Hace todo pero no guarda nada.")
+        parser.add_argument('--only', action='append', metavar='MODELO',
+                            help="Importa solo esta carpeta de Modelos/ (se puede repetir).")
+        parser.add_argument('--jobs', type=int, default=None, help="Procesos para parsear (IMPORTACION_PROCESOS).")
+        parser.add_argument('--lote', type=int, default=None, help="Filas por bulk_create (IMPORTACION_TAMANO_LOTE).")
+        parser.add_argument('--forzar', action='store_true',
+                            help="Vuelve a parsear y validar también los archivos sin cambios.")
+        parser.add_argument('--json', action='store_true',
+                            help="Al terminar, escribe un informe JSON en stdout (el progreso va a stderr).")
+
+    def handle(self, *args, **options):
+        # Con --json stdout queda limpio para el informe
+        salida = self.stderr if options['json'] else self.stdout
+        log = importar_modelos(
+            tamano_lote=options['lote'],
+            procesos=options['jobs'],
+            solo=options['only'],
+            dry_run=options['dry_run'],
+            progreso=salida.write,
+            forzar=options['forzar'],
+        )
+
+        resumen = log.resumen
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'dry_run': options['dry_run'],
+                'resumen': resumen,
+                'tiempos': log.tiempos,
+                'errores': [linea.strip() for linea in log if 'ERROR' in linea],
+                'discrepancias': log.discrepancias,
+                'no_verificables': log.no_verificables,
+                'log': list(log),
+            }, ensure_ascii=False, indent=2))
+
+        # Un error general (sin carpeta Modelos, sin huellas, fallo al
+        # escribir) explica mejor el fallo que la cuenta de archivos
+        generales = [linea for linea in log if linea.startswith('ERROR')]
+        if generales:
+            raise CommandError(generales[0], returncode=1)
+        if resumen['errores']:
+            raise CommandError(f"Importación con {resumen['errores']} archivo(s) con errores.", returncode=1)
@@ -0,0 +1,24 @@
+# Nombre de archivo: api/management/commands/procesar_trabajos.py
+#
+# Worker de la cola de trabajos (api/trabajos.py) como proceso aparte, para
+# cuando TRABAJOS_HILO_LOCAL = False.
+
+import time
+from django.core.management.base import BaseCommand
+from api import trabajos
+
+class Command(BaseCommand):
+    help = "Ejecuta los trabajos en cola (importaciones, recálculos...) del admin."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--una-vez', action='store_true', help="Vacía la cola y termina.")
+        parser.add_argument('--intervalo', type=float, default=5.0, help="Segundos entre consultas a la cola.")
+
+    def handle(self, *args, **options):
+        while True:
+            ejecutados = trabajos.procesar_cola()
+            if ejecutados:
+                self.stdout.write(f"{ejecutados} trabajo(s) ejecutados.")
+            if options['una_vez']:
+                return
+            time.sleep(options['intervalo'])
@@ -0,0 +1,33 @@
+# Nombre de archivo: api/management/commands/recalcular_ejercicios.py
+#
+# Recalcula los datos derivados de cada Ejercicio (clasificación, solución
+# normalizada y pasos generados). Hay que lanzarlo tras cambiar el motor.
+
+from django.core.management.base import BaseCommand
+from api import ecuaciones_core
+from api.models import Ejercicio
+
+CAMPOS_DERIVADOS = ['caracteristicas', 'solucion_normalizada', 'pasos_generados']
+
+class Command(BaseCommand):
+    help = "Recalcula clasificación, solución y pasos generados de todos los ejercicios."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500, help="Filas por bulk_update.")
+
+    def handle(self, *args, **options):
+        ecuaciones_core.invalidar_cache_ecuaciones()
+        pendientes = []
+        total = 0
+        for ejercicio in Ejercicio.objects.only('id', 'ecuacion_str').iterator():
+            for campo, valor in ecuaciones_core.calcular_datos_derivados(ejercicio.ecuacion_str).items():
+                setattr(ejercicio, campo, valor)
+            pendientes.append(ejercicio)
+            if len(pendientes) >= options['lote']:
+                Ejercicio.objects.bulk_update(pendientes, CAMPOS_DERIVADOS)
+                total += len(pendientes)
+                pendientes = []
+        if pendientes:
+            Ejercicio.objects.bulk_update(pendientes, CAMPOS_DERIVADOS)
+            total += len(pendientes)
+        self.stdout.write(self.style.SUCCESS(f"{total} ejercicios recalculados."))
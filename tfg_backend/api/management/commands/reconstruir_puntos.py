@@ -0,0 +1,23 @@
+# Nombre de archivo: api/management/commands/reconstruir_puntos.py
+#
+# Recalcula ProgresoUsuario.puntos_totales como la suma de MovimientoPuntos.
+# Pensado para lanzarse periódicamente (cron):
+#
+#   python manage.py reconstruir_puntos
+#
+# En funcionamiento normal no corrige nada; si lo hace, lo lista.
+
+from django.core.management.base import BaseCommand
+from api import puntos
+
+class Command(BaseCommand):
+    help = "Reconstruye los puntos totales de cada usuario desde el libro de movimientos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500, help="Usuarios por transacción.")
+
+    def handle(self, *args, **options):
+        corregidos = puntos.reconstruir_totales(tamano_lote=options['lote'])
+        for usuario_id, antes, despues in corregidos:
+            self.stdout.write(f"Usuario {usuario_id}: {antes} -> {despues}")
+        self.stdout.write(self.style.SUCCESS(f"{len(corregidos)} totales corregidos."))
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:51
+
+from django.db import migrations, models
+
+
+def desde_ids(ejercicio_ids) -> bytes:
+    # Copia congelada de api.bitmap.desde_ids (bit i = id i): la migración
+    # tiene que escribir siempre el formato de esta versión
+    resultado = bytearray()
+    for ejercicio_id in ejercicio_ids:
+        byte = ejercicio_id >> 3
+        if byte >= len(resultado):
+            resultado.extend(bytes(byte + 1 - len(resultado)))
+        resultado[byte] |= 1 << (ejercicio_id & 7)
+    return bytes(resultado)
+
+
+def rellenar_bitmaps(apps, schema_editor):
+    ProgresoUsuario = apps.get_model('api', 'ProgresoUsuario')
+    for progreso in ProgresoUsuario.objects.all():
+        progreso.completados_bitmap = desde_ids(progreso.ejercicios_completados.values_list('id', flat=True))
+        progreso.save(update_fields=['completados_bitmap'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_datos_derivados_ejercicio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='progresousuario',
+            name='completados_bitmap',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+        migrations.RunPython(rellenar_bitmaps, migrations.RunPython.noop),
+    ]
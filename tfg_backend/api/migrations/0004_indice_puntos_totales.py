@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_bitmap_completados'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='progresousuario',
+            name='puntos_totales',
+            field=models.IntegerField(db_index=True, default=0),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:54
+
+import hashlib
+from django.db import migrations, models
+
+
+def hash_ecuacion(equation_str: str) -> str:
+    # Copia congelada de api.ecuaciones_core.hash_ecuacion: SHA-256 de la
+    # ecuación sin envoltorio $$...$$ y con los espacios colapsados
+    s = equation_str.strip()
+    while s.startswith('$') and s.endswith('$') and len(s) > 1:
+        s = s[1:-1].strip()
+    return hashlib.sha256(" ".join(s.split()).encode('utf-8')).hexdigest()
+
+
+def rellenar_hashes(apps, schema_editor):
+    Ejercicio = apps.get_model('api', 'Ejercicio')
+    vistos = set()
+    for ejercicio in Ejercicio.objects.order_by('id'):
+        h = hash_ecuacion(ejercicio.ecuacion_str)
+        if h in vistos:
+            # Duplicado de otro ejercicio tras normalizar: se queda sin hash
+            print(f"AVISO: ejercicio {ejercicio.id} duplicado, sin ecuacion_hash")
+            continue
+        vistos.add(h)
+        ejercicio.ecuacion_hash = h
+        ejercicio.save(update_fields=['ecuacion_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_indice_puntos_totales'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ejercicio',
+            name='ecuacion_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(rellenar_hashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_hash_ecuacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivoImportado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ruta', models.CharField(max_length=500, unique=True)),
+                ('hash_contenido', models.CharField(max_length=64)),
+                ('fecha_importacion', models.DateTimeField(auto_now=True)),
+                ('ejercicio', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='archivo_origen', to='api.ejercicio')),
+            ],
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_archivos_importados'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Trabajo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=50)),
+                ('parametros', models.JSONField(blank=True, default=dict)),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'En cola'), ('EN_CURSO', 'En curso'), ('TERMINADO', 'Terminado'), ('FALLIDO', 'Fallido')], db_index=True, default='PENDIENTE', max_length=20)),
+                ('resultado', models.JSONField(blank=True, default=dict)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('iniciado', models.DateTimeField(blank=True, null=True)),
+                ('terminado', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-creado'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LineaTrabajo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero', models.PositiveIntegerField()),
+                ('texto', models.TextField()),
+                ('trabajo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lineas', to='api.trabajo')),
+            ],
+            options={
+                'ordering': ['numero'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='lineatrabajo',
+            constraint=models.UniqueConstraint(fields=('trabajo', 'numero'), name='linea_trabajo_unica'),
+        ),
+    ]
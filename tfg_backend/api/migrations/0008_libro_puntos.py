@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:07
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def saldos_iniciales(apps, schema_editor):
+    # Los puntos de antes del libro entran como un primer movimiento, para
+    # que reconstruir_puntos dé los mismos totales
+    ProgresoUsuario = apps.get_model('api', 'ProgresoUsuario')
+    MovimientoPuntos = apps.get_model('api', 'MovimientoPuntos')
+    MovimientoPuntos.objects.bulk_create([
+        MovimientoPuntos(usuario_id=usuario_id, delta=puntos, motivo='saldo_inicial')
+        for usuario_id, puntos in ProgresoUsuario.objects.exclude(puntos_totales=0).values_list('usuario_id', 'puntos_totales')
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0007_trabajos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimientoPuntos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.IntegerField()),
+                ('motivo', models.CharField(blank=True, default='', max_length=50)),
+                ('clave', models.CharField(blank=True, max_length=64, null=True)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('ejercicio', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.ejercicio')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimientos_puntos', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-creado'],
+                'indexes': [models.Index(fields=['usuario', 'creado'], name='movimiento_usuario_fecha')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='movimientopuntos',
+            constraint=models.UniqueConstraint(fields=('usuario', 'clave'), name='movimiento_clave_unica'),
+        ),
+        migrations.RunPython(saldos_iniciales, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0008_libro_puntos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistroAprendizaje',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('verbo', models.CharField(choices=[('RESPONDIDO', 'Respondido'), ('COMPLETADO', 'Completado')], default='RESPONDIDO', max_length=20)),
+                ('paso', models.CharField(blank=True, default='', max_length=20)),
+                ('exito', models.BooleanField(null=True)),
+                ('tiempo_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('respuesta', models.CharField(blank=True, default='', max_length=255)),
+                ('momento', models.DateTimeField()),
+                ('ejercicio', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='registros_aprendizaje', to='api.ejercicio')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='registros_aprendizaje', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-momento'],
+                'indexes': [models.Index(fields=['usuario', 'momento'], name='registro_usuario_momento'), models.Index(fields=['ejercicio', 'momento'], name='registro_ejercicio_momento')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_registros_aprendizaje'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParametrosBKT',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('habilidad', models.CharField(max_length=50, unique=True)),
+                ('p_inicial', models.FloatField()),
+                ('p_aprendizaje', models.FloatField()),
+                ('p_desliz', models.FloatField()),
+                ('p_adivinar', models.FloatField()),
+                ('observaciones', models.PositiveIntegerField(default=0)),
+                ('ajustado', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
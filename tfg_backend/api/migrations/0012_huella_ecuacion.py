@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:31
+
+from django.db import migrations, models
+
+
+# Solo el esquema: la huella depende de motor_racional.forma_canonica, que
+# puede cambiar, así que la rellena (y une los duplicados) el comando
+# `python manage.py deduplicar_ejercicios`, que hay que lanzar tras migrar.
+# Hasta entonces import_latex se niega a importar.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_ejercicios_generados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ejercicio',
+            name='ecuacion_huella',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -1,8 +1,10 @@
 # Nombre de archivo: api/models.py
 # Versión: GAMIFICACION_FLOW_V3.0
 
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import User
+from .ecuaciones_core import hash_ecuacion, huella_ecuacion
 
 # --- MODELOS EXISTENTES ---
 class ModeloEjercicio(models.Model):
@@ -25,8 +27,34 @@ class Ejercicio(models.Model):
     modelo = models.ForeignKey(ModeloEjercicio, on_delete=models.CASCADE, related_name='ejercicios')
     tipo = models.CharField(max_length=20, choices=TIPO_EJERCICIO, default='ENTRENAMIENTO')
     ecuacion_str = models.CharField(max_length=255)
+    # Hash de ecuacion_str normalizada (sin $$ ni espacios de más), para
+    # encontrar el ejercicio aunque el cliente la mande con otro formato
+    ecuacion_hash = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
+    # Hash de la forma canónica (ecuaciones_core.forma_canonica): dos
+    # ejercicios que solo se diferencian en cómo están escritos chocan aquí.
+    # Es única en todo el catálogo, como ecuacion_hash: una ecuación no puede
+    # repetirse ni en otro tipo o modelo (la importación lo avisa y la omite)
+    ecuacion_huella = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
     solucion = models.CharField(max_length=50)
 
+    # Datos derivados, calculados una vez al importar (ver recalcular_ejercicios)
+    caracteristicas = models.JSONField(default=dict, blank=True)
+    solucion_normalizada = models.CharField(max_length=50, blank=True, default='')
+    pasos_generados = models.JSONField(default=list, blank=True)
+    # Creado por api/generador.py y no por un .tex: la importación no lo
+    # toma por un resto de importaciones antiguas
+    generado = models.BooleanField(default=False)
+
+    def clean(self):
+        otro = Ejercicio.objects.filter(ecuacion_huella=huella_ecuacion(self.ecuacion_str)).exclude(pk=self.pk).first()
+        if otro is not None:
+            raise ValidationError({'ecuacion_str': f"Equivale al ejercicio {otro.id}: {otro.ecuacion_str}"})
+
+    def save(self, *args, **kwargs):
+        self.ecuacion_hash = hash_ecuacion(self.ecuacion_str)
+        self.ecuacion_huella = huella_ecuacion(self.ecuacion_str)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.modelo.nombre} ({self.tipo}) - {self.ecuacion_str}"
 
@@ -42,13 +70,129 @@ class PasoResolucion(models.Model):
     def __str__(self):
         return f"Paso {self.numero_paso} para {self.ejercicio.ecuacion_str}"
 
+# --- MANIFIESTO DE IMPORTACIÓN ---
+class ArchivoImportado(models.Model):
+    """Un .tex de Modelos/ ya importado: su ruta, el hash de su contenido y el ejercicio que generó."""
+    ruta = models.CharField(max_length=500, unique=True)  # relativa a Modelos/, con '/'
+    hash_contenido = models.CharField(max_length=64)
+    ejercicio = models.OneToOneField(Ejercicio, on_delete=models.CASCADE, related_name='archivo_origen')
+    fecha_importacion = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.ruta
+
 # --- MODELO DE PROGRESO ACTUALIZADO ---
 class ProgresoUsuario(models.Model):
     usuario = models.OneToOneField(User, on_delete=models.CASCADE)
-    puntos_totales = models.IntegerField(default=0)
+    puntos_totales = models.IntegerField(default=0, db_index=True)
     
     # Campo nuevo para evitar repeticiones
     ejercicios_completados = models.ManyToManyField(Ejercicio, blank=True)
 
+    # Los mismos ids como bitmap (ver api/bitmap.py): es lo que se consulta
+    # al elegir ejercicio. Las señales lo mantienen sincronizado con el M2M.
+    completados_bitmap = models.BinaryField(default=b'', blank=True)
+
+    def __str__(self):
+        return f"{self.usuario.username} - {self.puntos_totales} pts"
+
+# --- LIBRO DE PUNTOS (ver api/puntos.py) ---
+class MovimientoPuntos(models.Model):
+    """
+    Una suma o resta de puntos. Solo se añaden filas: puntos_totales es la
+    suma de los movimientos del usuario y se puede reconstruir desde aquí.
+    """
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='movimientos_puntos')
+    delta = models.IntegerField()
+    motivo = models.CharField(max_length=50, blank=True, default='')
+    ejercicio = models.ForeignKey(Ejercicio, on_delete=models.SET_NULL, null=True, blank=True)
+    # Identificador que pone el cliente: si reenvía un lote que ya llegó,
+    # los movimientos repetidos se ignoran
+    clave = models.CharField(max_length=64, null=True, blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-creado']
+        indexes = [models.Index(fields=['usuario', 'creado'], name='movimiento_usuario_fecha')]
+        constraints = [
+            models.UniqueConstraint(fields=['usuario', 'clave'], name='movimiento_clave_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.usuario_id}: {self.delta:+d} ({self.motivo})"
+
+# --- REGISTROS DE APRENDIZAJE (LRS, ver api/lrs.py) ---
+class RegistroAprendizaje(models.Model):
+    """
+    Un intento de un alumno, al estilo de una sentencia xAPI: actor
+    (usuario), verbo, objeto (ejercicio y paso) y resultado (éxito, tiempo
+    y respuesta). Se escriben en lote desde el buffer de api/lrs.py.
+    """
+    VERBOS = [
+        ('RESPONDIDO', 'Respondido'),
+        ('COMPLETADO', 'Completado'),
+    ]
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='registros_aprendizaje')
+    verbo = models.CharField(max_length=20, choices=VERBOS, default='RESPONDIDO')
+    ejercicio = models.ForeignKey(Ejercicio, on_delete=models.SET_NULL, null=True, blank=True, related_name='registros_aprendizaje')
+    paso = models.CharField(max_length=20, blank=True, default='')  # número de paso o 'final'
+    exito = models.BooleanField(null=True)
+    tiempo_ms = models.PositiveIntegerField(null=True, blank=True)
+    respuesta = models.CharField(max_length=255, blank=True, default='')
+    momento = models.DateTimeField()  # cuando llegó, no cuando se escribió
+
+    class Meta:
+        ordering = ['-momento']
+        indexes = [
+            models.Index(fields=['usuario', 'momento'], name='registro_usuario_momento'),
+            models.Index(fields=['ejercicio', 'momento'], name='registro_ejercicio_momento'),
+        ]
+
+    def __str__(self):
+        return f"{self.usuario_id} {self.verbo} {self.ejercicio_id}/{self.paso}"
+
+# --- KNOWLEDGE TRACING (ver api/bkt.py y api/servicio_bkt.py) ---
+class ParametrosBKT(models.Model):
+    """Parámetros de BKT de una habilidad, tal como los dejó el último ajuste (ajustar_bkt)."""
+    habilidad = models.CharField(max_length=50, unique=True)
+    p_inicial = models.FloatField()
+    p_aprendizaje = models.FloatField()
+    p_desliz = models.FloatField()
+    p_adivinar = models.FloatField()
+    observaciones = models.PositiveIntegerField(default=0)
+    ajustado = models.DateTimeField(auto_now=True)
+
     def __str__(self):
-        return f"{self.usuario.username} - {self.puntos_totales} pts"
\ No newline at end of file
+        return self.habilidad
+
+# --- TRABAJOS EN SEGUNDO PLANO (ver api/trabajos.py) ---
+class Trabajo(models.Model):
+    ESTADOS = [
+        ('PENDIENTE', 'En cola'),
+        ('EN_CURSO', 'En curso'),
+        ('TERMINADO', 'Terminado'),
+        ('FALLIDO', 'Fallido'),
+    ]
+    tipo = models.CharField(max_length=50)
+    parametros = models.JSONField(default=dict, blank=True)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='PENDIENTE', db_index=True)
+    resultado = models.JSONField(default=dict, blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    iniciado = models.DateTimeField(null=True, blank=True)
+    terminado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-creado']
+
+    def __str__(self):
+        return f"{self.tipo} #{self.pk} ({self.estado})"
+
+class LineaTrabajo(models.Model):
+    """Una línea del log de un trabajo; se leen por `numero` para ir siguiendo el log."""
+    trabajo = models.ForeignKey(Trabajo, on_delete=models.CASCADE, related_name='lineas')
+    numero = models.PositiveIntegerField()
+    texto = models.TextField()
+
+    class Meta:
+        ordering = ['numero']
+        constraints = [models.UniqueConstraint(fields=['trabajo', 'numero'], name='linea_trabajo_unica')]
@@ -0,0 +1,611 @@
+# Nombre de archivo: api/motor_racional.py
+# Versión: MOTOR_RACIONAL_V1.0
+#
+# Motor de ecuaciones sin SymPy para ecuaciones de primer grado.
+# Trabaja con fractions.Fraction (aritmética exacta) y un árbol compacto de
+# nodos con __slots__. Soporta +, -, ·, ÷, paréntesis/corchetes/llaves,
+# \frac{}{} y multiplicación implícita (2x, 3(x-1)...), con una sola incógnita.
+# Lo que no soporta lo devuelve como None para que ecuaciones_core recurra
+# al motor SymPy.
+
+import re
+from fractions import Fraction
+
+# Límites para que una entrada patológica no dispare el coste
+MAX_EXPONENTE = 16
+MAX_BITS_NUMERO = 4096
+
+
+class NoSoportado(Exception):
+    """La expresión queda fuera de lo que cubre este motor."""
+
+
+# =================================================================
+# 1. TOKENIZADOR
+# =================================================================
+
+_REGEX_TOKEN = re.compile(r"\s*(?:(\d+(?:\.\d+)?)|([a-zA-Z])|(\\[a-zA-Z]+|\\.)|(\S))")
+
+# Comandos LaTeX que son operadores o que se ignoran sin más
+_COMANDOS_OPERADOR = {
+    r'\cdot': '*', r'\times': '*', r'\div': '/',
+}
+_COMANDOS_FRACCION = {r'\frac', r'\dfrac', r'\tfrac'}
+_COMANDOS_IGNORADOS = {
+    r'\left', r'\right', r'\big', r'\Big', r'\bigl', r'\bigr', r'\Bigl', r'\Bigr',
+    r'\[', r'\]', r'\,', r'\;', r'\:', r'\!', '\\ ',
+}
+_ABRE = {'(': ')', '{': '}', '[': ']'}
+_CARACTERES_OPERADOR = {'·': '*', '×': '*', '÷': '/', '−': '-'}
+
+def tokenizar(texto):
+    """Devuelve una lista de tokens (tipo, valor). Tipos: num, var, frac, op."""
+    tokens = []
+    pos = 0
+    n = len(texto)
+    while pos < n:
+        m = _REGEX_TOKEN.match(texto, pos)
+        if not m:
+            break
+        pos = m.end()
+        numero, letra, comando, simbolo = m.groups()
+        if numero is not None:
+            tokens.append(('num', Fraction(numero)))
+        elif letra is not None:
+            tokens.append(('var', letra))
+        elif comando is not None:
+            if comando in _COMANDOS_IGNORADOS:
+                continue
+            if comando in _COMANDOS_FRACCION:
+                tokens.append(('frac', comando))
+            elif comando in _COMANDOS_OPERADOR:
+                tokens.append(('op', _COMANDOS_OPERADOR[comando]))
+            else:
+                raise NoSoportado(f"Comando LaTeX no soportado: {comando}")
+        elif simbolo is not None:
+            simbolo = _CARACTERES_OPERADOR.get(simbolo, simbolo)
+            if simbolo in '+-*/^=()[]{}':
+                tokens.append(('op', simbolo))
+            elif simbolo != '$':
+                raise NoSoportado(f"Símbolo no soportado: {simbolo}")
+    return tokens
+
+
+# =================================================================
+# 2. ÁRBOL DE EXPRESIONES
+# =================================================================
+
+class Nodo:
+    __slots__ = ()
+
+    def hijos(self):
+        return ()
+
+    def contar_variable(self):
+        return sum(h.contar_variable() for h in self.hijos())
+
+    def contiene_suma(self):
+        return any(isinstance(h, Suma) or h.contiene_suma() for h in self.hijos())
+
+
+class Numero(Nodo):
+    __slots__ = ('valor',)
+
+    def __init__(self, valor):
+        self.valor = valor
+
+    def evaluar(self):
+        return Polinomio({0: self.valor} if self.valor else {})
+
+
+class Variable(Nodo):
+    __slots__ = ('nombre',)
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+
+    def contar_variable(self):
+        return 1
+
+    def evaluar(self):
+        return Polinomio({1: Fraction(1)})
+
+
+class Negativo(Nodo):
+    __slots__ = ('arg',)
+
+    def __init__(self, arg):
+        self.arg = arg
+
+    def hijos(self):
+        return (self.arg,)
+
+    def evaluar(self):
+        return -self.arg.evaluar()
+
+
+class Suma(Nodo):
+    __slots__ = ('terminos',)
+
+    def __init__(self, terminos):
+        self.terminos = terminos
+
+    def hijos(self):
+        return self.terminos
+
+    def evaluar(self):
+        total = Polinomio({})
+        for t in self.terminos:
+            total = total + t.evaluar()
+        return total
+
+
+class Producto(Nodo):
+    __slots__ = ('factores',)
+
+    def __init__(self, factores):
+        self.factores = factores
+
+    def hijos(self):
+        return self.factores
+
+    def evaluar(self):
+        total = Polinomio({0: Fraction(1)})
+        for f in self.factores:
+            total = total * f.evaluar()
+        return total
+
+
+class Cociente(Nodo):
+    __slots__ = ('num', 'den')
+
+    def __init__(self, num, den):
+        self.num = num
+        self.den = den
+
+    def hijos(self):
+        return (self.num, self.den)
+
+    def evaluar(self):
+        return self.num.evaluar() / self.den.evaluar()
+
+
+class Potencia(Nodo):
+    __slots__ = ('base', 'exp')
+
+    def __init__(self, base, exp):
+        self.base = base
+        self.exp = exp
+
+    def hijos(self):
+        return (self.base, self.exp)
+
+    def evaluar(self):
+        return self.base.evaluar() ** self.exp.evaluar()
+
+
+# =================================================================
+# 3. POLINOMIOS EN UNA INCÓGNITA
+# =================================================================
+
+class Polinomio:
+    """Polinomio en la incógnita: {grado: coeficiente Fraction}, sin ceros."""
+    __slots__ = ('coefs',)
+
+    def __init__(self, coefs):
+        self.coefs = coefs
+
+    @property
+    def grado(self):
+        return max(self.coefs) if self.coefs else 0
+
+    def coef(self, grado):
+        return self.coefs.get(grado, Fraction(0))
+
+    def constante(self):
+        """Devuelve el valor si el polinomio es constante, o None."""
+        if any(g != 0 for g in self.coefs):
+            return None
+        return self.coef(0)
+
+    def __neg__(self):
+        return Polinomio({g: -c for g, c in self.coefs.items()})
+
+    def __add__(self, otro):
+        coefs = dict(self.coefs)
+        for g, c in otro.coefs.items():
+            nuevo = coefs.get(g, 0) + c
+            if nuevo:
+                coefs[g] = nuevo
+            else:
+                coefs.pop(g, None)
+        return Polinomio(coefs)
+
+    def __sub__(self, otro):
+        return self + (-otro)
+
+    def __mul__(self, otro):
+        coefs = {}
+        for g1, c1 in self.coefs.items():
+            for g2, c2 in otro.coefs.items():
+                g = g1 + g2
+                if g > MAX_EXPONENTE:
+                    raise NoSoportado("Grado demasiado alto")
+                coefs[g] = coefs.get(g, 0) + c1 * c2
+        return Polinomio({g: c for g, c in coefs.items() if c})
+
+    def __truediv__(self, otro):
+        divisor = otro.constante()
+        if divisor is None:
+            raise NoSoportado("División entre una expresión con incógnita")
+        if divisor == 0:
+            raise NoSoportado("División entre cero")
+        return Polinomio({g: c / divisor for g, c in self.coefs.items()})
+
+    def __pow__(self, otro):
+        exp = otro.constante()
+        if exp is None or exp.denominator != 1 or abs(exp) > MAX_EXPONENTE:
+            raise NoSoportado("Exponente no soportado")
+        exp = int(exp)
+        if exp < 0:
+            return Polinomio({0: Fraction(1)}) / (self ** Polinomio({0: Fraction(-exp)}))
+        resultado = Polinomio({0: Fraction(1)})
+        for _ in range(exp):
+            resultado = resultado * self
+        for c in resultado.coefs.values():
+            if max(c.numerator.bit_length(), c.denominator.bit_length()) > MAX_BITS_NUMERO:
+                raise NoSoportado("Número demasiado grande")
+        return resultado
+
+
+# =================================================================
+# 4. PARSER (descenso recursivo)
+# =================================================================
+
+class _Parser:
+    __slots__ = ('tokens', 'pos', 'variable')
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+        self.variable = None
+
+    def _actual(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def _es_op(self, *ops):
+        tipo, valor = self._actual()
+        return tipo == 'op' and valor in ops
+
+    def _consumir_op(self, op):
+        if not self._es_op(op):
+            raise SyntaxError(f"Se esperaba '{op}'")
+        self.pos += 1
+
+    def parsear(self):
+        nodo = self._expresion()
+        if self.pos != len(self.tokens):
+            raise SyntaxError("Tokens sobrantes")
+        return nodo
+
+    def _expresion(self):
+        terminos = []
+        signo = '+'
+        if self._es_op('+', '-'):
+            signo = self._actual()[1]
+            self.pos += 1
+        while True:
+            termino = self._termino()
+            terminos.append(Negativo(termino) if signo == '-' else termino)
+            if not self._es_op('+', '-'):
+                break
+            signo = self._actual()[1]
+            self.pos += 1
+        return terminos[0] if len(terminos) == 1 else Suma(tuple(terminos))
+
+    def _empieza_atomo(self):
+        tipo, valor = self._actual()
+        return tipo in ('num', 'var', 'frac') or (tipo == 'op' and valor in _ABRE)
+
+    def _termino(self):
+        nodo = self._factor()
+        factores = []
+        while True:
+            if self._es_op('*'):
+                self.pos += 1
+                factores.append(self._factor())
+            elif self._es_op('/'):
+                self.pos += 1
+                divisor = self._factor()
+                nodo = Cociente(self._producto(nodo, factores), divisor)
+                factores = []
+            elif self._empieza_atomo():
+                # Multiplicación implícita: 2x, 3(x-1), x\frac{1}{2}...
+                factores.append(self._potencia())
+            else:
+                break
+        return self._producto(nodo, factores)
+
+    @staticmethod
+    def _producto(nodo, factores):
+        return Producto((nodo,) + tuple(factores)) if factores else nodo
+
+    def _factor(self):
+        if self._es_op('-'):
+            self.pos += 1
+            return Negativo(self._factor())
+        if self._es_op('+'):
+            self.pos += 1
+            return self._factor()
+        return self._potencia()
+
+    def _potencia(self):
+        base = self._atomo()
+        if self._es_op('^'):
+            self.pos += 1
+            return Potencia(base, self._factor())
+        return base
+
+    def _atomo(self):
+        tipo, valor = self._actual()
+        if tipo == 'num':
+            self.pos += 1
+            return Numero(valor)
+        if tipo == 'var':
+            if self.variable is None:
+                self.variable = valor
+            elif self.variable != valor:
+                raise NoSoportado("Más de una incógnita")
+            self.pos += 1
+            return Variable(valor)
+        if tipo == 'frac':
+            self.pos += 1
+            num = self._grupo()
+            den = self._grupo()
+            return Cociente(num, den)
+        if tipo == 'op' and valor in _ABRE:
+            return self._grupo()
+        raise SyntaxError("Expresión incompleta")
+
+    def _grupo(self):
+        tipo, valor = self._actual()
+        if tipo == 'op' and valor in _ABRE:
+            self.pos += 1
+            nodo = self._expresion()
+            self._consumir_op(_ABRE[valor])
+            return nodo
+        # \frac12 y similares: el argumento es un único token
+        return self._atomo()
+
+
+def _parsear_lado(texto):
+    parser = _Parser(tokenizar(texto))
+    return parser.parsear(), parser.variable
+
+
+# =================================================================
+# 5. ECUACIÓN Y API (misma forma que el motor SymPy)
+# =================================================================
+
+class EcuacionRacional:
+    __slots__ = ('lhs', 'rhs', 'variable', 'texto', 'lhs_poly', 'rhs_poly')
+
+    def __init__(self, lhs, rhs, variable, texto):
+        self.lhs = lhs
+        self.rhs = rhs
+        self.variable = variable
+        self.texto = texto
+        self.lhs_poly = lhs.evaluar()
+        self.rhs_poly = rhs.evaluar()
+
+    def __str__(self):
+        return f"{latex_polinomio(self.lhs_poly, self.variable)} = {latex_polinomio(self.rhs_poly, self.variable)}"
+
+
+def crear_ecuacion(texto: str):
+    """
+    Parsea una ecuación (ya normalizada). Igual que el motor SymPy, descarta
+    palabras iniciales del lado izquierdo que no sean matemáticas (ej: "3a)").
+    Devuelve None si no se puede representar con este motor.
+    """
+    if '=' not in texto:
+        return None
+    lhs_str, rhs_str = texto.split('=', 1)
+    try:
+        rhs, var_rhs = _parsear_lado(rhs_str)
+    except (SyntaxError, NoSoportado, ZeroDivisionError):
+        return None
+
+    parts = lhs_str.split()
+    for i in range(len(parts)):
+        try:
+            lhs, var_lhs = _parsear_lado(" ".join(parts[i:]))
+        except (SyntaxError, NoSoportado, ZeroDivisionError):
+            continue
+        if var_lhs and var_rhs and var_lhs != var_rhs:
+            return None
+        try:
+            return EcuacionRacional(lhs, rhs, var_lhs or var_rhs, texto)
+        except (NoSoportado, ZeroDivisionError):
+            return None
+    return None
+
+
+def contar_incognita(eq_obj) -> int:
+    return eq_obj.lhs.contar_variable() + eq_obj.rhs.contar_variable()
+
+
+def _latex_fraccion(valor: Fraction, variable=None) -> str:
+    """LaTeX de un término c·variable (o de la constante c) sin signo."""
+    valor = abs(valor)
+    if variable is None:
+        if valor.denominator == 1:
+            return str(valor.numerator)
+        return f"\\frac{{{valor.numerator}}}{{{valor.denominator}}}"
+    num = variable if valor.numerator == 1 else f"{valor.numerator} {variable}"
+    if valor.denominator == 1:
+        return num
+    return f"\\frac{{{num}}}{{{valor.denominator}}}"
+
+
+def latex_numero(valor: Fraction) -> str:
+    """Como sympy.latex de un Rational: '-5', '- \\frac{9}{4}'."""
+    if valor.denominator == 1:
+        return str(valor.numerator)
+    return f"{'- ' if valor < 0 else ''}{_latex_fraccion(valor)}"
+
+
+def latex_polinomio(poly: Polinomio, variable) -> str:
+    """
+    LaTeX de un polinomio de grado <= 1 con el mismo formato que sympy.latex:
+    primero la incógnita, salvo que sea negativa y la constante positiva.
+    """
+    variable = variable or 'x'
+    a = poly.coef(1)
+    b = poly.coef(0)
+    terminos = []
+    if a:
+        terminos.append((a, variable))
+    if b:
+        terminos.append((b, None))
+    if not terminos:
+        return "0"
+    if terminos == [(b, None)]:
+        return latex_numero(b)
+    if len(terminos) == 2 and a < 0 < b:
+        terminos.reverse()
+
+    partes = []
+    for i, (coef, var) in enumerate(terminos):
+        texto = _latex_fraccion(coef, var)
+        if i == 0:
+            partes.append(f"- {texto}" if coef < 0 else texto)
+        else:
+            partes.append(f"{'-' if coef < 0 else '+'} {texto}")
+    return " ".join(partes)
+
+
+def conjunto_solucion(eq_obj):
+    """
+    Soluciones de una ecuación de primer grado: ('unica', Fraction),
+    ('todas',) o ('ninguna',). None si es de grado mayor.
+    """
+    diferencia = eq_obj.lhs_poly - eq_obj.rhs_poly
+    if diferencia.grado > 1:
+        return None
+    a, b = diferencia.coef(1), diferencia.coef(0)
+    if a != 0:
+        return ('unica', -b / a)
+    return ('todas',) if b == 0 else ('ninguna',)
+
+
+def solve_equation_step_by_step(eq_obj):
+    """
+    Mismo formato de salida y misma solución que el motor SymPy; los pasos
+    pueden diferir: el paso de expandir solo se emite si hay paréntesis o
+    términos que agrupar, y cada lado se escribe ya reducido (9 x - 2 donde
+    SymPy da - 4 x + 6 x + 5...). Devuelve None si la ecuación no es de
+    primer grado, para que el llamador recurra a SymPy.
+    """
+    if eq_obj.lhs_poly.grado > 1 or eq_obj.rhs_poly.grado > 1:
+        return None
+
+    variable = eq_obj.variable or 'x'
+    pasos = []
+
+    necesita_expandir = False
+    for nodo, poly in ((eq_obj.lhs, eq_obj.lhs_poly), (eq_obj.rhs, eq_obj.rhs_poly)):
+        terminos = nodo.terminos if isinstance(nodo, Suma) else (nodo,)
+        if nodo.contiene_suma() or len(terminos) != max(1, len(poly.coefs)):
+            necesita_expandir = True
+
+    if necesita_expandir:
+        pasos.append({
+            "paso": 1,
+            "descripcion": "Eliminamos paréntesis y expandimos términos.",
+            "ecuacion": f"{latex_polinomio(eq_obj.lhs_poly, variable)} = {latex_polinomio(eq_obj.rhs_poly, variable)}"
+        })
+
+    a, b = eq_obj.lhs_poly.coef(1), eq_obj.lhs_poly.coef(0)
+    c, d = eq_obj.rhs_poly.coef(1), eq_obj.rhs_poly.coef(0)
+
+    if a != c:
+        val = (d - b) / (a - c)
+        solucion_final = str(val)
+        pasos.append({
+            "paso": 2,
+            "descripcion": "Solución obtenida.",
+            "ecuacion": f"{variable} = {latex_numero(val)}"
+        })
+    elif b == d:
+        solucion_final = "Infinitas soluciones"
+        pasos.append({"paso": 2, "descripcion": "Identidad (Infinitas soluciones).", "ecuacion": "0 = 0"})
+    else:
+        solucion_final = "Sin solución"
+        pasos.append({"paso": 2, "descripcion": "La ecuación no tiene solución.", "ecuacion": "\\emptyset"})
+
+    return pasos, solucion_final
+
+
+# =================================================================
+# 6. FORMA CANÓNICA
+# =================================================================
+# Texto que identifica una ecuación salvo diferencias de escritura: orden de
+# los sumandos y de los factores, coeficientes numéricos reducidos (2·3x,
+# \frac{x}{2}, 0.5x y x/2 dan lo mismo), nombre de la incógnita (siempre x)
+# y qué lado va a cada lado del '='. No se desarrolla nada: 2(x+1) y 2x+2
+# son ejercicios distintos.
+
+def _monomio(nodo):
+    """(coeficiente, factores no numéricos ordenados) de un nodo."""
+    if isinstance(nodo, Numero):
+        return nodo.valor, ()
+    if isinstance(nodo, Variable):
+        return Fraction(1), ('x',)
+    if isinstance(nodo, Negativo):
+        coef, factores = _monomio(nodo.arg)
+        return -coef, factores
+    if isinstance(nodo, Producto):
+        coef, factores = Fraction(1), []
+        for f in nodo.factores:
+            c, fs = _monomio(f)
+            coef *= c
+            factores.extend(fs)
+        return coef, tuple(sorted(factores))
+    if isinstance(nodo, Cociente):
+        coef, factores = _monomio(nodo.num)
+        c_den, f_den = _monomio(nodo.den)
+        if not f_den and c_den:
+            return coef / c_den, factores
+        return coef, tuple(sorted(factores + (f"/{_como_factor(nodo.den)}",)))
+    if isinstance(nodo, Potencia):
+        return Fraction(1), (f"{_como_factor(nodo.base)}^{_como_factor(nodo.exp)}",)
+    # Suma entre paréntesis dentro de un término
+    return Fraction(1), (f"({_canonica(nodo)})",)
+
+
+def _texto_monomio(coef, factores):
+    if not factores:
+        return str(coef)
+    producto = '*'.join(factores)
+    if coef == 1:
+        return producto
+    if coef == -1:
+        return f'-{producto}'
+    return f'{coef}*{producto}'
+
+
+def _como_factor(nodo):
+    texto = _canonica(nodo)
+    return texto if texto.isalnum() else f'({texto})'
+
+
+def _canonica(nodo):
+    if isinstance(nodo, Suma):
+        return ' + '.join(sorted(_texto_monomio(*_monomio(t)) for t in nodo.terminos))
+    return _texto_monomio(*_monomio(nodo))
+
+
+def forma_canonica(eq_obj) -> str:
+    """Forma canónica de una EcuacionRacional (ver arriba)."""
+    return ' = '.join(sorted((_canonica(eq_obj.lhs), _canonica(eq_obj.rhs))))
@@ -0,0 +1,200 @@
+# Nombre de archivo: tfg_backend/api/motor_sympy.py
+# Versión: LOCAL_REPLICA_FINAL
+#
+# Motor SymPy: fallback del motor racional y oráculo de referencia.
+# Solo se importa cuando hace falta (ver ecuaciones_core).
+
+import sympy
+import re
+from fractions import Fraction
+from sympy import symbols, Eq, expand, solve
+from sympy.parsing.sympy_parser import parse_expr, standard_transformations, implicit_multiplication_application
+from . import instrumentacion, render_latex
+
+# Definimos 'x' como fallback, pero el sistema detectará la real
+x = symbols('x')
+
+def crear_ecuacion(equation_str: str):
+    """
+    Replica exacta de la lógica local de limpieza y parseo.
+    Soporta fracciones LaTeX y multiplicación implícita.
+    """
+    try:
+        # 1. Limpieza de ruido LaTeX
+        s = equation_str.strip()
+        s = s.replace(r'\[', '').replace(r'\]', '')
+        s = s.replace(r'\left', '').replace(r'\right', '')
+        
+        # Conversión robusta de fracciones
+        for _ in range(3):
+            s = re.sub(r'\\frac\s*\{(.*?)\}\s*\{(.*?)\}', r'(\1)/(\2)', s)
+            
+        s = s.replace('{', '(').replace('}', ')')
+        s = s.replace('[', '(').replace(']', ')')
+        s = s.replace('\\', '') # Limpieza final de backslashes
+
+        if '=' not in s: return None
+        
+        lhs_str, rhs_str = s.split('=', 1)
+
+        # 2. Parseo inteligente (detecta 2x como 2*x)
+        transformations = (standard_transformations + (implicit_multiplication_application,))
+        
+        # Estrategia iterativa para limpiar enunciados (ej: "3a)")
+        parts = lhs_str.split()
+        lhs_expr = None
+        for i in range(len(parts)):
+            candidate = " ".join(parts[i:])
+            try:
+                lhs_expr = parse_expr(candidate, transformations=transformations, evaluate=False)
+                break 
+            except Exception: continue
+        
+        if lhs_expr is None: return None 
+        
+        rhs_expr = parse_expr(rhs_str, transformations=transformations, evaluate=False)
+
+        return Eq(lhs_expr, rhs_expr, evaluate=False)
+
+    except Exception as e:
+        print(f"Advertencia: No se pudo parsear '{equation_str}': {e}")
+        return None
+
+def _a_fraccion(valor):
+    # Los racionales como Fraction, para compararlos con los del motor racional
+    if valor.is_Rational:
+        return Fraction(int(valor.p), int(valor.q))
+    return valor
+
+def conjunto_solucion(equation_str: str):
+    """
+    (variable, soluciones) con el formato de ecuaciones_core.conjunto_solucion,
+    para lo que el motor racional no cubre. Varias soluciones se devuelven como
+    ('varias', frozenset). None si no se puede parsear, hay más de una
+    incógnita o SymPy no sabe resolverla.
+    """
+    # Sin convert_xor, crear_ecuacion leería x^2 como un XOR
+    eq_obj = crear_ecuacion(equation_str.replace('^', '**'))
+    if eq_obj is None:
+        return None
+    try:
+        diferencia = sympy.simplify(eq_obj.lhs - eq_obj.rhs)
+        simbolos = diferencia.free_symbols
+        if len(simbolos) > 1:
+            return None
+        if not simbolos:
+            return (None, ('todas',) if diferencia == 0 else ('ninguna',))
+        variable = simbolos.pop()
+        soluciones = [_a_fraccion(v) for v in solve(diferencia, variable)]
+    except Exception:
+        return None
+    if not soluciones:
+        return (str(variable), ('ninguna',))
+    if len(soluciones) == 1:
+        return (str(variable), ('unica', soluciones[0]))
+    return (str(variable), ('varias', frozenset(soluciones)))
+
+def contar_incognita(eq_obj) -> int:
+    """
+    Detecta dinámicamente la variable usada (m, x, y, etc.)
+    para contar correctamente sus apariciones.
+    """
+    mis_simbolos = eq_obj.free_symbols
+    if not mis_simbolos:
+        return 0
+    # Toma la primera variable que encuentre en la ecuación (ej: 'm')
+    variable_real = list(mis_simbolos)[0]
+    return eq_obj.lhs.count(variable_real) + eq_obj.rhs.count(variable_real)
+
+# --- RESOLUCIÓN: VÍA RÁPIDA LINEAL ---
+# Todas las ecuaciones de los Modelos son de primer grado en una incógnita.
+# Para ellas basta con extraer a·x + b = c·x + d y operar con racionales
+# exactos; sympy.solve solo se usa para lo que no sea lineal.
+def _coeficientes_lineales(expr, var):
+    """
+    Devuelve (a, b) tales que expr == a*var + b, con a y b racionales.
+    Si expr no es lineal en var (u tiene otros símbolos), devuelve None.
+    """
+    a = sympy.Integer(0)
+    b = sympy.Integer(0)
+    for monomio, coef in expr.as_coefficients_dict().items():
+        if not coef.is_Rational:
+            return None
+        if monomio == 1:
+            b += coef
+        elif monomio == var:
+            a += coef
+        else:
+            return None
+    return a, b
+
+def _resolver_lineal(lhs_expand, rhs_expand, var):
+    """
+    Resuelve a·x + b = c·x + d. Devuelve la lista de soluciones con el mismo
+    formato que sympy.solve, o "Infinitas soluciones" si es una identidad.
+    Devuelve None si la ecuación no es lineal.
+    """
+    izq = _coeficientes_lineales(lhs_expand, var)
+    der = _coeficientes_lineales(rhs_expand, var)
+    if izq is None or der is None:
+        return None
+    a, b = izq
+    c, d = der
+    if a != c:
+        return [(d - b) / (a - c)]
+    if b == d:
+        return "Infinitas soluciones"
+    return []
+
+def solve_equation_step_by_step(eq_obj):
+    pasos = []
+    try:
+        # Detectar variable para resolver (no asumir siempre x)
+        mis_simbolos = eq_obj.free_symbols
+        var_a_resolver = list(mis_simbolos)[0] if mis_simbolos else x
+
+        lhs_expand = expand(eq_obj.lhs)
+        rhs_expand = expand(eq_obj.rhs)
+        
+        # Comparación como string para evitar errores booleanos de SymPy
+        eq_original_str = str(eq_obj.lhs) + "=" + str(eq_obj.rhs)
+        eq_expandida_str = str(lhs_expand) + "=" + str(rhs_expand)
+
+        if eq_original_str != eq_expandida_str:
+            pasos.append({
+                "paso": 1, 
+                "descripcion": "Eliminamos paréntesis y expandimos términos.",
+                "ecuacion": f"{render_latex.latex_sympy(lhs_expand)} = {render_latex.latex_sympy(rhs_expand)}"
+            })
+
+        solucion = _resolver_lineal(lhs_expand, rhs_expand, var_a_resolver)
+        if solucion is not None:
+            instrumentacion.contar('resolucion', 'lineal')
+        else:
+            instrumentacion.contar('resolucion', 'general')
+            solucion = solve(eq_obj, var_a_resolver)
+        
+        solucion_final = ""
+        if solucion == "Infinitas soluciones":
+            solucion_final = "Infinitas soluciones"
+            pasos.append({"paso": 2, "descripcion": "Identidad (Infinitas soluciones).", "ecuacion": "0 = 0"})
+        elif not solucion:
+            solucion_final = "Sin solución"
+            pasos.append({"paso": 2, "descripcion": "La ecuación no tiene solución.", "ecuacion": "\\emptyset"})
+        elif len(solucion) == 1:
+            val = solucion[0]
+            solucion_final = str(val)
+            pasos.append({
+                "paso": 2, 
+                "descripcion": "Solución obtenida.",
+                "ecuacion": f"{var_a_resolver} = {render_latex.latex_sympy(val)}"
+            })
+        else:
+            solucion_final = "Infinitas soluciones"
+            pasos.append({"paso": 2, "descripcion": "Identidad (Infinitas soluciones).", "ecuacion": "0 = 0"})
+
+        return pasos, solucion_final
+
+    except Exception as e:
+        print(f"Error resolviendo: {e}")
+        return [], None
\ No newline at end of file
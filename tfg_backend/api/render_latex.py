@@ -0,0 +1,83 @@
+# Nombre de archivo: api/render_latex.py
+# Versión: RENDER_LATEX_V1.0
+#
+# LaTeX de los pasos y soluciones con memoria. Las ecuaciones se repiten
+# mucho (el mismo ejercicio, los mismos sumandos 2x, \frac{3}{4}...) y el
+# printer de SymPy es de lo más lento de la resolución, así que lo ya
+# impreso se guarda en una CacheLRU ('latex' en /api/estadisticas-motor/)
+# con la propia expresión SymPy como clave (inmutable y con igualdad
+# estructural).
+# Se guarda cada subexpresión que pasa por el printer, así una expresión
+# nueva reutiliza las partes que ya se habían impreso.
+# El motor racional no pasa por aquí: su latex_polinomio cuesta menos que
+# una consulta a la caché.
+# Los ejercicios del catálogo se resuelven al importar y los pasos ya se
+# guardan en LaTeX (pasos_generados), así que servirlos no pasa por aquí.
+
+import threading
+from contextlib import contextmanager
+from . import instrumentacion
+from .cache_lru import CacheLRU
+
+TAMANO_CACHE_LATEX = 4096
+_cache = CacheLRU(TAMANO_CACHE_LATEX)
+instrumentacion.registrar_cache('latex', _cache)
+
+# El printer guarda estado mientras imprime: uno por hilo
+_local = threading.local()
+
+
+def invalidar():
+    _cache.invalidar()
+
+
+@contextmanager
+def sin_cache():
+    """
+    Imprime sin consultar ni llenar la caché en este hilo (p. ej. al generar
+    ecuaciones aleatorias, que no se van a volver a pedir).
+    """
+    anterior = getattr(_local, 'sin_cache', False)
+    _local.sin_cache = True
+    try:
+        yield
+    finally:
+        _local.sin_cache = anterior
+
+
+def estadisticas() -> dict:
+    return _cache.estadisticas()
+
+
+def _crear_printer():
+    # SymPy solo se importa cuando hay que imprimir una expresión suya
+    from sympy import Basic
+    from sympy.printing.latex import LatexPrinter
+
+    class _LatexPrinterMemo(LatexPrinter):
+        """LatexPrinter que consulta la caché para cada subexpresión."""
+
+        def _print(self, expr, **kwargs):
+            # Con argumentos (exp=...) la salida depende de quién la imprime
+            if kwargs or not isinstance(expr, Basic):
+                return super()._print(expr, **kwargs)
+            clave = ('sympy', expr)
+            texto = _cache.obtener(clave, None)
+            if texto is None:
+                texto = super()._print(expr)
+                _cache.guardar(clave, texto)
+            return texto
+
+    return _LatexPrinterMemo()
+
+
+def latex_sympy(expr) -> str:
+    """Igual que sympy.latex(expr) con los ajustes por defecto."""
+    if getattr(_local, 'sin_cache', False):
+        import sympy
+        return sympy.latex(expr)
+    printer = getattr(_local, 'printer', None)
+    if printer is None:
+        printer = _local.printer = _crear_printer()
+    return printer.doprint(expr)
+
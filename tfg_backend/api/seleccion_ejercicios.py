@@ -0,0 +1,73 @@
+# Nombre de archivo: api/seleccion_ejercicios.py
+# Versión: SELECCION_O1_V1.0
+#
+# Selección aleatoria de un ejercicio no completado sin cargar el catálogo.
+# Se guarda en memoria, por tipo, un array compacto con los ids (se refresca
+# cada SELECCION_TTL_IDS segundos o al importar). Para elegir se prueban ids
+# al azar contra el conjunto de completados del usuario; solo si casi todo
+# está completado se recorre el array para quedarse con los libres.
+
+import random
+import threading
+import time
+from array import array
+import numpy as np
+from django.conf import settings
+from . import bitmap
+from .models import Ejercicio
+
+# Intentos al azar antes de recorrer el array entero
+INTENTOS_ALEATORIOS = 16
+
+_ids_por_tipo = {}
+_lock = threading.Lock()
+
+def invalidar_ids():
+    """Gancho para descartar los arrays de ids tras cambiar el catálogo."""
+    with _lock:
+        _ids_por_tipo.clear()
+
+def ids_por_tipo(tipo: str) -> array:
+    ttl = getattr(settings, 'SELECCION_TTL_IDS', 60)
+    ahora = time.monotonic()
+    with _lock:
+        entrada = _ids_por_tipo.get(tipo)
+    if entrada is not None and ahora - entrada[0] < ttl:
+        return entrada[1]
+
+    ids = array('q', Ejercicio.objects.filter(tipo=tipo).order_by('id').values_list('id', flat=True))
+    with _lock:
+        _ids_por_tipo[tipo] = (ahora, ids)
+    return ids
+
+def elegir_id(tipo: str, completados, rng=random):
+    """
+    Id aleatorio (uniforme) de un ejercicio de `tipo` que no esté en
+    `completados` (cualquier objeto que soporte `in`), o None si no queda ninguno.
+    """
+    ids = ids_por_tipo(tipo)
+    if not ids:
+        return None
+    for _ in range(INTENTOS_ALEATORIOS):
+        candidato = ids[rng.randrange(len(ids))]
+        if candidato not in completados:
+            return candidato
+    if isinstance(completados, bitmap.BitmapCompletados):
+        ids = np.frombuffer(ids, dtype=np.int64)
+        libres = ids[~bitmap.contiene_array(completados.datos, ids)]
+        return int(rng.choice(libres)) if len(libres) else None
+    libres = [i for i in ids if i not in completados]
+    return rng.choice(libres) if libres else None
+
+def elegir_ejercicio(tipo: str, completados, rng=random):
+    """Como elegir_id, pero devuelve el Ejercicio (con su modelo) o None."""
+    for _ in range(2):
+        ejercicio_id = elegir_id(tipo, completados, rng)
+        if ejercicio_id is None:
+            return None
+        ejercicio = Ejercicio.objects.select_related('modelo').filter(id=ejercicio_id).first()
+        if ejercicio is not None:
+            return ejercicio
+        # El array estaba desactualizado (ejercicio borrado): se recarga
+        invalidar_ids()
+    return None
@@ -0,0 +1,189 @@
+# Nombre de archivo: api/servicio_bkt.py
+# Versión: SERVICIO_BKT_V1.0
+#
+# Une api/bkt.py con la BD. El dominio de los alumnos vive en memoria (un
+# ModeloBKT por proceso): se construye reproduciendo el historial de
+# RegistroAprendizaje con los parámetros guardados en ParametrosBKT, se
+# actualiza con cada intento que llega a este proceso y se reconstruye cada
+# BKT_TTL_RECARGA segundos para recoger los de otros workers (como el ranking),
+# en un hilo aparte y sirviendo el anterior mientras tanto.
+
+import threading
+import time
+import numpy as np
+from django.conf import settings
+from django.db import connection
+from . import bkt
+from .models import Ejercicio, ParametrosBKT, RegistroAprendizaje
+
+_modelo = None
+_cargado_en = None
+_mascaras = None        # ejercicio_id -> máscara de habilidades
+_recargando = False     # hay un hilo reconstruyendo el modelo
+_lock = threading.Lock()         # escrituras en la matriz del modelo
+_carga_lock = threading.Lock()
+
+
+def invalidar():
+    """Gancho para reconstruir el modelo tras cambiar el catálogo o los parámetros."""
+    global _cargado_en, _mascaras
+    _cargado_en = None
+    _mascaras = None
+
+
+def mascaras_ejercicios() -> dict:
+    """
+    ejercicio_id -> máscara de bits de sus habilidades: las de su
+    clasificación (caracteristicas) o, si no la tiene, las de su modelo.
+    """
+    global _mascaras
+    mascaras = _mascaras
+    if mascaras is None:
+        mascaras = {}
+        campos = [f'modelo__{nombre}' for nombre in bkt.HABILIDADES]
+        for ejercicio_id, caracteristicas, *indicadores in Ejercicio.objects.values_list('id', 'caracteristicas', *campos):
+            mascaras[ejercicio_id] = bkt.mascara(caracteristicas or dict(zip(bkt.HABILIDADES, indicadores)))
+        _mascaras = mascaras
+    return mascaras
+
+
+def cargar_parametros() -> bkt.Parametros:
+    guardados = {p.habilidad: p for p in ParametrosBKT.objects.all()}
+    valores = {campo: [] for campo in bkt.Parametros.__slots__}
+    for nombre in bkt.HABILIDADES:
+        fila = guardados.get(nombre)
+        for campo in bkt.Parametros.__slots__:
+            valores[campo].append(getattr(fila, f'p_{campo}') if fila else bkt.PARAMETROS_POR_DEFECTO[campo])
+    return bkt.Parametros(**valores)
+
+
+def historial():
+    """
+    (usuarios, máscaras, correctos) de los intentos respondidos, como arrays
+    y en orden cronológico por alumno (lo que usa el índice usuario+momento).
+    """
+    mascaras = mascaras_ejercicios()
+    usuarios, lista_mascaras, correctos = [], [], []
+    filas = RegistroAprendizaje.objects.filter(
+        verbo='RESPONDIDO', exito__isnull=False, ejercicio__isnull=False,
+    ).order_by('usuario_id', 'momento', 'id').values_list('usuario_id', 'ejercicio_id', 'exito')
+    for usuario_id, ejercicio_id, exito in filas.iterator(chunk_size=10000):
+        mascara = mascaras.get(ejercicio_id)
+        if mascara:
+            usuarios.append(usuario_id)
+            lista_mascaras.append(mascara)
+            correctos.append(exito)
+    return (np.array(usuarios, dtype=np.int64), np.array(lista_mascaras, dtype=np.int64),
+            np.array(correctos, dtype=bool))
+
+
+def _construir():
+    global _modelo, _cargado_en
+    modelo = bkt.ModeloBKT(cargar_parametros())
+    modelo.actualizar_lote(*historial())
+    with _lock:
+        _modelo = modelo
+        _cargado_en = time.monotonic()
+
+
+def _recargar_en_segundo_plano():
+    global _recargando
+    try:
+        _construir()
+    except Exception as e:
+        # Se sigue con la matriz anterior; la próxima consulta lo reintenta
+        print(f"AVISO: no se pudo recargar el modelo BKT: {e}")
+    finally:
+        _recargando = False
+        connection.close()
+
+
+def obtener_modelo() -> bkt.ModeloBKT:
+    """
+    Devuelve el modelo. La primera vez se construye aquí; después, cuando
+    caduca (BKT_TTL_RECARGA) o se invalida, se reconstruye en un hilo y
+    mientras tanto se sigue sirviendo el anterior: reproducir el historial
+    crece con la tabla del LRS y no debe pagarlo la petición que llega.
+    Los intentos que llegan durante la reconstrucción y aún no estaban en
+    la BD al leer el historial se pierden hasta la siguiente recarga.
+    """
+    global _recargando
+    if _modelo is None:
+        with _carga_lock:
+            if _modelo is None:
+                _construir()
+        return _modelo
+    cargado_en = _cargado_en
+    ttl = getattr(settings, 'BKT_TTL_RECARGA', 300)
+    if cargado_en is None or time.monotonic() - cargado_en >= ttl:
+        with _carga_lock:
+            if not _recargando and _cargado_en is cargado_en:
+                _recargando = True
+                threading.Thread(target=_recargar_en_segundo_plano, name='bkt', daemon=True).start()
+    return _modelo
+
+
+def registrar_intentos(registros):
+    """
+    Gancho para las vistas que reciben intentos (RegistroAprendizaje sin
+    guardar). Solo actúa si el modelo ya está cargado en este proceso: si
+    no, la próxima carga los leerá de la BD.
+    """
+    if _modelo is None:
+        return
+    mascaras = mascaras_ejercicios()
+    intentos = [
+        (r.usuario_id, mascaras.get(r.ejercicio_id, 0), r.exito) for r in registros
+        if r.verbo == 'RESPONDIDO' and r.exito is not None
+    ]
+    intentos = [i for i in intentos if i[1]]
+    if not intentos:
+        return
+    with _lock:
+        if len(intentos) == 1:
+            _modelo.actualizar(*intentos[0])
+        else:
+            _modelo.actualizar_lote(*zip(*intentos))
+
+
+def dominio(usuario_id) -> dict:
+    """P(dominada) por habilidad del alumno."""
+    modelo = obtener_modelo()
+    with _lock:
+        vector = modelo.vector(usuario_id)
+    return {nombre: round(float(p), 4) for nombre, p in zip(bkt.HABILIDADES, vector)}
+
+
+def estado_alumno(usuario_id):
+    """(vector de dominio, parámetros) del alumno, para el recomendador."""
+    modelo = obtener_modelo()
+    with _lock:
+        return modelo.vector(usuario_id), modelo.parametros
+
+
+def update_bkt_model(student_id, skill, es_correcto) -> float:
+    """Actualiza una sola habilidad (nombre de bkt.HABILIDADES). Devuelve P(dominada)."""
+    k = bkt.HABILIDADES.index(skill)
+    modelo = obtener_modelo()
+    with _lock:
+        return modelo.actualizar_habilidad(student_id, k, es_correcto)
+
+
+def ajustar(iteraciones=20):
+    """
+    Reajusta por EM los parámetros de cada habilidad con todo el historial,
+    partiendo de los actuales, y los guarda. Devuelve (Parametros,
+    log-verosimilitud por iteración, observaciones por habilidad).
+    """
+    parametros, log_verosimilitud, observaciones = bkt.ajustar_em(
+        *historial(), parametros=cargar_parametros(), iteraciones=iteraciones)
+    for k, nombre in enumerate(bkt.HABILIDADES):
+        ParametrosBKT.objects.update_or_create(habilidad=nombre, defaults={
+            'p_inicial': float(parametros.inicial[k]),
+            'p_aprendizaje': float(parametros.aprendizaje[k]),
+            'p_desliz': float(parametros.desliz[k]),
+            'p_adivinar': float(parametros.adivinar[k]),
+            'observaciones': int(observaciones[k]),
+        })
+    invalidar()
+    return parametros, log_verosimilitud, observaciones
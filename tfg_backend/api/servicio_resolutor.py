@@ -0,0 +1,252 @@
+# Nombre de archivo: api/servicio_resolutor.py
+# Versión: POOL_RESOLUTOR_V1.0
+#
+# Pool de procesos "calientes" que parsean y resuelven ecuaciones fuera del
+# worker de gunicorn. Cada trabajo tiene un tiempo máximo: si se pasa, el
+# proceso se mata y se sustituye, de modo que una entrada patológica
+# (anidamientos enormes, exponentes gigantes...) no bloquea a nadie más.
+#
+# Ajustes (settings.py):
+#   RESOLUTOR_PROCESOS      nº de procesos (0 = resolver en el propio proceso)
+#   RESOLUTOR_TIMEOUT       segundos máximos por trabajo
+#   RESOLUTOR_MAX_COLA      peticiones que pueden esperar a un proceso libre
+#   RESOLUTOR_MAX_TRABAJOS  trabajos tras los que se recicla un proceso
+#
+# Los procesos no se crean con fork: el proceso web tiene hilos (buffer del
+# LRS, trabajos, recarga del BKT) y un hijo copiado mientras otro hilo tiene
+# un lock (el de una CacheLRU, por ejemplo) se quedaría bloqueado para
+# siempre. Como los procesos se sustituyen en cualquier momento (tiempo
+# agotado, reciclado), tampoco basta con crearlos antes que los hilos: se
+# usa forkserver, que copia de un proceso limpio con los motores ya
+# importados, o spawn donde no existe (Windows).
+
+import atexit
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from . import ecuaciones_core, instrumentacion
+
+
+class ErrorResolutor(Exception):
+    """Error del servicio con su código HTTP y un código legible por el frontend."""
+    estado_http = 503
+    codigo = 'error_resolutor'
+
+
+class TiempoAgotado(ErrorResolutor):
+    estado_http = 422
+    codigo = 'tiempo_agotado'
+
+
+class ServicioSaturado(ErrorResolutor):
+    estado_http = 503
+    codigo = 'servicio_saturado'
+
+
+class TrabajadorCaido(ErrorResolutor):
+    estado_http = 503
+    codigo = 'trabajador_caido'
+
+
+def resolver_ecuacion(equation_str: str) -> dict:
+    """Parseo + resolución. Es lo que se ejecuta dentro de cada proceso."""
+    eq = ecuaciones_core.limpiar_y_crear_ecuacion(equation_str)
+    if eq is None:
+        return {'error': 'Error parseo'}
+    pasos, solucion = ecuaciones_core.solve_equation_step_by_step(eq)
+    return {'pasos': pasos, 'solucion': solucion}
+
+
+def _bucle_trabajador(conn):
+    while True:
+        try:
+            tarea = conn.recv()
+        except (EOFError, OSError):
+            break
+        if tarea is None:
+            break
+        try:
+            resultado = resolver_ecuacion(tarea)
+        except Exception as e:
+            resultado = {'error': str(e)}
+        # Las cachés del proceso (parseo, LaTeX) viajan con cada respuesta
+        # para que /api/estadisticas-motor/ las vea desde el proceso web
+        conn.send((resultado, instrumentacion.estadisticas_caches()))
+
+
+def _contexto():
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    ctx = multiprocessing.get_context('forkserver')
+    # Importados una vez en el servidor, no en cada proceso nuevo
+    ctx.set_forkserver_preload(['api.servicio_resolutor', 'api.motor_sympy'])
+    return ctx
+
+
+class _Trabajador:
+    __slots__ = ('proceso', 'conn', 'trabajos', 'caches')
+
+    def __init__(self, ctx):
+        self.conn, conn_hijo = ctx.Pipe()
+        self.proceso = ctx.Process(target=_bucle_trabajador, args=(conn_hijo,), daemon=True)
+        self.proceso.start()
+        conn_hijo.close()
+        self.trabajos = 0
+        self.caches = {}
+
+    def detener(self, forzar=False):
+        if not forzar:
+            try:
+                self.conn.send(None)
+                self.proceso.join(timeout=1)
+            except (OSError, ValueError):
+                pass
+        if self.proceso.is_alive():
+            self.proceso.kill()
+            self.proceso.join(timeout=1)
+        self.conn.close()
+
+
+class PoolResolutor:
+
+    def __init__(self, num_procesos, timeout, max_cola, max_trabajos):
+        self.timeout = timeout
+        self.max_trabajos = max_trabajos
+        self._ctx = _contexto()
+        self._libres = queue.Queue()
+        # Cupo total = procesos ocupados + peticiones esperando en cola
+        self._cupo = threading.BoundedSemaphore(num_procesos + max_cola)
+        self._trabajadores = set()
+        self._lock = threading.Lock()
+        for _ in range(num_procesos):
+            self._libres.put(self._nuevo_trabajador())
+
+    def _nuevo_trabajador(self):
+        trabajador = _Trabajador(self._ctx)
+        with self._lock:
+            self._trabajadores.add(trabajador)
+        return trabajador
+
+    def _reemplazar(self, trabajador, forzar):
+        with self._lock:
+            self._trabajadores.discard(trabajador)
+        trabajador.detener(forzar=forzar)
+        return self._nuevo_trabajador()
+
+    def resolver(self, equation_str: str) -> dict:
+        if not self._cupo.acquire(blocking=False):
+            instrumentacion.contar('resolutor', 'saturado')
+            raise ServicioSaturado("El servidor está ocupado, inténtalo de nuevo en unos segundos")
+        try:
+            try:
+                trabajador = self._libres.get(timeout=self.timeout)
+            except queue.Empty:
+                instrumentacion.contar('resolutor', 'saturado')
+                raise ServicioSaturado("El servidor está ocupado, inténtalo de nuevo en unos segundos")
+            return self._ejecutar(trabajador, equation_str)
+        finally:
+            self._cupo.release()
+
+    def _ejecutar(self, trabajador, equation_str):
+        try:
+            try:
+                trabajador.conn.send(equation_str)
+                if not trabajador.conn.poll(self.timeout):
+                    # El proceso sigue con la ecuación: se mata y se sustituye
+                    trabajador = self._reemplazar(trabajador, forzar=True)
+                    instrumentacion.contar('resolutor', 'tiempo_agotado')
+                    raise TiempoAgotado("La ecuación es demasiado costosa de resolver")
+                resultado, trabajador.caches = trabajador.conn.recv()
+            except (EOFError, OSError):
+                trabajador = self._reemplazar(trabajador, forzar=True)
+                instrumentacion.contar('resolutor', 'trabajador_caido')
+                raise TrabajadorCaido("El proceso de resolución se ha detenido")
+
+            instrumentacion.contar('resolutor', 'ok')
+            trabajador.trabajos += 1
+            if trabajador.trabajos >= self.max_trabajos:
+                instrumentacion.contar('resolutor', 'reciclado')
+                trabajador = self._reemplazar(trabajador, forzar=False)
+            return resultado
+        finally:
+            self._libres.put(trabajador)
+
+    def estadisticas_caches(self) -> dict:
+        """Cachés de los procesos vivos, sumadas por nombre."""
+        with self._lock:
+            por_proceso = [trabajador.caches for trabajador in self._trabajadores]
+        total = {}
+        for caches in por_proceso:
+            for nombre, estadisticas in caches.items():
+                suma = total.setdefault(nombre, {'procesos': 0, 'tamano': 0, 'aciertos': 0, 'fallos': 0})
+                suma['procesos'] += 1
+                for clave in ('tamano', 'aciertos', 'fallos'):
+                    suma[clave] += estadisticas[clave]
+        for suma in total.values():
+            consultas = suma['aciertos'] + suma['fallos']
+            suma['ratio_aciertos'] = round(suma['aciertos'] / consultas, 4) if consultas else 0.0
+        return total
+
+    def cerrar(self):
+        with self._lock:
+            trabajadores = list(self._trabajadores)
+            self._trabajadores.clear()
+        for trabajador in trabajadores:
+            trabajador.detener()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def obtener_pool():
+    """Crea el pool la primera vez que se usa y lo mantiene vivo."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PoolResolutor(
+                    num_procesos=settings.RESOLUTOR_PROCESOS,
+                    timeout=settings.RESOLUTOR_TIMEOUT,
+                    max_cola=settings.RESOLUTOR_MAX_COLA,
+                    max_trabajos=settings.RESOLUTOR_MAX_TRABAJOS,
+                )
+                atexit.register(_pool.cerrar)
+    return _pool
+
+
+def resolver(equation_str: str) -> dict:
+    """
+    Parsea y resuelve la ecuación en el pool. Devuelve {'pasos', 'solucion'}
+    o {'error'} si no se pudo parsear. Lanza ErrorResolutor si se agota el
+    tiempo o el servicio está saturado.
+    """
+    if settings.RESOLUTOR_PROCESOS <= 0:
+        return resolver_ecuacion(equation_str)
+    return obtener_pool().resolver(equation_str)
+
+
+def estadisticas_caches() -> dict:
+    """Cachés de los procesos del pool ({} si se resuelve en el propio proceso)."""
+    if settings.RESOLUTOR_PROCESOS <= 0 or _pool is None:
+        return {}
+    return _pool.estadisticas_caches()
+
+
+def resolver_lote(ecuaciones: list) -> list:
+    """
+    Resuelve varias ecuaciones repartiéndolas entre los procesos del pool.
+    Devuelve los resultados en el mismo orden; los errores del servicio se
+    devuelven por elemento ({'error', 'codigo'}) en lugar de propagarse.
+    """
+    def _resolver_uno(equation_str):
+        try:
+            return resolver(equation_str)
+        except ErrorResolutor as e:
+            return {'error': str(e), 'codigo': e.codigo}
+
+    if settings.RESOLUTOR_PROCESOS <= 1 or len(ecuaciones) <= 1:
+        return [_resolver_uno(e) for e in ecuaciones]
+    with ThreadPoolExecutor(max_workers=settings.RESOLUTOR_PROCESOS) as ejecutor:
+        return list(ejecutor.map(_resolver_uno, ecuaciones))
@@ -0,0 +1,38 @@
+# Nombre de archivo: api/signals.py
+#
+# Mantiene ProgresoUsuario.completados_bitmap sincronizado con la relación
+# M2M ejercicios_completados cuando esta se edita fuera de las vistas
+# (p. ej. el filter_horizontal del admin).
+
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+from . import bitmap
+from .models import ProgresoUsuario
+
+def _recalcular_bitmap(progreso):
+    nuevo = bitmap.desde_ids(progreso.ejercicios_completados.values_list('id', flat=True))
+    if nuevo != bytes(progreso.completados_bitmap or b''):
+        progreso.completados_bitmap = nuevo
+        progreso.save(update_fields=['completados_bitmap'])
+
+@receiver(m2m_changed, sender=ProgresoUsuario.ejercicios_completados.through)
+def sincronizar_bitmap_completados(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # Se editó desde el lado del Ejercicio: recalculamos los progresos afectados
+        if action == 'pre_clear':
+            instance._progresos_afectados = list(instance.progresousuario_set.all())
+        elif action == 'post_clear':
+            for progreso in getattr(instance, '_progresos_afectados', []):
+                _recalcular_bitmap(progreso)
+        elif action in ('post_add', 'post_remove'):
+            for progreso in ProgresoUsuario.objects.filter(pk__in=pk_set):
+                _recalcular_bitmap(progreso)
+        return
+
+    if action == 'post_add':
+        nuevo = bitmap.con_ids(instance.completados_bitmap, pk_set)
+        if nuevo != bytes(instance.completados_bitmap or b''):
+            instance.completados_bitmap = nuevo
+            instance.save(update_fields=['completados_bitmap'])
+    elif action in ('post_remove', 'post_clear'):
+        _recalcular_bitmap(instance)
@@ -0,0 +1,241 @@
+# Nombre de archivo: api/trabajos.py
+# Versión: TRABAJOS_FONDO_V1.0
+#
+# Cola de trabajos largos del admin (importar LaTeX, recalcular ejercicios,
+# reconstruir puntos, ajustar BKT, generar ejercicios) guardada en la BD (modelos Trabajo y
+# LineaTrabajo), sin broker externo.
+# Los ejecuta un hilo dentro del propio proceso web, que se arranca con el
+# primer trabajo encolado y se duerme cuando la cola se vacía; o, con
+# TRABAJOS_HILO_LOCAL = False, un proceso aparte:
+# `python manage.py procesar_trabajos`.
+#
+# Un trabajo se reclama con un UPDATE condicionado a estado='PENDIENTE', así
+# que varios workers de gunicorn (o el comando) no ejecutan el mismo dos veces.
+
+import io
+import queue
+import threading
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from .models import Trabajo, LineaTrabajo
+
+
+# =================================================================
+# 1. TIPOS DE TRABAJO
+# =================================================================
+# Cada tipo es una función (parametros, progreso) -> dict con el resultado.
+# `progreso(linea)` añade una línea al log del trabajo.
+
+def _importar_latex(parametros, progreso):
+    from .latex_parser import importar_modelos
+    log = importar_modelos(
+        procesos=parametros.get('procesos'),
+        solo=parametros.get('solo'),
+        dry_run=parametros.get('dry_run', False),
+        progreso=progreso,
+        forzar=parametros.get('forzar', False),
+    )
+    return {'resumen': log.resumen, 'tiempos': log.tiempos, 'discrepancias': log.discrepancias,
+            'no_verificables': log.no_verificables}
+
+class _SalidaProgreso(io.TextIOBase):
+    """Adapta `progreso` a un fichero para el stdout de call_command."""
+
+    def __init__(self, progreso):
+        self._progreso = progreso
+
+    def write(self, texto):
+        for linea in texto.splitlines():
+            if linea.strip():
+                self._progreso(linea)
+        return len(texto)
+
+def _recalcular_ejercicios(parametros, progreso):
+    call_command('recalcular_ejercicios', stdout=_SalidaProgreso(progreso))
+    return {}
+
+def _reconstruir_puntos(parametros, progreso):
+    call_command('reconstruir_puntos', stdout=_SalidaProgreso(progreso))
+    return {}
+
+def _ajustar_bkt(parametros, progreso):
+    call_command('ajustar_bkt', stdout=_SalidaProgreso(progreso))
+    return {}
+
+def _generar_ejercicios(parametros, progreso):
+    from . import generador
+    from .models import ModeloEjercicio
+    modelos = ModeloEjercicio.objects.order_by('id')
+    if parametros.get('modelos'):
+        modelos = modelos.filter(id__in=parametros['modelos'])
+    resumen, segundos = generador.generar_ejercicios(
+        list(modelos), parametros.get('cantidad', 100),
+        tipo=parametros.get('tipo', 'ENTRENAMIENTO'),
+        semilla=parametros.get('semilla'),
+        procesos=parametros.get('procesos'),
+        progreso=progreso,
+    )
+    return {'resumen': resumen, 'segundos': round(segundos, 2)}
+
+TIPOS = {
+    'importar_latex': _importar_latex,
+    'recalcular_ejercicios': _recalcular_ejercicios,
+    'reconstruir_puntos': _reconstruir_puntos,
+    'ajustar_bkt': _ajustar_bkt,
+    'generar_ejercicios': _generar_ejercicios,
+}
+
+
+# =================================================================
+# 2. LOG EN VIVO
+# =================================================================
+
+# Escritores de los trabajos que se están ejecutando en este proceso
+_en_curso = {}
+
+class _EscritorLog(threading.Thread):
+    """
+    Guarda las líneas del log en memoria y las escribe en la BD desde su
+    propio hilo, y por tanto con su propia conexión: el trabajo suele ir
+    dentro de una transacción y sus líneas no se verían hasta el final.
+    En SQLite no se escribe hasta que el trabajo acaba (dos conexiones
+    escribiendo a la vez hacen fallar la transacción del trabajo con
+    "database is locked"); mientras, lineas_desde() las sirve de memoria.
+    """
+
+    def __init__(self, trabajo_id):
+        super().__init__(daemon=True)
+        self.trabajo_id = trabajo_id
+        self.cola = queue.Queue()
+        self.lineas = []
+        self.escritas = 0
+
+    def escribir(self, linea):
+        linea = str(linea)
+        self.lineas.append(linea)
+        self.cola.put(linea)
+
+    def cerrar(self):
+        self.cola.put(None)
+        self.join()
+
+    def _volcar(self):
+        pendientes = self.lineas[self.escritas:]
+        if not pendientes:
+            return
+        LineaTrabajo.objects.bulk_create([
+            LineaTrabajo(trabajo_id=self.trabajo_id, numero=self.escritas + i, texto=texto)
+            for i, texto in enumerate(pendientes, 1)
+        ])
+        self.escritas += len(pendientes)
+
+    def run(self):
+        en_vivo = connection.vendor != 'sqlite'
+        try:
+            while self.cola.get() is not None:
+                # Se agrupan las líneas que lleguen seguidas en un solo INSERT
+                while True:
+                    try:
+                        if self.cola.get_nowait() is None:
+                            self.cola.put(None)
+                            break
+                    except queue.Empty:
+                        break
+                if en_vivo:
+                    self._volcar()
+            self._volcar()
+        finally:
+            connection.close()
+
+def lineas_desde(trabajo, desde):
+    """Líneas del log con número > desde, como lista de (numero, texto)."""
+    escritor = _en_curso.get(trabajo.pk)
+    if escritor is not None:
+        return list(enumerate(escritor.lineas[desde:desde + 500], desde + 1))
+    return list(trabajo.lineas.filter(numero__gt=desde).values_list('numero', 'texto')[:500])
+
+
+# =================================================================
+# 3. EJECUCIÓN
+# =================================================================
+
+def encolar(tipo, parametros=None):
+    """Crea el trabajo en la cola y, si toca, despierta al hilo local."""
+    if tipo not in TIPOS:
+        raise ValueError(f"Tipo de trabajo desconocido: {tipo}")
+    trabajo = Trabajo.objects.create(tipo=tipo, parametros=parametros or {})
+    if getattr(settings, 'TRABAJOS_HILO_LOCAL', True):
+        _despertar_hilo()
+    return trabajo
+
+def _reclamar_siguiente():
+    """Pasa a EN_CURSO el trabajo pendiente más antiguo; None si no hay."""
+    for trabajo_id in Trabajo.objects.filter(estado='PENDIENTE').order_by('creado').values_list('id', flat=True)[:5]:
+        reclamado = Trabajo.objects.filter(id=trabajo_id, estado='PENDIENTE').update(
+            estado='EN_CURSO', iniciado=timezone.now())
+        if reclamado:
+            return Trabajo.objects.get(id=trabajo_id)
+    return None
+
+def marcar_interrumpidos():
+    """Los EN_CURSO de hace más de TRABAJOS_MAX_DURACION s murieron con su proceso."""
+    limite = timezone.now() - timedelta(seconds=getattr(settings, 'TRABAJOS_MAX_DURACION', 3600))
+    return Trabajo.objects.filter(estado='EN_CURSO', iniciado__lt=limite).update(
+        estado='FALLIDO', terminado=timezone.now(), resultado={'error': 'Interrumpido'})
+
+def ejecutar(trabajo):
+    escritor = _EscritorLog(trabajo.id)
+    escritor.start()
+    _en_curso[trabajo.id] = escritor
+    try:
+        resultado = TIPOS[trabajo.tipo](trabajo.parametros, escritor.escribir)
+        estado = 'TERMINADO'
+    except Exception as e:
+        escritor.escribir(f"ERROR: {e}")
+        escritor.escribir(traceback.format_exc())
+        resultado = {'error': str(e)}
+        estado = 'FALLIDO'
+    finally:
+        escritor.cerrar()
+    Trabajo.objects.filter(id=trabajo.id).update(estado=estado, resultado=resultado, terminado=timezone.now())
+    _en_curso.pop(trabajo.id, None)
+
+def procesar_cola():
+    """Ejecuta trabajos hasta vaciar la cola. Devuelve cuántos ha ejecutado."""
+    marcar_interrumpidos()
+    ejecutados = 0
+    while True:
+        trabajo = _reclamar_siguiente()
+        if trabajo is None:
+            return ejecutados
+        ejecutar(trabajo)
+        ejecutados += 1
+
+_hilo = None
+_hilo_lock = threading.Lock()
+_hay_trabajo = threading.Event()
+
+def _bucle_hilo():
+    while True:
+        _hay_trabajo.wait()
+        # Se limpia antes de mirar la cola: lo que se encole mientras tanto
+        # o lo ve esta pasada o vuelve a despertar al hilo
+        _hay_trabajo.clear()
+        try:
+            procesar_cola()
+        except Exception:
+            traceback.print_exc()
+        finally:
+            connection.close()
+
+def _despertar_hilo():
+    global _hilo
+    with _hilo_lock:
+        if _hilo is None or not _hilo.is_alive():
+            _hilo = threading.Thread(target=_bucle_hilo, name='trabajos', daemon=True)
+            _hilo.start()
+    _hay_trabajo.set()
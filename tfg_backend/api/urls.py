@@ -10,16 +10,26 @@ urlpatterns = [
     path('login/', views.login_usuario_view, name='login'),
     path('cambiar-password/', views.cambiar_password_view, name='cambiar_password'),
     path('actualizar-puntos/', views.actualizar_puntos_view, name='actualizar_puntos'),
+    path('puntos/movimientos/', views.movimientos_puntos_view, name='movimientos_puntos'),
 
     # --- NUEVOS ENDPOINTS GAMIFICACIÓN ---
     path('ejercicio-aleatorio/', views.obtener_ejercicio_aleatorio_view, name='ejercicio_aleatorio'),
+    path('ejercicio-recomendado/', views.obtener_ejercicio_recomendado_view, name='ejercicio_recomendado'),
     path('marcar-completado/', views.marcar_ejercicio_completado_view, name='marcar_completado'),
     
     # ACTUALIZACIÓN 3a: Ruta para el Ranking
     path('ranking/', views.ranking_usuarios_view, name='ranking'),
+    path('ranking/posicion/', views.posicion_ranking_view, name='posicion_ranking'),
+
+    # --- REGISTROS DE APRENDIZAJE (LRS) ---
+    path('lrs/registros/', views.registros_aprendizaje_view, name='registros_aprendizaje'),
+    path('bkt/dominio/', views.dominio_alumno_view, name='dominio_alumno'),
+    path('recomendacion/explicacion/', views.explicar_recomendacion_view, name='explicar_recomendacion'),
 
     # --- LÓGICA CORE ---
     path('resolver/', views.resolver_ecuacion_view, name='resolver_ecuacion'),
+    path('resolver-lote/', views.resolver_lote_view, name='resolver_lote'),
+    path('estadisticas-motor/', views.estadisticas_motor_view, name='estadisticas_motor'),
     # Mantenemos estos por compatibilidad
     path('clasificar/', views.clasificar_modelo_view, name='clasificar_modelo'),
     path('lista-modelos/', views.lista_modelos_view, name='lista_modelos'),
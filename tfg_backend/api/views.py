@@ -4,11 +4,14 @@
 from django.http import JsonResponse, HttpRequest
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth import authenticate, login, get_user_model
+from django.db import IntegrityError, transaction
 import json
 import re
-import random 
-from . import ecuaciones_core
-from .models import Ejercicio, ModeloEjercicio, ProgresoUsuario
+from . import (
+    bitmap, ecuaciones_core, explicaciones, instrumentacion, lrs, puntos, ranking,
+    recomendador, seleccion_ejercicios, servicio_bkt, servicio_resolutor,
+)
+from .models import Ejercicio, ModeloEjercicio, MovimientoPuntos, ProgresoUsuario, RegistroAprendizaje
 
 User = get_user_model()
 
@@ -28,10 +31,13 @@ def registro_usuario_view(request: HttpRequest):
             if User.objects.filter(username=username).exists(): 
                 return JsonResponse({'error': 'El usuario ya existe'}, status=400)
             
-            user = User.objects.create_user(username=username, password=password)
-            
-            # --- CORRECCIÓN: Puntos Iniciales = 50 (Solicitado) ---
-            ProgresoUsuario.objects.create(usuario=user, puntos_totales=50)
+            with transaction.atomic():
+                user = User.objects.create_user(username=username, password=password)
+
+                # --- CORRECCIÓN: Puntos Iniciales = 50 (Solicitado) ---
+                ProgresoUsuario.objects.create(usuario=user, puntos_totales=50)
+                MovimientoPuntos.objects.create(usuario=user, delta=50, motivo='registro')
+            ranking.registrar_puntos(user.id, user.username, 50)
             
             return JsonResponse({'status': 'exito', 'mensaje': 'Usuario registrado'})
         except Exception as e: return JsonResponse({'error': str(e)}, status=500)
@@ -74,13 +80,51 @@ def cambiar_password_view(request: HttpRequest):
 
 @csrf_exempt
 def actualizar_puntos_view(request: HttpRequest):
+    # Compatibilidad: el cliente manda el total. Se guarda como la diferencia
+    # con el actual (ver puntos.fijar_puntos); lo nuevo es movimientos_puntos_view
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
-            progreso = ProgresoUsuario.objects.get(usuario_id=data.get('user_id'))
-            progreso.puntos_totales = data.get('puntos')
-            progreso.save()
-            return JsonResponse({'status': 'exito'})
+            try:
+                # El ranking indexa por id entero: "3" crearía otra entrada
+                user_id = int(data.get('user_id'))
+            except (TypeError, ValueError):
+                return JsonResponse({'error': 'user_id debe ser un entero'}, status=400)
+            total = puntos.fijar_puntos(user_id, data.get('puntos'))
+            return JsonResponse({'status': 'exito', 'puntos': total})
+        except ProgresoUsuario.DoesNotExist:
+            return JsonResponse({'error': 'Usuario no encontrado'}, status=404)
+        except Exception as e: return JsonResponse({'error': str(e)}, status=500)
+    return JsonResponse({'error': 'Solo POST'}, status=405)
+
+@csrf_exempt
+def movimientos_puntos_view(request: HttpRequest):
+    """
+    Suma o resta puntos en lote:
+    {"user_id": 1, "movimientos": [{"delta": 10, "motivo": "acierto",
+     "ejercicio_id": 3, "clave": "..."}, ...]}
+    Con "clave" (única por usuario) reenviar el mismo lote no suma dos veces.
+    """
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            try:
+                user_id = int(data.get('user_id'))
+            except (TypeError, ValueError):
+                return JsonResponse({'error': 'user_id debe ser un entero'}, status=400)
+            # Un usuario inexistente haría fallar el INSERT con IntegrityError,
+            # que el cliente tomaría por un conflicto y reintentaría sin fin
+            if not User.objects.filter(id=user_id).exists():
+                return JsonResponse({'error': 'Usuario no encontrado'}, status=404)
+            resultado = puntos.aplicar_movimientos(user_id, data.get('movimientos'))
+            return JsonResponse({'status': 'exito', **resultado})
+        except puntos.MovimientoInvalido as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        except ProgresoUsuario.DoesNotExist:
+            return JsonResponse({'error': 'Usuario no encontrado'}, status=404)
+        except IntegrityError:
+            # Otra petición ha registrado a la vez alguna de las claves
+            return JsonResponse({'error': 'Lote en conflicto, reinténtalo', 'codigo': 'reintentar'}, status=409)
         except Exception as e: return JsonResponse({'error': str(e)}, status=500)
     return JsonResponse({'error': 'Solo POST'}, status=405)
 
@@ -96,6 +140,24 @@ def lista_modelos_view(request: HttpRequest):
         return JsonResponse({'modelos': lista})
     except: return JsonResponse({'modelos': []})
 
+def _respuesta_ejercicio(seleccionado, **extra):
+    # --- CORRECCIÓN: Usar detección dinámica para soportar variable 'm' ---
+    # En lugar de los flags fijos del Modelo, usamos la clasificación
+    # calculada al importar (o la calculamos si el ejercicio no la tiene)
+    caracteristicas_reales = seleccionado.caracteristicas
+    if not caracteristicas_reales:
+        eq_obj = ecuaciones_core.limpiar_y_crear_ecuacion(seleccionado.ecuacion_str)
+        caracteristicas_reales = ecuaciones_core.clasificar_ecuacion(eq_obj, seleccionado.ecuacion_str)
+
+    return JsonResponse({
+        'status': 'exito',
+        'id': seleccionado.id,
+        'ecuacion_str': seleccionado.ecuacion_str,
+        'modelo_id': seleccionado.modelo.id if seleccionado.modelo else None,
+        'caracteristicas': caracteristicas_reales, # Usamos la calculada, no la de BD
+        **extra,
+    })
+
 @csrf_exempt
 def obtener_ejercicio_aleatorio_view(request: HttpRequest):
     """Devuelve un ejercicio aleatorio NO completado del tipo solicitado"""
@@ -105,28 +167,55 @@ def obtener_ejercicio_aleatorio_view(request: HttpRequest):
             user_id = data.get('user_id')
             tipo_solicitado = data.get('tipo', 'ENTRENAMIENTO')
             
-            progreso = ProgresoUsuario.objects.get(usuario_id=user_id)
-            completados_ids = progreso.ejercicios_completados.values_list('id', flat=True)
-            disponibles = Ejercicio.objects.filter(tipo=tipo_solicitado).exclude(id__in=completados_ids)
+            progreso = ProgresoUsuario.objects.only('completados_bitmap').get(usuario_id=user_id)
+            completados = bitmap.BitmapCompletados(progreso.completados_bitmap)
+            seleccionado = seleccion_ejercicios.elegir_ejercicio(tipo_solicitado, completados)
             
-            if not disponibles.exists():
+            if seleccionado is None:
                 return JsonResponse({'status': 'fin', 'mensaje': '¡Has completado todos los ejercicios!'})
             
-            seleccionado = random.choice(list(disponibles))
-            
-            # --- CORRECCIÓN: Usar detección dinámica para soportar variable 'm' ---
-            # En lugar de usar los flags fijos de la BD, recalculamos al vuelo
-            eq_obj = ecuaciones_core.limpiar_y_crear_ecuacion(seleccionado.ecuacion_str)
-            caracteristicas_reales = ecuaciones_core.clasificar_ecuacion(eq_obj, seleccionado.ecuacion_str)
+            return _respuesta_ejercicio(seleccionado)
             
-            return JsonResponse({
-                'status': 'exito',
-                'id': seleccionado.id,
-                'ecuacion_str': seleccionado.ecuacion_str,
-                'modelo_id': seleccionado.modelo.id if seleccionado.modelo else None,
-                'caracteristicas': caracteristicas_reales # Usamos la calculada, no la de BD
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+    return JsonResponse({'error': 'Solo POST'}, status=405)
+
+@csrf_exempt
+def obtener_ejercicio_recomendado_view(request: HttpRequest):
+    """
+    Como ejercicio-aleatorio, pero elige el ejercicio NO completado que mejor
+    encaja con el dominio estimado del alumno (ver api/recomendador.py).
+    Añade 'recomendacion': {'puntuacion', 'alternativas'}.
+    """
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            try:
+                # El BKT indexa por id entero: "3" daría el dominio inicial
+                user_id = int(data.get('user_id'))
+            except (TypeError, ValueError):
+                return JsonResponse({'error': 'user_id debe ser un entero'}, status=400)
+            tipo_solicitado = data.get('tipo', 'ENTRENAMIENTO')
+
+            progreso = ProgresoUsuario.objects.only('completados_bitmap').get(usuario_id=user_id)
+            recomendados = recomendador.recomendar(user_id, tipo_solicitado, progreso.completados_bitmap, n=4)
+            seleccionado = None
+            if recomendados:
+                seleccionado = Ejercicio.objects.select_related('modelo').filter(id=recomendados[0][0]).first()
+            if seleccionado is None:
+                # Sin candidatos o índice desactualizado: se recurre a la elección aleatoria
+                seleccionado = seleccion_ejercicios.elegir_ejercicio(
+                    tipo_solicitado, bitmap.BitmapCompletados(progreso.completados_bitmap))
+                recomendados = []
+            if seleccionado is None:
+                return JsonResponse({'status': 'fin', 'mensaje': '¡Has completado todos los ejercicios!'})
+
+            return _respuesta_ejercicio(seleccionado, recomendacion={
+                'puntuacion': round(recomendados[0][1], 4) if recomendados else None,
+                'alternativas': [ejercicio_id for ejercicio_id, _ in recomendados[1:]],
             })
-            
+        except ProgresoUsuario.DoesNotExist:
+            return JsonResponse({'error': 'Usuario no encontrado'}, status=404)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
     return JsonResponse({'error': 'Solo POST'}, status=405)
@@ -139,10 +228,16 @@ def marcar_ejercicio_completado_view(request: HttpRequest):
             data = json.loads(request.body)
             user_id = data.get('user_id')
             ejercicio_id = data.get('ejercicio_id')
-            progreso = ProgresoUsuario.objects.get(usuario_id=user_id)
-            ejercicio = Ejercicio.objects.get(id=ejercicio_id)
-            progreso.ejercicios_completados.add(ejercicio)
-            progreso.save()
+            ejercicio = Ejercicio.objects.only('id').get(id=ejercicio_id)
+            with transaction.atomic():
+                # Bloqueamos la fila para que dos peticiones no pisen el bitmap
+                progreso = ProgresoUsuario.objects.select_for_update().get(usuario_id=user_id)
+                if not bitmap.contiene(progreso.completados_bitmap, ejercicio.id):
+                    progreso.completados_bitmap = bitmap.con_ids(progreso.completados_bitmap, [ejercicio.id])
+                    progreso.save(update_fields=['completados_bitmap'])
+                    # El M2M se mantiene para el admin (la señal ve el bit ya puesto)
+                    progreso.ejercicios_completados.add(ejercicio)
+            lrs.track_to_lrs(user_id, ejercicio.id, 'final', True, data.get('tiempo_ms'), None, verbo='COMPLETADO')
             return JsonResponse({'status': 'exito'})
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
@@ -152,24 +247,75 @@ def marcar_ejercicio_completado_view(request: HttpRequest):
 def ranking_usuarios_view(request: HttpRequest):
     if request.method == 'GET':
         try:
-            ranking = ProgresoUsuario.objects.select_related('usuario').order_by('-puntos_totales')[:10]
-            data = [{'username': p.usuario.username, 'puntos': p.puntos_totales} for p in ranking]
+            n = min(int(request.GET.get('n', 10)), 100)
+            top = ranking.obtener_clasificacion().top(n)
+            data = [{'username': f['username'], 'puntos': f['puntos'], 'posicion': f['posicion']} for f in top]
             return JsonResponse({'ranking': data})
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
     return JsonResponse({'error': 'Solo GET'}, status=405)
 
+@csrf_exempt
+def posicion_ranking_view(request: HttpRequest):
+    """Posición de un usuario en el ranking y los usuarios de su alrededor"""
+    if request.method == 'GET':
+        try:
+            user_id = int(request.GET.get('user_id'))
+            radio = min(int(request.GET.get('radio', 2)), 25)
+            clasificacion = ranking.obtener_clasificacion()
+            posicion = clasificacion.posicion(user_id)
+            if posicion is None:
+                return JsonResponse({'error': 'Usuario no encontrado'}, status=404)
+            vecinos = [{'username': f['username'], 'puntos': f['puntos'], 'posicion': f['posicion']}
+                       for f in clasificacion.vecindario(user_id, radio)]
+            return JsonResponse({'posicion': posicion, 'total': len(clasificacion), 'vecinos': vecinos})
+        except (TypeError, ValueError):
+            return JsonResponse({'error': 'Falta user_id'}, status=400)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+    return JsonResponse({'error': 'Solo GET'}, status=405)
+
 # =================================================================
 # 3. LÓGICA CORE (RESOLVER)
 # =================================================================
 
 def obtener_pasos_formateados(ejercicio_obj):
-    pasos_en_bd = ejercicio_obj.pasos.all().order_by('numero_paso')
+    # Meta.ordering ya ordena por numero_paso (y así se respeta prefetch_related)
+    pasos_en_bd = ejercicio_obj.pasos.all()
     return [{'paso': p.numero_paso, 'descripcion': p.descripcion, 'ecuacion': p.ecuacion_resultante} for p in pasos_en_bd]
 
+def obtener_resolucion_guardada(ejercicio_obj):
+    """
+    (pasos, solucion) del ejercicio sin recalcular nada: los pasos del .tex si
+    los tiene y, si no, los generados por el motor al importar. None si no hay.
+    """
+    pasos = obtener_pasos_formateados(ejercicio_obj)
+    if pasos:
+        return pasos, ejercicio_obj.solucion
+    if ejercicio_obj.pasos_generados:
+        return ejercicio_obj.pasos_generados, ejercicio_obj.solucion_normalizada
+    return None
+
 def obtener_descripciones_pasos(pasos_formateados):
     return [f"Paso {p['paso']}: {p['descripcion']}" for p in pasos_formateados]
 
+def construir_respuesta_resolucion(tipo, pasos, solucion):
+    if tipo == 'ENTRENAMIENTO':
+        return {
+            'status': 'exito', 
+            'fuente': 'Entrenamiento', 
+            'solucion_final': f"x = {solucion}" if solucion and "x" not in str(solucion) else solucion, 
+            'pasos_resolucion': pasos
+        }
+    return {
+        'status': 'exito', 
+        'fuente': 'Prueba', 
+        'solucion_oculta': extraer_valor_simple(solucion),
+        'solucion_final_latex': f"x = {solucion}" if solucion and "x" not in str(solucion) else solucion, 
+        'pasos_descripciones': obtener_descripciones_pasos(pasos),
+        'pasos_completos_ocultos': pasos
+    }
+
 def extraer_valor_simple(solucion_latex):
     if not solucion_latex: return ""
     if "Infinitas" in solucion_latex or "No tiene" in solucion_latex: return solucion_latex
@@ -189,43 +335,193 @@ def resolver_ecuacion_view(request: HttpRequest):
             if not equation_str: return JsonResponse({'error': 'Falta ecuacion'}, status=400)
             
             try:
-                # 1. Intentamos buscar en BD
-                ej_bd = Ejercicio.objects.get(ecuacion_str=equation_str)
+                # 1. Intentamos buscar en BD (por hash de la forma normalizada,
+                # con los pasos en la misma ida a la BD)
+                ej_bd = Ejercicio.objects.prefetch_related('pasos').get(
+                    ecuacion_hash=ecuaciones_core.hash_ecuacion(equation_str))
                 tipo = ej_bd.tipo
-                pasos = obtener_pasos_formateados(ej_bd)
-                solucion = ej_bd.solucion
+                resolucion = obtener_resolucion_guardada(ej_bd)
                 
-                # Si no tiene pasos guardados (fue importado solo con sol final), los calculamos
-                if not pasos:
+                # Si no tiene pasos guardados ni generados, los calculamos
+                if resolucion is None:
                     raise Ejercicio.DoesNotExist 
+                pasos, solucion = resolucion
 
             except Ejercicio.DoesNotExist:
                 # 2. Si no está en BD o no tiene pasos, calculamos al vuelo
+                # El parseo y la resolución van al pool de procesos, con tiempo máximo
                 tipo = 'PRUEBA' # Por defecto si no se sabe
-                eq = ecuaciones_core.limpiar_y_crear_ecuacion(equation_str)
-                if not eq: return JsonResponse({'error': 'Error parseo'}, status=400)
-                pasos, solucion = ecuaciones_core.solve_equation_step_by_step(eq)
+                try:
+                    resultado = servicio_resolutor.resolver(equation_str)
+                except servicio_resolutor.ErrorResolutor as e:
+                    return JsonResponse({'error': str(e), 'codigo': e.codigo}, status=e.estado_http)
+                if 'error' in resultado: return JsonResponse({'error': resultado['error']}, status=400)
+                pasos, solucion = resultado['pasos'], resultado['solucion']
 
             # 3. Respuesta
-            if tipo == 'ENTRENAMIENTO':
-                return JsonResponse({
-                    'status': 'exito', 
-                    'fuente': 'Entrenamiento', 
-                    'solucion_final': f"x = {solucion}" if solucion and "x" not in str(solucion) else solucion, 
-                    'pasos_resolucion': pasos
-                })
-            else:
-                return JsonResponse({
-                    'status': 'exito', 
-                    'fuente': 'Prueba', 
-                    'solucion_oculta': extraer_valor_simple(solucion),
-                    'solucion_final_latex': f"x = {solucion}" if solucion and "x" not in str(solucion) else solucion, 
-                    'pasos_descripciones': obtener_descripciones_pasos(pasos),
-                    'pasos_completos_ocultos': pasos
-                })
+            return JsonResponse(construir_respuesta_resolucion(tipo, pasos, solucion))
         except Exception as e: return JsonResponse({'error': str(e)}, status=500)
     return JsonResponse({'error': 'Solo POST'}, status=405)
 
+# Máximo de ecuaciones por petición en /api/resolver-lote/
+MAX_ECUACIONES_LOTE = 100
+
+@csrf_exempt
+def resolver_lote_view(request: HttpRequest):
+    """
+    Resuelve una lista de ecuaciones y devuelve los resultados en el mismo orden.
+    Las del catálogo se leen de la BD en una sola consulta; el resto se reparte
+    entre los procesos del pool. Cada elemento lleva su propio status/error.
+    """
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            ecuaciones = data.get('ecuaciones')
+            if not isinstance(ecuaciones, list) or not ecuaciones:
+                return JsonResponse({'error': 'Falta la lista de ecuaciones'}, status=400)
+            if len(ecuaciones) > MAX_ECUACIONES_LOTE:
+                return JsonResponse({'error': f'Máximo {MAX_ECUACIONES_LOTE} ecuaciones por lote'}, status=400)
+
+            hashes = {e: ecuaciones_core.hash_ecuacion(e) for e in ecuaciones if isinstance(e, str) and e}
+
+            # 1. Catálogo: una consulta (+ una para los pasos)
+            en_bd = {}
+            for ej in Ejercicio.objects.filter(ecuacion_hash__in=set(hashes.values())).prefetch_related('pasos'):
+                resolucion = obtener_resolucion_guardada(ej)
+                if resolucion is not None:
+                    en_bd[ej.ecuacion_hash] = construir_respuesta_resolucion(ej.tipo, *resolucion)
+
+            # 2. Resto: al pool de procesos (sin repetir ecuaciones)
+            pendientes = sorted(e for e, h in hashes.items() if h not in en_bd)
+            calculadas = dict(zip(pendientes, servicio_resolutor.resolver_lote(pendientes)))
+
+            # 3. Respuesta en el orden de entrada
+            resultados = []
+            for equation_str in ecuaciones:
+                if not isinstance(equation_str, str) or not equation_str:
+                    resultados.append({'status': 'error', 'error': 'Falta ecuacion'})
+                elif hashes[equation_str] in en_bd:
+                    resultados.append(en_bd[hashes[equation_str]])
+                elif 'error' in calculadas[equation_str]:
+                    resultados.append({'status': 'error', **calculadas[equation_str]})
+                else:
+                    r = calculadas[equation_str]
+                    resultados.append(construir_respuesta_resolucion('PRUEBA', r['pasos'], r['solucion']))
+            return JsonResponse({'status': 'exito', 'resultados': resultados})
+        except Exception as e: return JsonResponse({'error': str(e)}, status=500)
+    return JsonResponse({'error': 'Solo POST'}, status=405)
+
+@csrf_exempt
+def estadisticas_motor_view(request: HttpRequest):
+    """Instrumentación del motor: cachés (también las del pool resolutor) y reparto vía rápida / sympy.solve"""
+    if request.method == 'GET':
+        return JsonResponse({
+            **instrumentacion.resumen(),
+            'resolucion': ecuaciones_core.estadisticas_resolucion(),
+            'caches_resolutor': servicio_resolutor.estadisticas_caches(),
+        })
+    return JsonResponse({'error': 'Solo GET'}, status=405)
+
+# =================================================================
+# 4. REGISTROS DE APRENDIZAJE (LRS)
+# =================================================================
+
+MAX_REGISTROS_POR_PETICION = 500
+
+@csrf_exempt
+def registros_aprendizaje_view(request: HttpRequest):
+    """
+    POST: {"user_id": 1, "registros": [{"ejercicio_id": 3, "paso": "2",
+           "exito": false, "tiempo_ms": 8400, "respuesta": "x = 4"}, ...]}
+          Se encolan y se escriben en lote (ver api/lrs.py): responde 202
+          (404 si el usuario no existe).
+    GET:  ?user_id= y/o ?ejercicio_id=, &n= (máx. 200). Los más recientes
+          ya escritos; los que siguen en el buffer aún no aparecen.
+    """
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            datos = data.get('registros')
+            if not isinstance(datos, list) or not datos:
+                return JsonResponse({'error': "'registros' debe ser una lista no vacía"}, status=400)
+            if len(datos) > MAX_REGISTROS_POR_PETICION:
+                return JsonResponse({'error': f"Máximo {MAX_REGISTROS_POR_PETICION} registros por petición"}, status=400)
+            registros = [lrs.crear_registro(data.get('user_id'), d) for d in datos]
+            # Antes de tocar el BKT en memoria: sin esto, cualquier user_id
+            # añadiría filas al modelo hasta la próxima recarga
+            if not User.objects.filter(id=registros[0].usuario_id).exists():
+                return JsonResponse({'error': 'Usuario no encontrado'}, status=404)
+            if not lrs.registrar(registros):
+                return JsonResponse({'error': 'El servidor está ocupado, reenvía los registros más tarde',
+                                     'codigo': 'servicio_saturado'}, status=503)
+            servicio_bkt.registrar_intentos(registros)
+            return JsonResponse({'status': 'aceptado', 'aceptados': len(registros)}, status=202)
+        except lrs.RegistroInvalido as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        except Exception as e: return JsonResponse({'error': str(e)}, status=500)
+    if request.method == 'GET':
+        try:
+            filtros = {}
+            if request.GET.get('user_id'):
+                filtros['usuario_id'] = int(request.GET['user_id'])
+            if request.GET.get('ejercicio_id'):
+                filtros['ejercicio_id'] = int(request.GET['ejercicio_id'])
+            if not filtros:
+                return JsonResponse({'error': 'Falta user_id o ejercicio_id'}, status=400)
+            n = min(int(request.GET.get('n', 50)), 200)
+            filas = RegistroAprendizaje.objects.filter(**filtros).values_list(
+                'usuario_id', 'verbo', 'ejercicio_id', 'paso', 'exito', 'tiempo_ms', 'respuesta', 'momento')[:n]
+            return JsonResponse({'registros': [
+                {'user_id': uid, 'verbo': verbo, 'ejercicio_id': ejercicio_id, 'paso': paso, 'exito': exito,
+                 'tiempo_ms': tiempo_ms, 'respuesta': respuesta, 'momento': momento.isoformat()}
+                for uid, verbo, ejercicio_id, paso, exito, tiempo_ms, respuesta, momento in filas
+            ]})
+        except ValueError:
+            return JsonResponse({'error': 'Parámetros no válidos'}, status=400)
+        except Exception as e: return JsonResponse({'error': str(e)}, status=500)
+    return JsonResponse({'error': 'Solo GET o POST'}, status=405)
+
+@csrf_exempt
+def dominio_alumno_view(request: HttpRequest):
+    """GET ?user_id=: probabilidad estimada (BKT) de dominar cada habilidad."""
+    if request.method == 'GET':
+        try:
+            user_id = int(request.GET.get('user_id', ''))
+            return JsonResponse({'user_id': user_id, 'dominio': servicio_bkt.dominio(user_id)})
+        except ValueError:
+            return JsonResponse({'error': 'Falta user_id'}, status=400)
+        except Exception as e: return JsonResponse({'error': str(e)}, status=500)
+    return JsonResponse({'error': 'Solo GET'}, status=405)
+
+MAX_EXPLICACIONES = 20
+
+@csrf_exempt
+def explicar_recomendacion_view(request: HttpRequest):
+    """
+    GET ?user_id=&ejercicio_id= (ejercicio_id puede repetirse, todos del
+    mismo tipo): por qué el recomendador puntúa así cada ejercicio.
+    """
+    if request.method == 'GET':
+        try:
+            user_id = int(request.GET.get('user_id', ''))
+            ejercicio_ids = [int(e) for e in request.GET.getlist('ejercicio_id')]
+        except ValueError:
+            return JsonResponse({'error': 'user_id y ejercicio_id deben ser enteros'}, status=400)
+        if not ejercicio_ids:
+            return JsonResponse({'error': 'Falta ejercicio_id'}, status=400)
+        if len(ejercicio_ids) > MAX_EXPLICACIONES:
+            return JsonResponse({'error': f'Máximo {MAX_EXPLICACIONES} ejercicios por petición'}, status=400)
+        try:
+            resultado = explicaciones.explicar(user_id, ejercicio_ids)
+            if not resultado:
+                return JsonResponse({'error': 'Ejercicio no encontrado'}, status=404)
+            return JsonResponse({
+                'user_id': user_id,
+                'explicaciones': [resultado[e] for e in dict.fromkeys(ejercicio_ids) if e in resultado],
+            })
+        except Exception as e: return JsonResponse({'error': str(e)}, status=500)
+    return JsonResponse({'error': 'Solo GET'}, status=405)
+
 # Compatibilidad para evitar errores 404 si el frontend llama a algo viejo
 @csrf_exempt
 def clasificar_modelo_view(request): return JsonResponse({}) 
@@ -6,6 +6,12 @@ pip install -r requirements.txt
 
 python manage.py collectstatic --no-input
 python manage.py migrate
+# Huella de cada ejercicio y unión de los equivalentes (tras la 0012; si ya
+# están rellenas no hace nada). Sin ella import_latex no importa
+python manage.py deduplicar_ejercicios
+
+# Clasificación y pasos generados de cada ejercicio (idempotente)
+python manage.py recalcular_ejercicios
 
 # Crear superusuario 'admin' si no existe (esto sí es útil mantenerlo)
 python manage.py shell -c "from django.contrib.auth import get_user_model; User = get_user_model(); User.objects.filter(username='admin').exists() or User.objects.create_superuser('admin', 'admin@example.com', 'admin1234')"
\ No newline at end of file
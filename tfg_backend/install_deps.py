@@ -7,6 +7,7 @@ import os
 REQUIRED_PACKAGES = [
     "django",
     "sympy",
+    "numpy",
     "django-cors-headers"
 ]
 
@@ -88,4 +88,61 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # --- CORS (Permisos para React) ---
 CORS_ALLOW_ALL_ORIGINS = True 
-CORS_ALLOW_CREDENTIALS = True
\ No newline at end of file
+CORS_ALLOW_CREDENTIALS = True
+
+# --- MOTOR DE ECUACIONES ---
+# 'racional' (sin SymPy, con SymPy como respaldo) o 'sympy'
+ECUACIONES_BACKEND = os.environ.get('ECUACIONES_BACKEND', 'racional')
+
+# --- POOL DE RESOLUCIÓN (/api/resolver/) ---
+# Procesos que parsean y resuelven con un tiempo máximo por trabajo.
+# RESOLUTOR_PROCESOS = 0 resuelve dentro del propio worker (sin límite).
+RESOLUTOR_PROCESOS = int(os.environ.get('RESOLUTOR_PROCESOS', 2))
+RESOLUTOR_TIMEOUT = float(os.environ.get('RESOLUTOR_TIMEOUT', 5))
+RESOLUTOR_MAX_COLA = int(os.environ.get('RESOLUTOR_MAX_COLA', 16))
+RESOLUTOR_MAX_TRABAJOS = int(os.environ.get('RESOLUTOR_MAX_TRABAJOS', 1000))
+
+# --- SELECCIÓN ALEATORIA DE EJERCICIOS ---
+# Segundos que se reutilizan en memoria los ids de cada tipo de ejercicio
+SELECCION_TTL_IDS = int(os.environ.get('SELECCION_TTL_IDS', 60))
+
+# --- RANKING ---
+# Cada cuántos segundos se recarga de la BD la clasificación en memoria
+RANKING_TTL_RECARGA = int(os.environ.get('RANKING_TTL_RECARGA', 30))
+
+# --- IMPORTACIÓN LATEX ---
+# Filas por INSERT/UPDATE en bulk_create/bulk_update
+IMPORTACION_TAMANO_LOTE = int(os.environ.get('IMPORTACION_TAMANO_LOTE', 500))
+# Procesos para parsear los .tex (1 = en el propio proceso)
+IMPORTACION_PROCESOS = int(os.environ.get('IMPORTACION_PROCESOS', min(4, os.cpu_count() or 1)))
+
+# --- REGISTROS DE APRENDIZAJE (LRS) ---
+# Los intentos se guardan en memoria y se escriben en lote cada
+# LRS_TAMANO_LOTE registros o cada LRS_INTERVALO segundos. Con el buffer
+# lleno (LRS_CAPACIDAD) se espera hasta LRS_ESPERA_MAX segundos y, si no
+# hay sitio, la petición se rechaza con 503.
+LRS_CAPACIDAD = int(os.environ.get('LRS_CAPACIDAD', 10000))
+LRS_TAMANO_LOTE = int(os.environ.get('LRS_TAMANO_LOTE', 200))
+LRS_INTERVALO = float(os.environ.get('LRS_INTERVALO', 2))
+LRS_ESPERA_MAX = float(os.environ.get('LRS_ESPERA_MAX', 0.5))
+
+# --- KNOWLEDGE TRACING (BKT) ---
+# Cada cuántos segundos se reconstruye el dominio en memoria desde el
+# historial de la BD (para recoger los intentos recibidos por otros workers)
+BKT_TTL_RECARGA = int(os.environ.get('BKT_TTL_RECARGA', 300))
+
+# --- RECOMENDADOR ---
+# Segundos que se reutiliza el índice de ejercicios (habilidades, pasos,
+# dificultad estimada) antes de reconstruirlo
+RECOMENDADOR_TTL_INDICE = int(os.environ.get('RECOMENDADOR_TTL_INDICE', 300))
+# Explicaciones cacheadas (alumno redondeado x ejercicio). El dominio de
+# cada habilidad se redondea a 1/EXPLICACIONES_RESOLUCION
+EXPLICACIONES_TAMANO_CACHE = int(os.environ.get('EXPLICACIONES_TAMANO_CACHE', 4096))
+EXPLICACIONES_RESOLUCION = int(os.environ.get('EXPLICACIONES_RESOLUCION', 20))
+
+# --- TRABAJOS EN SEGUNDO PLANO ---
+# True: los ejecuta un hilo del propio proceso web. False: hace falta
+# `python manage.py procesar_trabajos` corriendo aparte
+TRABAJOS_HILO_LOCAL = os.environ.get('TRABAJOS_HILO_LOCAL', 'True') == 'True'
+# Un trabajo EN_CURSO desde hace más de esto se da por interrumpido
+TRABAJOS_MAX_DURACION = int(os.environ.get('TRABAJOS_MAX_DURACION', 3600))